@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Artifact downloader
+Fetches built APK/AAB artifacts to disk instead of just printing their URLs:
+  * streams in fixed-size chunks, so memory use does not grow with file size
+  * splits large files into parallel HTTP Range segments
+  * resumes partial downloads (<name>.part + <name>.part.json) after a disconnect
+  * checks the result against the artifact metadata (size_bytes/size, md5, sha256)
+  * downloads several artifacts at once
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from http_client import codemagic_session
+
+CHUNK_SIZE = 256 * 1024
+# Byte offsets must refer to the stored file, not a gzip-encoded body
+IDENTITY = {"Accept-Encoding": "identity"}
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024   # smaller files are fetched in one stream
+MAX_SEGMENTS = 4
+MAX_RETRIES = 8
+
+
+class DownloadError(Exception):
+    """An artifact could not be downloaded or failed verification"""
+
+
+def _expected_size(artifact):
+    size = artifact.get("size_bytes", artifact.get("size"))
+    return int(size) if isinstance(size, (int, float)) or (isinstance(size, str) and size.isdigit()) else None
+
+
+def _probe(session, url):
+    """(total size or None, server accepts ranges)"""
+    response = session.get(url, headers={"Range": "bytes=0-0", **IDENTITY}, stream=True)
+    response.close()
+    if response.status_code == 206:
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        return (int(total) if total.isdigit() else None), True
+    if response.status_code == 200:
+        length = response.headers.get("Content-Length")
+        return (int(length) if length else None), False
+    raise DownloadError(f"{url}: HTTP {response.status_code}")
+
+
+def _plan_segments(total, segments):
+    """[[start, end_inclusive, bytes_done], ...] covering the file"""
+    count = max(1, min(segments, total // MIN_SEGMENT_SIZE))
+    step = -(-total // count)
+    return [[start, min(start + step, total) - 1, 0] for start in range(0, total, step)]
+
+
+class _State:
+    """Segment progress persisted next to the .part file"""
+
+    def __init__(self, path, url, total, segments):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = None
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                if saved.get("url") == url and saved.get("total") == total:
+                    self.data = saved
+            except ValueError:
+                pass
+        if self.data is None:
+            self.data = {"url": url, "total": total, "segments": _plan_segments(total, segments)}
+        self.resumed_bytes = sum(segment[2] for segment in self.data["segments"])
+        self.last_saved = 0
+
+    def advance(self, index, count, force=False):
+        with self.lock:
+            self.data["segments"][index][2] += count
+            now = time.monotonic()
+            if force or now - self.last_saved > 0.5:
+                self.last_saved = now
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self.data, f)
+                os.replace(tmp, self.path)
+
+
+def _fetch_segment(session, url, part_path, state, index, stats):
+    """Download one Range segment into its slot of the .part file, resuming on errors"""
+    start, end, _ = state.data["segments"][index]
+    attempt = 0
+    while True:
+        done = state.data["segments"][index][2]
+        if start + done > end:
+            return
+        try:
+            headers = {"Range": f"bytes={start + done}-{end}", **IDENTITY}
+            with session.get(url, headers=headers, stream=True) as response:
+                if response.status_code != 206:
+                    raise DownloadError(f"{url}: expected 206, got {response.status_code}")
+                with open(part_path, "r+b") as f:
+                    f.seek(start + done)
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        state.advance(index, len(chunk))
+            state.advance(index, 0, force=True)
+            attempt = 0
+        except (requests.RequestException, ConnectionError) as e:
+            attempt += 1
+            state.advance(index, 0, force=True)
+            with state.lock:
+                stats["retries"] += 1
+            if attempt > MAX_RETRIES:
+                raise DownloadError(f"{url}: giving up after {MAX_RETRIES} retries ({e})")
+            time.sleep(min(10, 0.2 * 2 ** attempt))
+
+
+def _fetch_stream(session, url, part_path, stats):
+    """Single sequential stream for servers without Range support"""
+    attempt = 0
+    while True:
+        try:
+            with session.get(url, stream=True) as response:
+                if response.status_code != 200:
+                    raise DownloadError(f"{url}: HTTP {response.status_code}")
+                with open(part_path, "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+            return
+        except (requests.RequestException, ConnectionError) as e:
+            attempt += 1
+            stats["retries"] += 1
+            if attempt > MAX_RETRIES:
+                raise DownloadError(f"{url}: giving up after {MAX_RETRIES} retries ({e})")
+            time.sleep(min(10, 0.2 * 2 ** attempt))
+
+
+def _verify(path, artifact):
+    expected_size = _expected_size(artifact)
+    size = os.path.getsize(path)
+    if expected_size is not None and size != expected_size:
+        raise DownloadError(f"{path}: size {size} != expected {expected_size}")
+    digests = {name: hashlib.new(name) for name in ("md5", "sha256") if artifact.get(name)}
+    if digests:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                for digest in digests.values():
+                    digest.update(chunk)
+        for name, digest in digests.items():
+            if digest.hexdigest().lower() != artifact[name].lower():
+                raise DownloadError(f"{path}: {name} mismatch")
+
+
+def download_artifact(artifact, dest_dir="artifacts", session=None, segments=MAX_SEGMENTS):
+    """Download one artifact record ({"name", "url", "size_bytes", ...}); returns stats"""
+    session = session or codemagic_session()
+    url = artifact["url"]
+    name = os.path.basename(artifact.get("name") or url.rstrip("/").rpartition("/")[2])
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, name)
+    part_path = path + ".part"
+    state_path = part_path + ".json"
+    stats = {"name": name, "path": path, "retries": 0, "resumed_bytes": 0, "segments": 1}
+    started = time.time()
+
+    total, ranges = _probe(session, url)
+    if total is None:
+        total = _expected_size(artifact)
+
+    if ranges and total:
+        if not os.path.exists(part_path) or os.path.getsize(part_path) != total:
+            # Saved progress only describes a .part laid out for this file: start again
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            with open(part_path, "wb") as f:
+                f.truncate(total)
+        state = _State(state_path, url, total, segments)
+        stats["resumed_bytes"] = state.resumed_bytes
+        stats["segments"] = len(state.data["segments"])
+        with ThreadPoolExecutor(len(state.data["segments"])) as pool:
+            futures = [pool.submit(_fetch_segment, session, url, part_path, state, index, stats)
+                       for index in range(len(state.data["segments"]))]
+            for future in futures:
+                future.result()
+    else:
+        _fetch_stream(session, url, part_path, stats)
+
+    _verify(part_path, artifact)
+    os.replace(part_path, path)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    stats["bytes"] = os.path.getsize(path)
+    stats["seconds"] = time.time() - started
+    return stats
+
+
+def download_artifacts(artifacts, dest_dir="artifacts", session=None, parallel=3):
+    """Download several artifacts concurrently; returns [(artifact, stats or exception)]"""
+    session = session or codemagic_session()
+    with ThreadPoolExecutor(parallel) as pool:
+        futures = [(artifact, pool.submit(download_artifact, artifact, dest_dir, session))
+                   for artifact in artifacts if artifact.get("url")]
+        results = []
+        for artifact, future in futures:
+            try:
+                stats = future.result()
+                print(f"📥 {stats['name']}: {stats['bytes'] / 1024 / 1024:.1f} MB in {stats['seconds']:.1f}s "
+                      f"({stats['segments']} segments, {stats['retries']} retries)")
+                results.append((artifact, stats))
+            except Exception as e:
+                print(f"❌ {artifact.get('name', artifact['url'])}: {e}")
+                results.append((artifact, e))
+    return results
+
+
+def benchmark(count=3, size_mb=24, drop_rate=0.3):
+    """Download artifacts from a Range-capable stub that drops connections at random"""
+    import shutil
+    import tempfile
+    from mock_backend import MockBackend
+    from http_client import make_codemagic_session
+
+    workdir = tempfile.mkdtemp()
+    try:
+        with MockBackend() as backend:
+            artifacts = []
+            for i in range(count):
+                data = os.urandom(size_mb * 1024 * 1024)
+                url = backend.add_file(f"app-debug-{i}.apk", data)
+                artifacts.append({"name": f"app-debug-{i}.apk", "url": url, "size_bytes": len(data),
+                                  "md5": hashlib.md5(data).hexdigest()})
+            backend.drop_rate = drop_rate
+            started = time.time()
+            results = download_artifacts(artifacts, workdir, make_codemagic_session(backend.url))
+            elapsed = time.time() - started
+
+        ok = [stats for _, stats in results if isinstance(stats, dict)]
+        print(f"{len(ok)}/{count} artifacts of {size_mb} MB verified in {elapsed:.1f}s "
+              f"with {drop_rate:.0%} of transfers cut; {sum(s['retries'] for s in ok)} resumes")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Concurrent CodeMagic client
+asyncio front end for the CodeMagic API: trigger/status/artifacts/logs as
+coroutines, plus a watcher that follows many builds at once over a single
+connection pool and yields every status change as it happens.
+
+Calls run on the pooled requests session from http_client.py in worker
+threads; a semaphore bounds how many are in flight (and so how many pooled
+sockets are used).
+"""
+
+import asyncio
+import sys
+import time
+
+from build_status import is_terminal, unwrap_build
+from http_client import APP_ID, make_codemagic_session
+
+
+class CodemagicError(Exception):
+    """A CodeMagic API call returned an unexpected status code"""
+
+
+class AsyncCodemagicClient:
+    """Bounded-concurrency CodeMagic client sharing one connection pool"""
+
+    def __init__(self, session=None, concurrency=10, app_id=APP_ID):
+        self.session = session or make_codemagic_session(pool_maxsize=concurrency)
+        self.app_id = app_id
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def _call(self, method, url, expected=(200, 201), **kwargs):
+        async with self.semaphore:
+            response = await asyncio.to_thread(self.session.request, method, url, **kwargs)
+        if response.status_code not in expected:
+            raise CodemagicError(f"{method} {url}: {response.status_code}")
+        return response
+
+    async def trigger(self, workflow_id="android-workflow", branch="main", variables=None):
+        """Start a build and return its ID"""
+        payload = {"appId": self.app_id, "workflowId": workflow_id, "branch": branch}
+        if variables:
+            payload["environment"] = {"variables": variables}
+        response = await self._call("POST", "/builds", json=payload)
+        data = response.json()
+        return data.get("buildId") or data.get("_id")
+
+    async def status(self, build_id):
+        """Full build record"""
+        response = await self._call("GET", f"/builds/{build_id}")
+        return unwrap_build(response.json())
+
+    async def artifacts(self, build_id):
+        response = await self._call("GET", f"/builds/{build_id}/artifacts")
+        return response.json()
+
+    async def logs(self, build_id, failed_only=True):
+        """{action name: log text} for the build's actions (failed ones by default)"""
+        build = await self.status(build_id)
+        actions = [action for action in build.get("buildActions", [])
+                   if action.get("logUrl") and (not failed_only or action.get("status") == "failed")]
+        texts = await asyncio.gather(*(self._call("GET", action["logUrl"]) for action in actions))
+        return {action.get("name", "Unknown"): response.text for action, response in zip(actions, texts)}
+
+    async def watch(self, build_ids, interval=30, timeout=1800):
+        """Async generator of (build_id, old_status, new_status, build) transitions.
+
+        All builds are polled concurrently each round; the generator ends once
+        every build reached a terminal status or the timeout expired.
+        """
+        last = {build_id: None for build_id in build_ids}
+        pending = set(build_ids)
+        deadline = time.monotonic() + timeout
+
+        while pending and time.monotonic() < deadline:
+            started = time.monotonic()
+            polled = list(pending)
+            results = await asyncio.gather(*(self.status(build_id) for build_id in polled),
+                                           return_exceptions=True)
+            for build_id, build in zip(polled, results):
+                if isinstance(build, Exception):
+                    continue
+                status = build.get("status")
+                if status != last[build_id]:
+                    yield build_id, last[build_id], status, build
+                    last[build_id] = status
+                if is_terminal(build):
+                    pending.discard(build_id)
+            if pending:
+                await asyncio.sleep(max(0, interval - (time.monotonic() - started)))
+
+
+async def watch_builds(build_ids, interval=30):
+    """Print status transitions for several builds; returns {build_id: final status}"""
+    client = AsyncCodemagicClient()
+    final = {}
+    async for build_id, old, new, build in client.watch(build_ids, interval):
+        print(f"[{time.strftime('%H:%M:%S')}] {build_id} ({build.get('workflowId', 'Unknown')}): {old or '-'} -> {new}")
+        final[build_id] = build.get("buildStatus") or new
+    return final
+
+
+def benchmark(builds=100, concurrency=10):
+    """Watch 100 simulated builds in one process against the local stub"""
+    import random
+    from mock_backend import MockBackend
+
+    async def run(backend):
+        client = AsyncCodemagicClient(make_codemagic_session(backend.url, pool_maxsize=concurrency),
+                                      concurrency=concurrency)
+        build_ids = await asyncio.gather(*(client.trigger(random.choice(["simple-apk", "android-workflow"]))
+                                           for _ in range(builds)))
+        transitions = 0
+        finished = set()
+        async for build_id, old, new, build in client.watch(build_ids, interval=0.2, timeout=60):
+            transitions += 1
+            if is_terminal(build):
+                finished.add(build_id)
+        return transitions, finished
+
+    def timeline():
+        # Each build queues, builds and finishes at its own pace
+        return [(random.uniform(0, 1), {"status": "building"}),
+                (random.uniform(1, 3), {"status": "finished",
+                                        "buildStatus": random.choice(["success", "failed"])})]
+
+    random.seed(7)
+    with MockBackend(latency=0.01) as backend:
+        backend.default_timeline = timeline
+        start = time.time()
+        transitions, finished = asyncio.run(run(backend))
+        elapsed = time.time() - start
+
+    print(f"{builds} builds watched, concurrency {concurrency}")
+    print(f"  finished:     {len(finished)}/{builds}")
+    print(f"  transitions:  {transitions}")
+    print(f"  requests:     {backend.request_count}")
+    print(f"  connections:  {backend.connection_count}")
+    print(f"  wall time:    {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    elif len(sys.argv) > 1:
+        results = asyncio.run(watch_builds(sys.argv[1:]))
+        for build_id, result in results.items():
+            print(f"{build_id}: {result}")
+    else:
+        print("Usage: async_codemagic.py BUILD_ID [BUILD_ID ...] | --benchmark")
@@ -1,7 +1,10 @@
 import os
 import subprocess
 import sys
-import time
+
+from gradle_mirrors import write_init_gradle
+from gradle_session import session_from_argv
+from maven_proxy import start_local_repository
 
 # تنظیم مسیر پروژه
 project_dir = r"C:\Users\Admin\Downloads\Compressed\PersianAIAssistantAndroid-main"
@@ -35,33 +38,21 @@ with open('local.properties', 'w') as f:
     f.write(f'sdk.dir={android_home.replace(os.sep, "/")}\n')
 print("✅ local.properties ایجاد شد")
 
-# ایجاد init.gradle برای دور زدن تحریم
-init_gradle = '''
-allprojects {
-    repositories {
-        maven { url 'https://maven.aliyun.com/repository/google' }
-        maven { url 'https://maven.aliyun.com/repository/central' }
-        maven { url 'https://repo1.maven.org/maven2/' }
-        google()
-        mavenCentral()
-        gradlePluginPortal()
-    }
-    configurations.all {
-        resolutionStrategy.cacheChangingModulesFor 0, 'seconds'
-    }
-}
-'''
-
-with open('init.gradle', 'w') as f:
-    f.write(init_gradle)
-print("✅ init.gradle برای ایران ایجاد شد")
+if "--maven-proxy" in sys.argv or "--offline-deps" in sys.argv:
+    # وابستگی‌های از پیش دانلود شده از localhost؛ init.gradle به proxy اشاره می‌کند
+    start_local_repository("init.gradle", offline="--offline-deps" in sys.argv)
+else:
+    # ایجاد init.gradle برای دور زدن تحریم: سریع‌ترین mirrorهای در دسترس اول
+    print("🌐 بررسی سرعت mirrorها...")
+    ranked, _ = write_init_gradle("init.gradle", refresh="--refresh-mirrors" in sys.argv)
+    print(f"✅ init.gradle برای ایران ایجاد شد: {', '.join(result['name'] for result in ranked)}")
 
 # بهینه‌سازی gradle.properties
 gradle_props = '''
 org.gradle.jvmargs=-Xmx4g -Dfile.encoding=UTF-8
 org.gradle.parallel=true
 org.gradle.daemon=true
-org.gradle.caching=false
+org.gradle.caching=true
 android.useAndroidX=true
 android.enableJetifier=true
 kotlin.code.style=official
@@ -75,36 +66,30 @@ with open('gradle.properties', 'w') as f:
     f.write(gradle_props)
 print("✅ gradle.properties بهینه شد")
 
-def run_gradle_command(command):
+# یک daemon گرم برای همه مراحل؛ با --no-clean بیلد افزایشی
+session = session_from_argv(gradlew="gradlew.bat", init_script="init.gradle", echo=False, timeout=1800)
+
+def run_gradle_command(tasks, init=True, extra=()):
     """اجرای دستور gradle"""
-    full_command = f"gradlew.bat {command}"
-    print(f"🔄 {full_command}")
-    
     try:
-        result = subprocess.run(full_command, shell=True, capture_output=True, text=True, timeout=1800)
-        if result.returncode == 0:
+        success, parser = session.run(tasks, init=init, extra=extra)
+        if success:
             print("✅ موفقیت‌آمیز")
-            return True
         else:
             print("❌ خطا:")
-            print(result.stderr[-500:] if result.stderr else "خطای ناشناخته")
-            return False
-    except subprocess.TimeoutExpired:
-        print("⏰ timeout")
-        return False
+        parser.print_report()
+        return success
     except Exception as e:
         print(f"❌ خطا: {e}")
         return False
 
 # مرحله 1: پاکسازی
 print("\n🧹 مرحله 1: پاکسازی...")
-if not run_gradle_command("clean --init-script=init.gradle --no-daemon"):
-    print("⚠️ تلاش بدون init script...")
-    run_gradle_command("clean --no-daemon")
+session.clean_step()
 
 # مرحله 2: build اصلی
 print("\n🔨 مرحله 2: شروع build...")
-build_success = run_gradle_command("assembleDebug --init-script=init.gradle --stacktrace --no-daemon")
+build_success = run_gradle_command("assembleDebug", extra=["--stacktrace"])
 
 if not build_success:
     print("\n🔄 تلاش با تنظیمات ساده‌تر...")
@@ -173,10 +158,14 @@ dependencies {
     print("✅ build.gradle ساده ایجاد شد")
     
     # پاکسازی مجدد
-    run_gradle_command("clean --no-daemon")
+    if session.clean:
+        run_gradle_command("clean", init=False)
     
     # build ساده
-    build_success = run_gradle_command("assembleDebug --init-script=init.gradle --no-daemon")
+    build_success = run_gradle_command("assembleDebug")
+
+session.print_timings()
+session.close()
 
 # بررسی نتیجه
 apk_path = "app/build/outputs/apk/debug/app-debug.apk"
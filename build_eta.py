@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Build duration model
+Predicts how long a CodeMagic build will wait in the queue and how long it
+will then run, per workflow and instance type, from the builds kept in the
+local history store (build_history.py). Each prediction is a median with an
+interval (the 10th-90th percentile of recent builds); the monitors take their
+timeout, their poll schedule and the ETA they print from it.
+
+  build_eta.py [--workflow ID] [--instance TYPE]    predictions from the history
+  build_eta.py evaluate [-n 300]                    replay the history against the model
+"""
+
+import argparse
+import sys
+import time
+
+from build_history import DB_FILE, BuildHistory, percentile
+from build_status import DEFAULT_EXPECTED_SECONDS, parse_time
+
+RECENT = 30             # builds per group a prediction is taken from, so regressions show up quickly
+MIN_SAMPLES = 5         # fewer than this and the broader group is used
+INTERVAL = (0.1, 0.9)
+# A build is given up on once it is this much past the end of its interval
+TIMEOUT_MARGIN = 1.5
+MIN_TIMEOUT = 10 * 60
+# Used when there is no history at all: (low, median, high) seconds
+DEFAULT_QUEUE = (10, 60, 300)
+DEFAULT_BUILD = (DEFAULT_EXPECTED_SECONDS / 3, DEFAULT_EXPECTED_SECONDS, 2 * DEFAULT_EXPECTED_SECONDS)
+
+
+def _spread(values):
+    """(low, median, high) of a list of seconds"""
+    values = sorted(values)
+    return percentile(values, INTERVAL[0]), percentile(values, 0.5), percentile(values, INTERVAL[1])
+
+
+def _epoch(value):
+    try:
+        return parse_time(value).timestamp() if value else None
+    except ValueError:
+        return None
+
+
+def _minutes(seconds):
+    return f"{seconds / 60:.0f} min" if seconds >= 90 else f"{seconds:.0f} s"
+
+
+class Prediction:
+    """Queue and build seconds as (low, median, high), and the builds they were taken from"""
+
+    def __init__(self, queue, build, samples=0, source="default"):
+        self.queue = tuple(queue)
+        self.build = tuple(build)
+        self.samples = samples
+        self.source = source
+
+    @property
+    def total(self):
+        return self.queue[1] + self.build[1]
+
+    def timeout(self):
+        """Seconds after submission to stop waiting for the build"""
+        return max(MIN_TIMEOUT, TIMEOUT_MARGIN * (self.queue[2] + self.build[2]))
+
+    def finish(self, build_record, now=None):
+        """(earliest, expected, latest) finish as epoch seconds, from the record's timestamps"""
+        now = now or time.time()
+        started = _epoch(build_record.get("startedAt"))
+        if started:
+            return tuple(max(now, started + seconds) for seconds in self.build)
+        created = _epoch(build_record.get("createdAt")) or now
+        return tuple(max(now, created + queue + build) for queue, build in zip(self.queue, self.build))
+
+    def timeout_left(self, build_record, now=None):
+        """Seconds left of timeout() for a build that may have been submitted a while ago"""
+        now = now or time.time()
+        created = _epoch(build_record.get("createdAt")) or now
+        return max(5 * 60, self.timeout() - (now - created))
+
+    def eta(self, build_record, now=None):
+        """"ETA 14:32 (14:27-14:41)" in local time"""
+        low, expected, high = (time.strftime("%H:%M", time.localtime(t)) for t in self.finish(build_record, now))
+        return f"ETA {expected} ({low}-{high})"
+
+    def describe(self):
+        where = f"from {self.samples} {self.source} builds" if self.samples else "no build history yet"
+        low, high = _minutes(self.build[0]), _minutes(self.build[2])
+        if low.endswith(" min") and high.endswith(" min"):
+            low = low[:-4]
+        return f"queue ~{_minutes(self.queue[1])}, build ~{_minutes(self.build[1])} ({low}-{high}, {where})"
+
+
+class DurationModel:
+    """Queue and build times of finished builds, grouped by (workflow, instance type)"""
+
+    def __init__(self, records=()):
+        self.groups = {}    # (workflow, instance) -> ([queue seconds], [build seconds]), oldest first
+        for record in records:
+            self.add(*record)
+
+    def add(self, workflow, instance, queue, build):
+        for key in dict.fromkeys(((workflow, instance), (workflow, None), (None, None))):
+            queues, builds = self.groups.setdefault(key, ([], []))
+            if queue is not None:
+                queues.append(max(0.0, queue))
+            builds.append(build)
+
+    def predict(self, workflow=None, instance=None):
+        """Prediction for the narrowest group with MIN_SAMPLES builds"""
+        candidates = [((None, None), "recent")]
+        if workflow:
+            candidates.insert(0, ((workflow, None), workflow))
+            if instance:
+                candidates.insert(0, ((workflow, instance), f"{workflow} on {instance}"))
+        for key, source in candidates:
+            queues, builds = self.groups.get(key, ([], []))
+            if len(builds) >= MIN_SAMPLES:
+                queue = _spread(queues[-RECENT:]) if len(queues) >= MIN_SAMPLES else DEFAULT_QUEUE
+                return Prediction(queue, _spread(builds[-RECENT:]), min(RECENT, len(builds)), source)
+        return Prediction(DEFAULT_QUEUE, DEFAULT_BUILD)
+
+    @staticmethod
+    def records(history, last=None):
+        """(workflow, instance, queue seconds, build seconds) of finished builds, oldest first.
+
+        Cancelled builds are left out: they say nothing about how long a build takes.
+        """
+        rows = history.db.execute(
+            "SELECT workflow, instance, created_at, started_at, duration FROM builds "
+            "WHERE state = 'finished' AND result != 'cancelled' AND duration IS NOT NULL "
+            "ORDER BY created_at DESC" + (" LIMIT %d" % int(last) if last else "")).fetchall()
+        records = []
+        for workflow, instance, created, started, duration in reversed(rows):
+            queue = None
+            if created and started and created != started:
+                queue = _epoch(started) - _epoch(created)
+            records.append((workflow, instance, queue, duration))
+        return records
+
+    @classmethod
+    def from_history(cls, history):
+        return cls(cls.records(history))
+
+
+def load_model(session=None, path=DB_FILE, sync=True):
+    """Model over the local history store, synced first (one request when nothing is new)"""
+    history = BuildHistory(path, session)
+    try:
+        if sync:
+            try:
+                history.sync()
+            except Exception as e:
+                print(f"⚠️ Build history sync failed ({e}), predicting from stored builds")
+        return DurationModel.from_history(history)
+    finally:
+        history.close()
+
+
+def predict(workflow=None, instance=None, session=None):
+    return load_model(session).predict(workflow, instance)
+
+
+def evaluate(records, caps=((10, "BUILD_NOW.py"), (25, "monitor_build.py"), (30, "build_manager.py"))):
+    """Replay records oldest first, predicting each from the ones before it, and print the results.
+
+    Compared with the median of the last 20 builds of the workflow that
+    expected_duration() gives (no queue time, no instance type) and with the
+    monitors' fixed timeouts.
+    """
+    model = DurationModel()
+    errors, baseline_errors, inside, timeouts = [], [], 0, []
+    capped = {minutes: 0 for minutes, _ in caps}
+    scored = 0
+    for workflow, instance, queue, build in records:
+        actual = (queue or 0) + build
+        prediction = model.predict(workflow, instance)
+        if prediction.samples:
+            scored += 1
+            errors.append(abs(prediction.total - actual))
+            previous = model.groups.get((workflow, None), ([], []))[1][-20:]
+            baseline = percentile(sorted(previous), 0.5) if previous else DEFAULT_EXPECTED_SECONDS
+            baseline_errors.append(abs(baseline - actual))
+            inside += prediction.build[0] <= build <= prediction.build[2]
+            timeouts.append((prediction.timeout(), actual))
+            for minutes in capped:
+                capped[minutes] += actual > minutes * 60
+        model.add(workflow, instance, queue, build)
+
+    if not scored:
+        print("Not enough builds in the history to evaluate")
+        return None
+    errors.sort()
+    baseline_errors.sort()
+    print(f"{len(records)} recorded builds, {scored} predicted from the builds before them")
+    print(f"ETA error (queue + build), median / p90:")
+    print(f"  model:                         {_minutes(percentile(errors, 0.5)):>7} / "
+          f"{_minutes(percentile(errors, 0.9))}")
+    print(f"  median of the last 20 builds:  {_minutes(percentile(baseline_errors, 0.5)):>7} / "
+          f"{_minutes(percentile(baseline_errors, 0.9))}")
+    print(f"Build time inside the predicted {INTERVAL[1] - INTERVAL[0]:.0%} interval: {inside / scored:.0%}")
+    print(f"{'timeout':<28} {'finished builds cut off':>24} {'wait on a hung build':>21}")
+    for minutes, script in caps:
+        print(f"{f'{minutes} min ({script})':<28} {capped[minutes] / scored:>23.1%} {minutes:>17.0f} min")
+    cut_off = sum(1 for timeout, actual in timeouts if actual > timeout)
+    mean_timeout = sum(timeout for timeout, _ in timeouts) / len(timeouts)
+    print(f"{'model':<28} {cut_off / scored:>23.1%} {mean_timeout / 60:>17.0f} min")
+    return {"error": percentile(errors, 0.5), "baseline_error": percentile(baseline_errors, 0.5),
+            "coverage": inside / scored, "cut_off": cut_off / scored}
+
+
+def _recorded_history(count=600, seed=25):
+    """A few months of builds: two workflows on two instance types, busy-hour queues,
+    failures that stop early, and a dependency upgrade that slows android-workflow
+    by 4 minutes two thirds of the way through"""
+    import random
+
+    random.seed(seed)
+    means = {("android-workflow", "mac_mini_m1"): 14 * 60, ("android-workflow", "linux_x2"): 19 * 60,
+             ("simple-apk", "mac_mini_m1"): 8 * 60, ("simple-apk", "linux_x2"): 11 * 60}
+    records = []
+    for i in range(count):
+        workflow = random.choice(["android-workflow", "android-workflow", "simple-apk"])
+        instance = "mac_mini_m1" if random.random() < 0.7 else "linux_x2"
+        hour = (i * 5) % 24
+        busy = 9 <= hour <= 18
+        queue = random.lognormvariate(3.5 + busy, 0.6) + (random.random() < 0.05) * random.uniform(300, 900)
+        build = means[workflow, instance] * random.lognormvariate(0, 0.12)
+        if workflow == "android-workflow" and i > count * 2 // 3:
+            build += 4 * 60
+        if random.random() < 0.15:
+            build *= random.uniform(0.2, 0.7)       # failed part-way
+        records.append((workflow, instance, queue, build))
+    return records
+
+
+def benchmark():
+    """Replay a generated build history through evaluate()"""
+    evaluate(_recorded_history())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict CodeMagic queue and build times from the build history")
+    parser.add_argument("command", nargs="?", default="predict", choices=["predict", "evaluate"])
+    parser.add_argument("--workflow")
+    parser.add_argument("--instance")
+    parser.add_argument("-n", "--last", type=int, help="number of most recent builds to evaluate on")
+    parser.add_argument("--no-sync", action="store_true", help="use the local store only")
+    parser.add_argument("--db", default=DB_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == "evaluate":
+        history = BuildHistory(args.db)
+        records = DurationModel.records(history, args.last)
+        history.close()
+        return 0 if evaluate(records) else 1
+
+    model = load_model(path=args.db, sync=not args.no_sync)
+    keys = [(args.workflow, args.instance)] if args.workflow else sorted(
+        {key for key in model.groups if key[0]}, key=lambda key: (key[0], key[1] or ""))
+    for workflow, instance in keys or [(None, None)]:
+        prediction = model.predict(workflow, instance)
+        label = f"{workflow or 'any workflow'}" + (f" on {instance}" if instance else "")
+        print(f"⏱️ {label}: {prediction.describe()}, timeout {_minutes(prediction.timeout())}")
+    return 0
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        sys.exit(main())
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Build history store
+Keeps every CodeMagic build (with its actions, durations and artifacts) in a
+local SQLite database so build-time regressions can be tracked across
+hundreds of builds without refetching them.
+
+  build_history.py sync                  fetch builds newer than the cursor
+  build_history.py list [-n 10]          recent builds (list_builds.py output)
+  build_history.py durations [-n 100]    duration percentiles per workflow
+  build_history.py failures [-n 100]     failure rate per branch
+  build_history.py slowest [-n 100]      slowest actions
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from build_status import build_commit, normalize_status, parse_time
+from http_client import APP_ID, codemagic_session
+
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".build_history.db")
+PAGE_SIZE = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id TEXT PRIMARY KEY,
+    workflow TEXT,
+    branch TEXT,
+    status TEXT,
+    state TEXT,
+    result TEXT,
+    instance TEXT,
+    commit_sha TEXT,
+    created_at TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    duration REAL,
+    record TEXT                 -- the API record as JSON, for build_lookup.py
+);
+CREATE INDEX IF NOT EXISTS builds_created ON builds (created_at);
+CREATE INDEX IF NOT EXISTS builds_workflow ON builds (workflow, created_at);
+CREATE INDEX IF NOT EXISTS builds_branch ON builds (branch, created_at);
+
+CREATE TABLE IF NOT EXISTS actions (
+    build_id TEXT,
+    position INTEGER,
+    name TEXT,
+    status TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    duration REAL,
+    log_url TEXT,
+    PRIMARY KEY (build_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    build_id TEXT,
+    name TEXT,
+    type TEXT,
+    size INTEGER,
+    url TEXT,
+    PRIMARY KEY (build_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _duration(record):
+    if record.get("startedAt") and record.get("finishedAt"):
+        try:
+            return (parse_time(record["finishedAt"]) - parse_time(record["startedAt"])).total_seconds()
+        except ValueError:
+            return None
+    return None
+
+
+def percentile(values, fraction):
+    """Linear-interpolated percentile of a sorted list"""
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class BuildHistory:
+    """SQLite-backed store of CodeMagic build records"""
+
+    def __init__(self, path=DB_FILE, session=None, app_id=APP_ID):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.session = session
+        self.app_id = app_id
+
+    def close(self):
+        self.db.close()
+
+    @property
+    def cursor(self):
+        """created_at of the newest build before which everything is finished"""
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'cursor'").fetchone()
+        return row[0] if row else ""
+
+    def store(self, build):
+        """Insert or replace one build record with its actions and artifacts"""
+        state, result = normalize_status(build)
+        self.db.execute(
+            "INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (build["_id"], build.get("workflowId"), build.get("branch"), build.get("status"),
+             state, result, build.get("instanceType"), build_commit(build),
+             build.get("createdAt") or build.get("startedAt") or "",
+             build.get("startedAt"), build.get("finishedAt"), _duration(build), json.dumps(build)))
+        self.db.execute("DELETE FROM actions WHERE build_id = ?", (build["_id"],))
+        self.db.executemany(
+            "INSERT INTO actions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(build["_id"], position, action.get("name"), action.get("status"),
+              action.get("startedAt"), action.get("finishedAt"), _duration(action), action.get("logUrl"))
+             for position, action in enumerate(build.get("buildActions") or [])])
+        self.db.execute("DELETE FROM artifacts WHERE build_id = ?", (build["_id"],))
+        self.db.executemany(
+            "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)",
+            [(build["_id"], artifact.get("name"), artifact.get("type"),
+              artifact.get("size_bytes", artifact.get("size")), artifact.get("url"))
+             for artifact in build.get("artefacts") or []])
+
+    def sync(self, page_size=PAGE_SIZE):
+        """Fetch builds newer than the cursor; returns how many were stored.
+
+        Pages stop at the first build at or before the cursor, so a sync
+        with nothing new costs a single request. Builds still queued or
+        running are kept ahead of the cursor and picked up again next time.
+        """
+        session = self.session or codemagic_session()
+        cursor = self.cursor
+        stored = 0
+        oldest_unfinished = None
+        newest = None
+        skip = 0
+        with self.db:
+            while True:
+                response = session.get("/builds", params={"appId": self.app_id, "limit": page_size, "skip": skip})
+                if response.status_code != 200:
+                    raise RuntimeError(f"Failed to get builds: {response.status_code}")
+                builds = response.json().get("builds", [])
+                reached_cursor = False
+                for build in builds:
+                    created = build.get("createdAt") or build.get("startedAt") or ""
+                    if cursor and created <= cursor:
+                        reached_cursor = True
+                        break
+                    self.store(build)
+                    stored += 1
+                    newest = max(newest or created, created)
+                    if normalize_status(build)[0] != "finished":
+                        oldest_unfinished = min(oldest_unfinished or created, created)
+                if reached_cursor or len(builds) < page_size:
+                    break
+                skip += len(builds)
+
+            if newest:
+                if oldest_unfinished:
+                    # Everything strictly older than the oldest unfinished build is final
+                    row = self.db.execute("SELECT MAX(created_at) FROM builds WHERE created_at < ?",
+                                          (oldest_unfinished,)).fetchone()
+                    new_cursor = row[0] or cursor
+                else:
+                    new_cursor = newest
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('cursor', ?)", (new_cursor,))
+        return stored
+
+    def record(self, build_id):
+        """Stored API record of a build, or None"""
+        row = self.db.execute("SELECT record FROM builds WHERE id = ?", (build_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, workflow=None, branch=None, since=None, until=None, limit=None):
+        """Stored records matching the filters, newest first"""
+        where, params = [], []
+        for clause, value in (("workflow = ?", workflow), ("branch = ?", branch),
+                              ("created_at >= ?", since), ("created_at < ?", until)):
+            if value:
+                where.append(clause)
+                params.append(value)
+        sql = "SELECT record FROM builds"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC"
+        if limit:
+            sql += " LIMIT %d" % int(limit)
+        return [json.loads(record) for (record,) in self.db.execute(sql, params)]
+
+    def recent(self, limit=10):
+        return self.db.execute(
+            "SELECT id, status, result, workflow, branch, started_at, finished_at, duration "
+            "FROM builds ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+
+    def _last(self, limit):
+        """SQL for the ids of the newest `limit` builds"""
+        return "SELECT id FROM builds ORDER BY created_at DESC LIMIT %d" % int(limit)
+
+    def duration_percentiles(self, last=100, fractions=(0.5, 0.9, 0.95)):
+        """{workflow: (count, [percentiles...])} over finished builds"""
+        durations = {}
+        for workflow, duration in self.db.execute(
+                "SELECT workflow, duration FROM builds WHERE id IN (%s) AND duration IS NOT NULL "
+                "AND state = 'finished' ORDER BY workflow, duration" % self._last(last)):
+            durations.setdefault(workflow, []).append(duration)
+        return {workflow: (len(values), [percentile(values, f) for f in fractions])
+                for workflow, values in durations.items()}
+
+    def failure_rates(self, last=100):
+        """[(branch, builds, failures, rate)] over finished builds"""
+        return self.db.execute(
+            "SELECT branch, COUNT(*), SUM(result = 'failed'), AVG(result = 'failed') FROM builds "
+            "WHERE id IN (%s) AND state = 'finished' GROUP BY branch ORDER BY 4 DESC" % self._last(last)).fetchall()
+
+    def slowest_actions(self, last=100, limit=10):
+        """[(action, runs, average seconds, max seconds)]"""
+        return self.db.execute(
+            "SELECT name, COUNT(*), AVG(duration), MAX(duration) FROM actions "
+            "WHERE build_id IN (%s) AND duration IS NOT NULL GROUP BY name "
+            "ORDER BY 3 DESC LIMIT ?" % self._last(last), (limit,)).fetchall()
+
+
+def _format_time(value):
+    if not value:
+        return "Not started"
+    try:
+        return parse_time(value).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return value
+
+
+def _minutes(seconds):
+    return f"{seconds / 60:.1f}m" if seconds is not None else "-"
+
+
+def print_recent(history, limit=10):
+    """The build list list_builds.py used to print, from the local store"""
+    builds = history.recent(limit)
+    print(f"\nFound {len(builds)} recent builds:")
+    print("-" * 80)
+    for i, (build_id, status, result, workflow, branch, started, finished, duration) in enumerate(builds, 1):
+        print(f"{i}. Build ID: {build_id}")
+        print(f"   Status: {status}")
+        print(f"   Workflow: {workflow}")
+        print(f"   Branch: {branch}")
+        print(f"   Started: {_format_time(started)}")
+        if result:
+            print(f"   Result: {result}")
+            if finished:
+                print(f"   Finished: {_format_time(finished)} ({_minutes(duration)})")
+        print("-" * 40)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local CodeMagic build history")
+    parser.add_argument("command", nargs="?", default="list",
+                        choices=["sync", "list", "durations", "failures", "slowest"])
+    parser.add_argument("-n", "--last", type=int, help="number of most recent builds to look at")
+    parser.add_argument("--no-sync", action="store_true", help="answer from the local store only")
+    parser.add_argument("--db", default=DB_FILE)
+    args = parser.parse_args(argv)
+
+    history = BuildHistory(args.db)
+    if args.command == "sync" or not args.no_sync:
+        try:
+            stored = history.sync()
+            if args.command == "sync":
+                print(f"🔄 {stored} builds synced (cursor {history.cursor or '-'})")
+        except Exception as e:
+            print(f"⚠️ Sync failed ({e}), showing stored builds")
+
+    started = time.perf_counter()
+    if args.command == "list":
+        print_recent(history, args.last or 10)
+    elif args.command == "durations":
+        print(f"{'workflow':<20} {'builds':>6} {'p50':>7} {'p90':>7} {'p95':>7}")
+        for workflow, (count, values) in sorted(history.duration_percentiles(args.last or 100).items()):
+            print(f"{workflow or '-':<20} {count:>6} " + " ".join(f"{_minutes(v):>7}" for v in values))
+    elif args.command == "failures":
+        print(f"{'branch':<20} {'builds':>6} {'failed':>6} {'rate':>6}")
+        for branch, count, failed, rate in history.failure_rates(args.last or 100):
+            print(f"{branch or '-':<20} {count:>6} {failed:>6} {rate:>6.0%}")
+    elif args.command == "slowest":
+        print(f"{'action':<30} {'runs':>5} {'avg':>7} {'max':>7}")
+        for name, runs, average, longest in history.slowest_actions(args.last or 100):
+            print(f"{name or '-':<30} {runs:>5} {_minutes(average):>7} {_minutes(longest):>7}")
+    if args.command != "sync":
+        print(f"({(time.perf_counter() - started) * 1000:.1f} ms from the local store)")
+    history.close()
+
+
+def benchmark(history_size=500):
+    """Sync and query cost for a few hundred builds against the local stub"""
+    import random
+    import tempfile
+    from datetime import datetime, timedelta, timezone
+    from mock_backend import MockBackend
+    from http_client import make_codemagic_session
+
+    random.seed(11)
+    base = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    stamp = lambda moment: moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+    def fake_build(i):
+        created = base + timedelta(hours=3 * i)
+        moment = created + timedelta(seconds=random.uniform(10, 120))
+        actions = []
+        for name, mean in (("Preparing build machine", 40), ("Fetching app sources", 15),
+                           ("Installing dependencies", 120), ("Building Android", 480),
+                           ("Publishing", 20)):
+            finish = moment + timedelta(seconds=random.gauss(mean, mean / 5) + (i > 400) * (name == "Building Android") * 120)
+            actions.append({"name": name, "status": "success", "startedAt": stamp(moment), "finishedAt": stamp(finish)})
+            moment = finish
+        failed = random.random() < (0.35 if i % 4 == 0 else 0.1)
+        return dict(createdAt=stamp(created), startedAt=actions[0]["startedAt"], finishedAt=stamp(moment),
+                    status="finished", buildStatus="failed" if failed else "success",
+                    workflowId=random.choice(["android-workflow", "simple-apk"]),
+                    branch="develop" if i % 4 == 0 else "main", buildActions=actions,
+                    artefacts=[] if failed else [{"name": "app-debug.apk", "type": "apk", "size_bytes": 24_000_000,
+                                                  "url": f"https://example.invalid/{i}/app-debug.apk"}])
+
+    with MockBackend() as backend, tempfile.TemporaryDirectory() as workdir:
+        for i in range(history_size):
+            backend.add_build(**fake_build(i))
+        history = BuildHistory(os.path.join(workdir, "history.db"), make_codemagic_session(backend.url))
+
+        backend.reset_counters()
+        started = time.perf_counter()
+        stored = history.sync()
+        first = (backend.request_count, time.perf_counter() - started)
+
+        backend.add_build(**fake_build(history_size))
+        backend.reset_counters()
+        started = time.perf_counter()
+        incremental = history.sync()
+        second = (backend.request_count, time.perf_counter() - started)
+
+        timings = {}
+        for name, query in (("durations", lambda: history.duration_percentiles(300)),
+                            ("failures", lambda: history.failure_rates(300)),
+                            ("slowest", lambda: history.slowest_actions(300))):
+            started = time.perf_counter()
+            query()
+            timings[name] = (time.perf_counter() - started) * 1000
+        history.close()
+
+    print(f"{history_size} builds in the stub")
+    print(f"  first sync:       {stored} builds, {first[0]} requests, {first[1] * 1000:.0f} ms")
+    print(f"  incremental sync: {incremental} build, {second[0]} request, {second[1] * 1000:.0f} ms")
+    for name, ms in timings.items():
+        print(f"  {name + ' query:':<17} {ms:.2f} ms over the last 300 builds")
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        main()
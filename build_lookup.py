@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Build lookup
+Finds CodeMagic build records without scanning the last 10 builds:
+  * a build ID goes straight to /builds/{id}
+  * history is paged lazily (/builds?skip=...) only when a listing needs it
+  * records are kept in the local build history store (build_history.py),
+    indexed by ID, workflow, branch and date, so repeated lookups and
+    listings are answered without the network
+
+Finished builds never change, so stored finished records are served as-is;
+queued/running ones are refetched.
+"""
+
+import json
+import sys
+
+from build_history import DB_FILE, PAGE_SIZE, BuildHistory
+from build_status import is_terminal, unwrap_build
+from http_client import APP_ID, codemagic_session
+
+
+def _build_date(build):
+    return build.get("createdAt") or build.get("startedAt") or ""
+
+
+class BuildIndex:
+    """Build lookups over the local history store, fetching only what it lacks"""
+
+    def __init__(self, path=DB_FILE, session=None, app_id=APP_ID, page_size=PAGE_SIZE):
+        self.session = session or codemagic_session()
+        self.history = BuildHistory(path, self.session, app_id)
+        self.app_id = app_id
+        self.page_size = page_size
+        self.requests = 0
+
+    def close(self):
+        self.history.close()
+
+    def _store(self, builds):
+        with self.history.db:
+            for build in builds:
+                self.history.store(build)
+
+    def get(self, build_id, refresh=False):
+        """Build record by ID, or None if CodeMagic does not know it"""
+        cached = self.history.record(build_id)
+        if cached and is_terminal(cached) and not refresh:
+            return cached
+
+        try:
+            self.requests += 1
+            response = self.session.get(f"/builds/{build_id}")
+            if response.status_code == 200:
+                build = unwrap_build(response.json())
+                self._store([build])
+                return build
+            if response.status_code == 404:
+                return None
+        except Exception as e:
+            print(f"⚠️ Direct lookup failed ({e}), searching build history")
+
+        # Direct endpoint unavailable: page back through history
+        try:
+            for build in self.iter_builds():
+                if build["_id"] == build_id:
+                    return build
+        except Exception as e:
+            print(f"⚠️ Build history unavailable ({e})")
+        return cached
+
+    def iter_builds(self):
+        """Lazily page through /builds, newest first, storing every record"""
+        skip = 0
+        while True:
+            self.requests += 1
+            response = self.session.get("/builds", params={
+                "appId": self.app_id, "limit": self.page_size, "skip": skip})
+            if response.status_code != 200:
+                return
+            builds = response.json().get("builds", [])
+            self._store(builds)
+            yield from builds
+            if len(builds) < self.page_size:
+                return
+            skip += len(builds)
+
+    def sync(self):
+        """Fetch builds newer than the store's cursor; returns how many were new or updated"""
+        return self.history.sync(self.page_size)
+
+    def find(self, workflow=None, branch=None, since=None, until=None, limit=None):
+        """Stored builds matching the filters, newest first (no network)"""
+        return self.history.find(workflow, branch, since, until, limit)
+
+
+def find_build(build_id, session=None):
+    """Build record by ID via the local history store"""
+    return BuildIndex(session=session).get(build_id)
+
+
+def benchmark(history=300):
+    """Looking up an old build: scan of the last 10 vs BuildIndex"""
+    import os
+    import tempfile
+    from mock_backend import MockBackend
+    from http_client import make_codemagic_session
+
+    with MockBackend() as backend, tempfile.TemporaryDirectory() as workdir:
+        ids = [backend.add_build(status="finished", buildStatus="success",
+                                 workflowId=["android-workflow", "simple-apk"][i % 2],
+                                 branch=["main", "develop"][i % 3 == 0],
+                                 createdAt="2025-%02d-%02dT10:00:00.000Z" % (1 + i // 28 % 12, 1 + i % 28))["_id"]
+               for i in range(history)]
+        target = ids[history // 3]
+        session = make_codemagic_session(backend.url)
+
+        builds = session.get("/builds", params={"appId": APP_ID, "limit": 10}).json()["builds"]
+        scan_found = any(build["_id"] == target for build in builds)
+
+        store = os.path.join(workdir, "history.db")
+        backend.reset_counters()
+        index = BuildIndex(store, session)
+        found = index.get(target) is not None
+        first = backend.request_count
+        index.close()
+        backend.reset_counters()
+        index = BuildIndex(store, session)
+        index.get(target)
+        repeat = backend.request_count
+
+        backend.reset_counters()
+        index.sync()
+        synced = backend.request_count
+        backend.reset_counters()
+        listed = len(index.find(workflow="simple-apk", branch="develop"))
+        listing = backend.request_count
+        index.close()
+
+    print(f"Build #{history // 3 + 1} of {history}")
+    print(f"  last-10 scan:          found={scan_found}")
+    print(f"  BuildIndex first get:  found={found}, {first} request(s)")
+    print(f"  BuildIndex repeat get: {repeat} request(s)")
+    print(f"  full sync:             {synced} request(s) for {history} builds")
+    print(f"  filtered listing:      {listed} builds, {listing} request(s)")
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+        index = BuildIndex()
+        if "--sync" in sys.argv:
+            print(f"🔄 {index.sync()} builds synced")
+        if args:
+            print(json.dumps(index.get(args[0]), indent=2))
+        else:
+            for build in index.find(limit=20):
+                print(f"{build['_id']}  {_build_date(build)[:19]}  {build.get('workflowId', 'Unknown'):<18} "
+                      f"{build.get('branch', 'Unknown'):<10} {build.get('status')} {build.get('buildStatus') or ''}")
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Parallel variant builds
+Builds several variants/configurations at once (debug, release, the
+simplified app/build-simple.gradle), each in its own git worktree of HEAD plus
+the uncommitted edits, so nothing overwrites the real app/build.gradle. A
+scheduler admits builds only while their CPU and memory demand fits: every
+build is charged its Gradle heap (-Xmx from gradle.properties) plus the Kotlin
+daemon, and the cores are split between the running builds via --max-workers.
+
+The report compares the wall time with running the same builds one after
+another.
+"""
+
+import argparse
+import glob
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gradle_cache import BuildCache
+from gradle_session import GradleSession, default_gradlew
+
+# (name, tasks, build.gradle to use instead of app/build.gradle)
+CONFIGURATIONS = {
+    "debug": ("assembleDebug", None),
+    "release": ("assembleRelease", None),
+    "simple": ("assembleDebug", "app/build-simple.gradle"),
+    "simple-release": ("assembleRelease", "app/build-simple.gradle"),
+}
+CORES_PER_BUILD = 2
+KOTLIN_DAEMON_MB = 1024
+DEFAULT_XMX_MB = 4096
+# Generated, usually untracked files every worktree needs
+SHARED_FILES = ("local.properties", "init.gradle", "gradle.properties")
+WORKTREE_DIR = ".variant-worktrees"
+
+
+def gradle_heap_mb(project_dir="."):
+    """-Xmx from org.gradle.jvmargs in gradle.properties, in MB"""
+    try:
+        with open(os.path.join(project_dir, "gradle.properties"), encoding="utf-8") as f:
+            text = f.read()
+    except OSError:
+        return DEFAULT_XMX_MB
+    match = re.search(r"^org\.gradle\.jvmargs=.*?-Xmx(\d+)([kKmMgG]?)", text, re.MULTILINE)
+    if not match:
+        return DEFAULT_XMX_MB
+    value, unit = int(match.group(1)), match.group(2).lower()
+    return {"g": value * 1024, "m": value, "k": value // 1024}.get(unit, value // (1024 * 1024))
+
+
+def available_memory_mb():
+    """Memory available to new processes, in MB (None if unknown)"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    if os.name == "nt":
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("sullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+        status = MemoryStatus(dwLength=ctypes.sizeof(MemoryStatus))
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys // (1024 * 1024)
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class ResourceScheduler:
+    """Admits jobs while their cores and memory fit; one job always runs, however large"""
+
+    def __init__(self, cores=None, memory_mb=None, max_jobs=None):
+        self.cores = cores or os.cpu_count() or 1
+        self.memory_mb = memory_mb if memory_mb is not None else available_memory_mb()
+        self.max_jobs = max_jobs
+        self.used_cores = 0
+        self.used_memory = 0
+        self.running = 0
+        self.peak = 0
+        self.condition = threading.Condition()
+
+    def _fits(self, cores, memory_mb):
+        if self.running == 0:
+            return True
+        if self.max_jobs and self.running >= self.max_jobs:
+            return False
+        if self.used_cores + cores > self.cores:
+            return False
+        return self.memory_mb is None or self.used_memory + memory_mb <= self.memory_mb
+
+    def acquire(self, cores, memory_mb):
+        """Block until the job fits; returns seconds waited"""
+        started = time.monotonic()
+        with self.condition:
+            self.condition.wait_for(lambda: self._fits(cores, memory_mb))
+            self.used_cores += cores
+            self.used_memory += memory_mb
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        return time.monotonic() - started
+
+    def release(self, cores, memory_mb):
+        with self.condition:
+            self.used_cores -= cores
+            self.used_memory -= memory_mb
+            self.running -= 1
+            self.condition.notify_all()
+
+    def slots(self, cores, memory_mb):
+        """How many jobs of this size can run at once"""
+        by_cores = self.cores // cores
+        by_memory = self.memory_mb // memory_mb if self.memory_mb is not None else by_cores
+        return max(1, min(by_cores, by_memory, self.max_jobs or by_cores))
+
+
+def _git(project_dir, *args):
+    return subprocess.run(["git", "-C", project_dir, *args], capture_output=True, text=True)
+
+
+def _copy_local_changes(project_dir, path):
+    """Bring uncommitted edits and new (not ignored) files into a worktree of HEAD; returns how many"""
+    listed = _git(project_dir, "ls-files", "--modified", "--others", "--exclude-standard", "-z")
+    if listed.returncode != 0:
+        return 0
+    changed = 0
+    for name in dict.fromkeys(filter(None, listed.stdout.split("\0"))):
+        if name.split("/")[0] in (WORKTREE_DIR, "variant-outputs", "gradle-events"):
+            continue
+        source, target = os.path.join(project_dir, name), os.path.join(path, name)
+        if os.path.isfile(source):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(source, target)
+        elif os.path.exists(target):
+            os.remove(target)       # deleted locally
+        changed += 1
+    return changed
+
+
+def make_worktree(project_dir, name):
+    """Isolated checkout of the project (git worktree of HEAD plus local edits, or a copy outside git);
+    returns its path"""
+    path = os.path.join(project_dir, WORKTREE_DIR, name)
+    remove_worktree(project_dir, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if _git(project_dir, "worktree", "add", "--detach", "--force", path, "HEAD").returncode == 0:
+        changed = _copy_local_changes(project_dir, path)
+        if changed:
+            print(f"📝 {name}: {changed} uncommitted change(s) brought into the worktree")
+    else:
+        shutil.copytree(project_dir, path, ignore=shutil.ignore_patterns(
+            "build", ".gradle", ".git", WORKTREE_DIR, "gradle-events", "*.apk"))
+    for name in SHARED_FILES:
+        source = os.path.join(project_dir, name)
+        if os.path.exists(source):
+            shutil.copy2(source, os.path.join(path, name))
+    return path
+
+
+def remove_worktree(project_dir, path):
+    if not os.path.exists(path):
+        return
+    if _git(project_dir, "worktree", "remove", "--force", path).returncode != 0:
+        shutil.rmtree(path, ignore_errors=True)
+    _git(project_dir, "worktree", "prune")
+
+
+def build_variant(project_dir, name, tasks, build_file, scheduler, memory_mb, cores, gradlew=None,
+                  init_script="init.gradle", build_cache=None, keep=False):
+    """Build one configuration in its own worktree once the scheduler admits it"""
+    waited = scheduler.acquire(cores, memory_mb)
+    result = {"name": name, "tasks": tasks, "waited": waited, "success": False, "apks": [], "errors": 0}
+    started = time.monotonic()
+    path = None
+    try:
+        path = make_worktree(project_dir, name)
+        if build_file:
+            shutil.copy2(os.path.join(path, build_file), os.path.join(path, "app", "build.gradle"))
+        gradlew = gradlew or default_gradlew()
+        if os.name != "nt" and os.path.exists(os.path.join(path, "gradlew")):
+            os.chmod(os.path.join(path, "gradlew"), 0o755)
+        session = GradleSession(gradlew=gradlew, cwd=path, clean=False, echo=False, build_cache=build_cache,
+                                init_script=init_script if os.path.exists(os.path.join(path, init_script)) else None)
+        success, parser = session.build_step(tasks, extra=("--stacktrace", f"--max-workers={cores}"))
+        result["success"] = success
+        result["errors"] = parser.error_count
+        result["failure"] = parser.failure
+        result["apks"] = [os.path.relpath(apk, path) for apk in
+                          glob.glob(os.path.join(path, "app", "build", "outputs", "apk", "**", "*.apk"),
+                                    recursive=True)]
+        if result["apks"]:
+            # Keep the outputs once the worktree is gone
+            outputs = os.path.join(project_dir, "variant-outputs", name)
+            os.makedirs(outputs, exist_ok=True)
+            result["apks"] = [shutil.copy2(os.path.join(path, apk), outputs) for apk in result["apks"]]
+    except Exception as e:
+        result["failure"] = str(e)
+    finally:
+        result["seconds"] = time.monotonic() - started
+        scheduler.release(cores, memory_mb)
+        if path and not keep:
+            remove_worktree(project_dir, path)
+    return result
+
+
+def build_matrix(names, project_dir=".", jobs=None, sequential=False, keep=False, gradlew=None,
+                 memory_mb=None, cores=None, use_build_cache=True):
+    """Build the named configurations; returns (results, wall seconds, scheduler)"""
+    heap = gradle_heap_mb(project_dir) + KOTLIN_DAEMON_MB
+    scheduler = ResourceScheduler(cores=cores, memory_mb=memory_mb, max_jobs=1 if sequential else jobs)
+    slots = scheduler.slots(CORES_PER_BUILD, heap)
+    per_build_cores = max(1, scheduler.cores // min(slots, len(names)))
+    memory = f"{scheduler.memory_mb} MB" if scheduler.memory_mb is not None else "unknown"
+    print(f"🧮 {len(names)} builds, {scheduler.cores} cores, {memory} free, {heap} MB per build "
+          f"-> up to {1 if sequential else slots} at once")
+    build_cache = BuildCache() if use_build_cache else None
+    started = time.monotonic()
+    with ThreadPoolExecutor(max(1, len(names))) as pool:
+        futures = [pool.submit(build_variant, project_dir, name, *CONFIGURATIONS[name], scheduler, heap,
+                               min(per_build_cores, scheduler.cores) if not sequential else scheduler.cores,
+                               gradlew=gradlew, build_cache=build_cache, keep=keep)
+                   for name in names]
+        results = [future.result() for future in futures]
+    return results, time.monotonic() - started, scheduler
+
+
+def print_report(results, wall_seconds, scheduler):
+    print(f"\n📊 {'variant':<16} {'result':<7} {'build':>8} {'queued':>8}  output")
+    for result in results:
+        output = ", ".join(os.path.basename(apk) for apk in result["apks"]) or result.get("failure") or ""
+        print(f"   {result['name']:<16} {'✅' if result['success'] else '❌':<6} {result['seconds']:>7.1f}s "
+              f"{result['waited']:>7.1f}s  {output}")
+    serial = sum(result["seconds"] for result in results)
+    print(f"   wall time {wall_seconds:.1f}s vs {serial:.1f}s one after another "
+          f"({serial / max(wall_seconds, 1e-6):.1f}x, peak {scheduler.peak} concurrent)")
+
+
+def benchmark(builds=4, seconds=1.0):
+    """Stub gradlew in a scratch git repo: sequential vs scheduled parallel builds"""
+    import tempfile
+
+    root = tempfile.mkdtemp(prefix="variant-bench-")
+    try:
+        os.makedirs(os.path.join(root, "app"))
+        with open(os.path.join(root, "gradlew"), "w") as f:
+            f.write(f"#!/bin/sh\necho '> Task :app:compileDebugKotlin'\nsleep {seconds}\n"
+                    "mkdir -p app/build/outputs/apk/debug && echo apk > app/build/outputs/apk/debug/app-debug.apk\n"
+                    "echo 'BUILD SUCCESSFUL in 1s'\n")
+        os.chmod(os.path.join(root, "gradlew"), 0o755)
+        for name in ("app/build.gradle", "app/build-simple.gradle"):
+            with open(os.path.join(root, name), "w") as f:
+                f.write("// stub\n")
+        with open(os.path.join(root, "gradle.properties"), "w") as f:
+            f.write("org.gradle.jvmargs=-Xmx1g\n")
+        for args in (["init", "-q"], ["add", "-A"], ["-c", "user.email=b@b", "-c", "user.name=b", "commit", "-qm", "stub"]):
+            _git(root, *args)
+        names = list(CONFIGURATIONS)[:builds]
+        for label, kwargs in (("sequential", {"sequential": True}),
+                              ("scheduled (8 cores, 6 GB)", {"cores": 8, "memory_mb": 6144}),
+                              ("scheduled (8 cores, 16 GB)", {"cores": 8, "memory_mb": 16384})):
+            print(f"\n== {label}")
+            results, wall, scheduler = build_matrix(names, root, gradlew="./gradlew", use_build_cache=False, **kwargs)
+            print_report(results, wall, scheduler)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build several variants in parallel worktrees")
+    parser.add_argument("variants", nargs="*", default=["debug", "release", "simple"],
+                        help=f"configurations to build ({', '.join(CONFIGURATIONS)})")
+    parser.add_argument("--project", default=".", help="Android project directory")
+    parser.add_argument("--jobs", type=int, help="never run more than this many builds at once")
+    parser.add_argument("--sequential", action="store_true", help="one build at a time, for comparison")
+    parser.add_argument("--keep", action="store_true", help="keep the worktrees after building")
+    parser.add_argument("--no-build-cache", action="store_true", help="do not share a build cache")
+    parser.add_argument("--benchmark", action="store_true", help="scheduler benchmark with a stub gradlew")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark()
+        return True
+    unknown = [name for name in args.variants if name not in CONFIGURATIONS]
+    if unknown:
+        parser.error(f"unknown configuration: {', '.join(unknown)}")
+    results, wall, scheduler = build_matrix(args.variants, os.path.abspath(args.project), jobs=args.jobs,
+                                            sequential=args.sequential, keep=args.keep,
+                                            use_build_cache=not args.no_build_cache)
+    print_report(results, wall, scheduler)
+    return all(result["success"] for result in results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
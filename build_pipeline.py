@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Build pipeline
+Runs publish -> build -> download as a small graph of steps instead of a
+hand-written sequence per script:
+
+  upload --- wait-for-ref --- trigger --- monitor --+-- fetch-artifacts
+  estimate ----------------------------------'      +-- analyze
+
+  * a step starts as soon as the steps it needs are done, so independent steps
+    (the duration estimate and the upload; the artifact download and the log
+    analysis) run at the same time
+  * waits are conditions (the branch resolves to the pushed commit, the build
+    has finished) instead of fixed sleeps
+  * the build is pinned to the pushed commit (BUILD_COMMIT, checked out by the
+    workflow's first script), so it never builds an older head
+  * the trigger goes through the shared build queue (build_queue.py): a
+    commit that already has a build is not built again, and concurrent
+    scripts pushing within a few seconds share one build
+  * every step's outputs are checkpointed in .pipeline_state.json; after a
+    failure, running again with the same files resumes at the failed step
+    instead of pushing and building again
+
+  build_pipeline.py [FILE ...] [-m MESSAGE] [--workflow ID] [--fresh]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from artifact_downloader import download_artifacts
+from build_queue import COALESCE_WINDOW, QUEUE_FILE, TriggerQueue
+from build_eta import Prediction, load_model
+from build_history import DB_FILE
+from build_status import SUCCESS, expected_duration
+from build_webhook import get_receiver, wait_for_build
+from github_publisher import REF_FIRST_POLL, REF_MAX_POLL, REF_TIMEOUT, publish_files, wait_for_ref
+from http_client import APP_ID, codemagic_session, github_session
+
+CHECKPOINT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pipeline_state.json")
+DEFAULT_FILES = ("codemagic.yaml", "gradle.properties")
+
+
+class StepFailed(Exception):
+    """A step could not produce its outputs"""
+
+
+class StopPipeline(Exception):
+    """Raised by a step when there is nothing left to do, e.g. no changes to build"""
+
+
+class Step:
+    """A named unit of work; run(outputs) gets the outputs of earlier steps and returns its own dict"""
+
+    def __init__(self, name, run, requires=()):
+        self.name = name
+        self.run = run
+        self.requires = tuple(requires)
+
+
+def fingerprint(inputs):
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class Pipeline:
+    """Runs steps in dependency order, concurrently where possible, with checkpoints"""
+
+    def __init__(self, steps, inputs=None, checkpoint=CHECKPOINT_FILE):
+        self.steps = {step.name: step for step in steps}
+        for step in steps:
+            unknown = set(step.requires) - set(self.steps)
+            if unknown:
+                raise ValueError(f"{step.name} requires unknown steps: {', '.join(sorted(unknown))}")
+        self._check_cycles()
+        self.key = fingerprint(inputs or {})
+        self.checkpoint = checkpoint
+        self.outputs = {}
+        self.timings = {}
+        self.restored = []
+        self.failed = None          # name of the step that failed
+        self.error = None
+        self.stopped = None         # (step, reason) when a step ended the run early
+
+    def _check_cycles(self):
+        done, visiting = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"dependency cycle through {name}")
+            visiting.add(name)
+            for required in self.steps[name].requires:
+                visit(required)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.steps:
+            visit(name)
+
+    def _load(self):
+        try:
+            with open(self.checkpoint, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if state.get("key") != self.key:
+            return {}
+        return {name: outputs for name, outputs in state.get("outputs", {}).items() if name in self.steps}
+
+    def _save(self):
+        if not self.checkpoint:
+            return
+        state = {"key": self.key, "outputs": self.outputs, "failed": self.failed,
+                 "error": str(self.error) if self.error else None,
+                 "updated": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        tmp = self.checkpoint + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=1)
+            os.replace(tmp, self.checkpoint)
+        except OSError as e:
+            print(f"⚠️ Could not write checkpoint: {e}")
+
+    def _clear(self):
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+
+    def run(self, fresh=False):
+        """Run every step that is not checkpointed yet; returns {step: outputs}"""
+        self.outputs = {} if fresh or not self.checkpoint else self._load()
+        self.restored = list(self.outputs)
+        for name in self.restored:
+            print(f"⏭️ {name}: restored from checkpoint")
+        self.failed = self.error = self.stopped = None
+
+        pending = [name for name in self.steps if name not in self.outputs]
+        running = {}
+        with ThreadPoolExecutor(max(1, len(pending))) as pool:
+            while True:
+                if self.failed is None and self.stopped is None:
+                    for name in [n for n in pending if all(r in self.outputs for r in self.steps[n].requires)]:
+                        pending.remove(name)
+                        print(f"▶️ {name}")
+                        running[pool.submit(self._run_step, name)] = name
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        outputs = future.result()
+                    except StopPipeline as e:
+                        self.stopped = (name, str(e))
+                        print(f"⏹️ {name}: {e}")
+                    except Exception as e:
+                        if self.failed is None:
+                            self.failed, self.error = name, e
+                        print(f"❌ {name}: {e}")
+                    else:
+                        self.outputs[name] = outputs or {}
+                        print(f"✅ {name} ({self.timings[name]:.1f}s)")
+                        self._save()
+
+        if self.failed:
+            self._save()
+            print(f"💾 Checkpoint kept in {self.checkpoint}: the next run resumes at {self.failed}")
+        else:
+            self._clear()
+        return self.outputs
+
+    def _run_step(self, name):
+        started = time.monotonic()
+        try:
+            return self.steps[name].run(self.outputs)
+        finally:
+            self.timings[name] = time.monotonic() - started
+
+
+def build_steps(files, message, workflow="android-workflow", branch="main", variables=None,
+                monitor_timeout=None, download=True, dest_dir="artifacts", github=None, codemagic=None,
+                ref_timeout=REF_TIMEOUT, ref_interval=REF_FIRST_POLL, ref_max_interval=REF_MAX_POLL,
+                queue_file=QUEUE_FILE, coalesce_window=COALESCE_WINDOW, history_file=DB_FILE,
+                instance=None, poller_options=None):
+    """The standard steps: upload, wait-for-ref, trigger, monitor, fetch-artifacts, analyze (+ estimate).
+
+    monitor_timeout defaults to the one the duration model predicts for the workflow.
+    """
+    github = github or github_session()
+    codemagic = codemagic or codemagic_session()
+
+    def estimate(outputs):
+        prediction = load_model(codemagic, history_file).predict(workflow, instance)
+        print(f"⏱️ Expected: {prediction.describe()}")
+        return {"prediction": vars(prediction), "seconds": prediction.build[1],
+                "timeout": monitor_timeout or prediction.timeout()}
+
+    def upload(outputs):
+        published = publish_files(files, message, branch, github)
+        if not published:
+            raise StepFailed("could not publish the files")
+        if not published["files"]:
+            raise StopPipeline("GitHub already up to date, no build needed")
+        return published
+
+    def wait_for_ref_step(outputs):
+        commit = outputs["upload"]["commit"]
+        if outputs["upload"]["mode"] == "contents":
+            # No Git Data API to read the ref from; the build is pinned to commit by BUILD_COMMIT anyway
+            print(f"ℹ️ Not waiting for {branch} to show {commit[:7]} (Git Data API unavailable)")
+            return {"commit": commit, "waited": 0.0}
+        started = time.monotonic()
+        if not wait_for_ref(commit, branch, github, ref_timeout, ref_interval, ref_max_interval):
+            raise StepFailed(f"{branch} did not resolve to {commit[:7]} within {ref_timeout}s")
+        return {"commit": commit, "waited": time.monotonic() - started}
+
+    def trigger(outputs):
+        # Listen before triggering so a fast completion webhook is not missed
+        if get_receiver():
+            print(f"👂 Listening for build webhooks on port {get_receiver().port}")
+        queue = TriggerQueue(queue_file, codemagic, window=coalesce_window)
+        try:
+            queued = queue.request(outputs["wait-for-ref"]["commit"], workflow, branch, variables)
+        except RuntimeError as e:
+            raise StepFailed(str(e))
+        finally:
+            queue.close()
+        build_id, commit = queued["build_id"], queued["commit"]
+        if queued["outcome"] == "duplicate":
+            print(f"♻️ Commit {commit[:7]} already has a {workflow} build, not starting another")
+        elif queued["outcome"] == "adopted":
+            print(f"♻️ Using the build the push webhook started for {commit[:7]}")
+        elif queued["outcome"] == "superseded":
+            print(f"🔀 Merged into the build of the newer commit {(commit or '')[:7]}")
+        print(f"🆔 Build ID: {build_id} (commit {(commit or '?')[:7]})")
+        print(f"🔗 https://codemagic.io/app/{APP_ID}/build/{build_id}")
+        return {"build_id": build_id, "commit": commit, "outcome": queued["outcome"]}
+
+    def monitor(outputs):
+        build_id = outputs["trigger"]["build_id"]
+        prediction = Prediction(**outputs["estimate"]["prediction"])
+        timeout = outputs["estimate"]["timeout"]
+
+        def on_change(build, state, result):
+            eta = f" - {prediction.eta(build)}" if state != "finished" else ""
+            print(f"📊 Build status: {build.get('status', 'unknown')}{eta}")
+
+        state, result, build = wait_for_build(
+            build_id, timeout=timeout, session=codemagic, expected_seconds=prediction.build[1],
+            poller_options={"expected_queue_seconds": prediction.queue[1], **(poller_options or {})},
+            on_change=on_change, commit=outputs["trigger"]["commit"])
+        if state != "finished":
+            raise StepFailed(f"build {build_id} still {state} after {timeout / 60:.0f} min "
+                             f"(expected {prediction.total / 60:.0f} min)")
+        return {"result": result, "build": build}
+
+    def fetch_artifacts(outputs):
+        if outputs["monitor"]["result"] != SUCCESS:
+            return {"artifacts": [], "downloaded": []}
+        build_id = outputs["trigger"]["build_id"]
+        response = codemagic.get(f"/builds/{build_id}/artifacts")
+        if response.status_code != 200:
+            raise StepFailed(f"artifacts: {response.status_code}")
+        artifacts = response.json()
+        downloaded = []
+        if download:
+            for artifact, stats in download_artifacts(artifacts, dest_dir, codemagic):
+                if isinstance(stats, Exception):
+                    raise StepFailed(f"{artifact.get('name', artifact['url'])}: {stats}")
+                downloaded.append(stats["path"])
+        return {"artifacts": artifacts, "downloaded": downloaded}
+
+    def analyze(outputs):
+        if outputs["monitor"]["result"] == SUCCESS:
+            return {"signatures": []}
+        from failure_signatures import INDEX_TAIL_BYTES, extract_url, print_classification
+
+        signatures = []
+        for action in outputs["monitor"]["build"].get("buildActions") or []:
+            if action.get("status") == "failed" and action.get("logUrl"):
+                signatures.extend(extract_url(action["logUrl"], codemagic, INDEX_TAIL_BYTES))
+        print_classification(signatures)
+        return {"signatures": signatures}
+
+    return [
+        Step("estimate", estimate),
+        Step("upload", upload),
+        Step("wait-for-ref", wait_for_ref_step, ["upload"]),
+        Step("trigger", trigger, ["wait-for-ref"]),
+        Step("monitor", monitor, ["trigger", "estimate"]),
+        Step("fetch-artifacts", fetch_artifacts, ["monitor"]),
+        Step("analyze", analyze, ["monitor"]),
+    ]
+
+
+def build_pipeline(files, message, checkpoint=CHECKPOINT_FILE, **options):
+    """Pipeline for pushing [(github_path, content)] and building it; options go to build_steps"""
+    files = [(path, content.encode("utf-8") if isinstance(content, str) else content) for path, content in files]
+    inputs = {"files": [(path, hashlib.sha1(data).hexdigest()) for path, data in files], "message": message,
+              "workflow": options.get("workflow", "android-workflow"), "branch": options.get("branch", "main")}
+    return Pipeline(build_steps(files, message, **options), inputs, checkpoint)
+
+
+def print_timings(pipeline):
+    print(f"{'step':<16} {'time':>8}")
+    for name in pipeline.steps:
+        if name in pipeline.restored:
+            print(f"{name:<16} {'restored':>8}")
+        elif name in pipeline.timings:
+            print(f"{name:<16} {pipeline.timings[name]:>7.1f}s")
+
+
+def _legacy_run(files, github, codemagic, sleep, poller_options):
+    """The sequence build_manager.py / direct_build.py / BUILD_NOW.py hand-code, for the benchmark"""
+    from artifact_downloader import download_artifacts as download
+    from build_status import StatusPoller
+
+    publish_files(files, "bench", session=github)
+    time.sleep(sleep)
+    build_id = codemagic.post("/builds", json={"appId": APP_ID, "workflowId": "android-workflow",
+                                               "branch": "main"}).json()["_id"]
+    poller = StatusPoller(build_id, codemagic, expected_seconds=expected_duration("android-workflow", codemagic),
+                          **poller_options)
+    state, result, build = poller.wait()
+    artifacts = codemagic.get(f"/builds/{build_id}/artifacts").json()
+    return [stats for _, stats in download(artifacts, session=codemagic)]
+
+
+def benchmark(scale=0.01):
+    """End-to-end time of the scripts' sequence vs the pipeline, and resuming after a failed download.
+
+    Time is compressed by scale (0.01: a simulated minute takes 0.6 s); the mock
+    answers with 100 ms latency and shows a push to readers 3 s late.
+    """
+    import io
+    import shutil
+    import tempfile
+    from contextlib import redirect_stdout
+
+    from http_client import make_codemagic_session, make_github_session
+    from mock_backend import MockBackend
+
+    queue, build, ref_lag = 120 * scale, 900 * scale, 3 * scale
+    poller_options = {"queued_interval": 60 * scale, "far_interval": 120 * scale, "near_interval": 5 * scale,
+                      "backoff_base": 5 * scale, "backoff_cap": 120 * scale}
+    apk = os.urandom(8 * 1024 * 1024)
+    workdir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    def backend_for(run, available=True):
+        backend = MockBackend(latency=0.1 * scale).__enter__()
+        backend.ref_lag = ref_lag
+        url = f"{backend.url}/files/app-debug-{run}.apk"
+        if available:
+            backend.add_file(f"app-debug-{run}.apk", apk)
+        backend.default_timeline = lambda: [
+            (queue, {"status": "building"}),
+            (queue + build, {"status": "finished", "buildStatus": "success",
+                             "artefacts": [{"name": "app-debug.apk", "url": url, "size_bytes": len(apk)}]})]
+        # Earlier builds the duration estimate is taken from
+        for _ in range(5):
+            backend.add_build(status="finished", buildStatus="success", startedAt="2025-09-29T10:00:00.000Z",
+                              finishedAt=time.strftime("2025-09-29T10:%M:%S.000Z", time.gmtime(build)))
+        return backend, make_github_session(backend.url), make_codemagic_session(backend.url)
+
+    def files(run):
+        return [("codemagic.yaml", f"# run {run}\n"), ("gradle.properties", "org.gradle.caching=true\n")]
+
+    results = []
+    try:
+        for sleep in (8, 10, 15):
+            backend, github, codemagic = backend_for(f"legacy{sleep}")
+            started = time.monotonic()
+            with redirect_stdout(io.StringIO()):
+                _legacy_run(files(f"legacy{sleep}"), github, codemagic, sleep * scale, poller_options)
+            results.append((f"script, sleep {sleep}s", time.monotonic() - started))
+            backend.stop()
+
+        backend, github, codemagic = backend_for("pipeline")
+        pipeline = build_pipeline(files("pipeline"), "bench", github=github, codemagic=codemagic,
+                                  ref_interval=REF_FIRST_POLL * scale, ref_max_interval=REF_MAX_POLL * scale,
+                                  queue_file=os.path.join(workdir, "pipeline-queue.db"),
+                                  history_file=os.path.join(workdir, "pipeline-history.db"),
+                                  coalesce_window=COALESCE_WINDOW * scale, poller_options=poller_options)
+        started = time.monotonic()
+        with redirect_stdout(io.StringIO()):
+            pipeline.run()
+        results.append(("pipeline", time.monotonic() - started))
+        backend.stop()
+
+        # The artifact is not downloadable on the first run (e.g. a dropped link)
+        backend, github, codemagic = backend_for("resume", available=False)
+        pipeline = build_pipeline(files("resume"), "bench", github=github, codemagic=codemagic,
+                                  ref_interval=REF_FIRST_POLL * scale, ref_max_interval=REF_MAX_POLL * scale,
+                                  queue_file=os.path.join(workdir, "resume-queue.db"),
+                                  history_file=os.path.join(workdir, "resume-history.db"),
+                                  coalesce_window=COALESCE_WINDOW * scale, poller_options=poller_options)
+        with redirect_stdout(io.StringIO()):
+            pipeline.run()
+        failed_at = pipeline.failed
+        backend.add_file("app-debug-resume.apk", apk)
+        started = time.monotonic()
+        with redirect_stdout(io.StringIO()):
+            pipeline.run()
+        resumed = time.monotonic() - started
+        backend.stop()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Simulated {queue / scale / 60:.0f} min queue + {build / scale / 60:.0f} min build, "
+          f"push visible {ref_lag / scale:.0f}s late, 8 MB APK")
+    print(f"{'run':>26} {'end to end':>11}")
+    for label, seconds in results:
+        print(f"{label:>26} {seconds / scale:>10.0f}s")
+    legacy = sum(seconds for _, seconds in results[:3]) / 3
+    print(f"pipeline saves {(legacy - results[3][1]) / scale:.0f}s per build against the scripts' average")
+    print(f"after a failed {failed_at}: resuming took {resumed / scale:.0f}s "
+          f"(a rerun of a script would build again: {legacy / scale:.0f}s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Push files and build them on CodeMagic as a step pipeline")
+    parser.add_argument("files", nargs="*", default=list(DEFAULT_FILES), help="files to push (repository paths)")
+    parser.add_argument("-m", "--message", default="Update build configuration")
+    parser.add_argument("--workflow", default="android-workflow")
+    parser.add_argument("--branch", default="main")
+    parser.add_argument("--timeout", type=int, help="seconds to monitor the build (default: predicted)")
+    parser.add_argument("--no-download", action="store_true")
+    parser.add_argument("--fresh", action="store_true", help="ignore the checkpoint of a failed run")
+    args = parser.parse_args(argv)
+
+    files = []
+    for path in args.files:
+        with open(path, "rb") as f:
+            files.append((path.replace(os.sep, "/"), f.read()))
+    pipeline = build_pipeline(files, args.message, workflow=args.workflow, branch=args.branch,
+                              monitor_timeout=args.timeout, download=not args.no_download)
+    outputs = pipeline.run(fresh=args.fresh)
+    print_timings(pipeline)
+    if pipeline.failed:
+        return 1
+    return 0 if pipeline.stopped or outputs.get("monitor", {}).get("result") == SUCCESS else 1
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        sys.exit(main())
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Build trigger queue
+Every script that starts a CodeMagic build goes through one local queue, kept
+in SQLite so concurrent scripts share it:
+
+  * builds are keyed by (commit SHA, workflow): asking again for a key that
+    was already triggered returns the existing build instead of a new one,
+    unless that build failed or was cancelled
+  * a build the push webhook already started for the commit is adopted
+  * requests for one branch and workflow arriving within the coalescing
+    window are merged into a single build of the newest commit; a request
+    with no other one waiting and no build of the branch running has nothing
+    to merge with and starts its build at once
+  * builds of older commits it supersedes are cancelled while still queued
+    or running
+
+  build_queue.py list [-n 20]     recent requests and the build covering each
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+from build_status import SUCCESS, build_commit, normalize_status, unwrap_build
+from http_client import APP_ID, codemagic_session
+
+QUEUE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".build_queue.db")
+COALESCE_WINDOW = 10        # seconds a burst of pushes stays open
+LISTED_BUILDS = 20          # recent builds searched for webhook builds to adopt or cancel
+CLAIM_POLL = 0.2            # seconds between looks at a burst another script is starting
+CLAIM_TIMEOUT = 120         # a claim older than this belongs to a script that died; the burst is reopened
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    commit_sha TEXT,
+    workflow TEXT,
+    branch TEXT,
+    state TEXT,
+    build_id TEXT,
+    requested_at REAL,
+    triggered_at REAL,
+    hits INTEGER,
+    variables TEXT,
+    PRIMARY KEY (commit_sha, workflow)
+);
+CREATE INDEX IF NOT EXISTS requests_branch ON requests (branch, workflow, state);
+"""
+
+# Request states; every state but PENDING and TRIGGERING has a build_id covering the commit
+PENDING = "pending"         # waiting for its burst to close
+TRIGGERING = "triggering"   # its burst is closed and a script is starting the build
+TRIGGERED = "triggered"     # a build was started for it
+ADOPTED = "adopted"         # a webhook build of the same commit was already running
+SUPERSEDED = "superseded"   # merged into the build of a newer commit of its burst
+CANCELLED = "cancelled"     # its build was cancelled for a newer commit's
+DONE = "done"               # its build finished before anything superseded it
+
+
+class TriggerQueue:
+    """Deduplicating, coalescing front for POST /builds, shared through a SQLite file"""
+
+    def __init__(self, path=QUEUE_FILE, session=None, app_id=APP_ID, window=COALESCE_WINDOW):
+        # Autocommit; writers take the database lock with BEGIN IMMEDIATE
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.executescript(SCHEMA)
+        self.session = session or codemagic_session()
+        self.app_id = app_id
+        self.window = window
+
+    def close(self):
+        self.db.close()
+
+    @contextmanager
+    def _transaction(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def request(self, commit, workflow="android-workflow", branch="main", variables=None):
+        """Build commit with workflow unless an existing or coalesced build covers it.
+
+        Returns {"build_id", "commit" (the commit being built), "outcome"}, where
+        outcome is "triggered", "adopted", "duplicate" or "superseded". Without a
+        commit there is no key, and a build is started directly.
+        """
+        if not commit:
+            return {"build_id": self._post(None, workflow, branch, variables), "commit": None,
+                    "outcome": TRIGGERED}
+        row = self.db.execute("SELECT state, build_id FROM requests WHERE commit_sha = ? AND workflow = ?",
+                              (commit, workflow)).fetchone()
+        if row and row[0] not in (PENDING, TRIGGERING) and not self._covered(row[1]):
+            # The build covering it failed or was cancelled: queue the commit again. It keeps
+            # its requested_at, so commits requested after it are not superseded by the retry
+            with self._transaction():
+                self.db.execute("UPDATE requests SET state = ?, build_id = NULL, triggered_at = NULL "
+                                "WHERE commit_sha = ? AND workflow = ? AND build_id = ?",
+                                (PENDING, commit, workflow, row[1]))
+        with self._transaction():
+            row = self.db.execute("SELECT state FROM requests WHERE commit_sha = ? AND workflow = ?",
+                                  (commit, workflow)).fetchone()
+            if row:
+                self.db.execute("UPDATE requests SET hits = hits + 1 WHERE commit_sha = ? AND workflow = ?",
+                                (commit, workflow))
+                if row[0] not in (PENDING, TRIGGERING):
+                    return self._result(commit, workflow, duplicate=True)
+            else:
+                self.db.execute("INSERT INTO requests VALUES (?, ?, ?, ?, NULL, ?, NULL, 1, ?)",
+                                (commit, workflow, branch, PENDING, time.time(), json.dumps(variables or {})))
+            alone = not self.db.execute(
+                "SELECT 1 FROM requests WHERE branch = ? AND workflow = ? AND state IN (?, ?) AND commit_sha != ?",
+                (branch, workflow, PENDING, TRIGGERING, commit)).fetchone()
+        if alone and not self._building(workflow, branch):
+            # Nothing to merge with: start the build without waiting out the window
+            self.flush(workflow, branch, force=True)
+
+        while True:
+            result = self._result(commit, workflow)
+            if result["build_id"]:
+                return result
+            opened = self._opened(workflow, branch)
+            # Nothing pending: another script has claimed the burst and is starting its build
+            time.sleep(CLAIM_POLL if opened is None else max(0, opened + self.window - time.time()))
+            # Whichever waiting script claims the burst first starts the build for all of them
+            self.flush(workflow, branch)
+
+    def _opened(self, workflow, branch):
+        row = self.db.execute("SELECT MIN(requested_at) FROM requests WHERE branch = ? AND workflow = ? "
+                              "AND state = ?", (branch, workflow, PENDING)).fetchone()
+        return row[0]
+
+    def _result(self, commit, workflow, duplicate=False):
+        state, build_id = self.db.execute("SELECT state, build_id FROM requests WHERE commit_sha = ? "
+                                          "AND workflow = ?", (commit, workflow)).fetchone()
+        if state in (SUPERSEDED, CANCELLED):
+            built = self.db.execute("SELECT commit_sha FROM requests WHERE build_id = ? AND state IN (?, ?, ?)",
+                                    (build_id, TRIGGERED, ADOPTED, DONE)).fetchone()
+            return {"build_id": build_id, "commit": built[0] if built else None, "outcome": SUPERSEDED}
+        return {"build_id": build_id, "commit": commit, "outcome": "duplicate" if duplicate else state}
+
+    def flush(self, workflow="android-workflow", branch="main", force=False):
+        """Start one build for the burst of pending requests once its window has passed (at once with force).
+
+        The burst is claimed in one short transaction, the API is called with
+        the database unlocked, and the outcome is recorded in a second one, so
+        other scripts can queue requests while a build is being started.
+        Returns the build ID, or None if there was nothing to start yet.
+        """
+        claimed = self._claim(workflow, branch, force)
+        if not claimed:
+            return None
+        commit, variables, older, active = claimed
+        try:
+            builds = self._recent_builds(workflow, branch)
+            webhook = [b for b in builds if build_commit(b) == commit and self._reusable(b)]
+            if webhook:
+                build_id, state = webhook[0]["_id"], ADOPTED
+            else:
+                build_id, state = self._post(commit, workflow, branch, json.loads(variables)), TRIGGERED
+        except BaseException:
+            with self._transaction():
+                self.db.execute("UPDATE requests SET state = ?, triggered_at = NULL WHERE branch = ? "
+                                "AND workflow = ? AND state = ?", (PENDING, branch, workflow, TRIGGERING))
+            raise
+
+        # Older commits' builds (ours or the webhook's) no longer need to finish
+        cancelled, listed = set(), {b["_id"] for b in builds}
+        for build in builds:
+            if build_commit(build) in older and normalize_status(build)[0] != "finished":
+                if self._cancel(build["_id"]):
+                    cancelled.add(build["_id"])
+        for _, old_build in active:
+            if old_build not in listed and old_build != build_id:
+                # Too old to be listed: it finished long ago, or it is cancelled directly
+                if self._cancel(old_build):
+                    cancelled.add(old_build)
+
+        with self._transaction():
+            now = time.time()
+            self.db.execute("UPDATE requests SET state = ?, build_id = ?, triggered_at = ? "
+                            "WHERE commit_sha = ? AND workflow = ?", (state, build_id, now, commit, workflow))
+            self.db.execute("UPDATE requests SET state = ?, build_id = ?, triggered_at = ? WHERE branch = ? "
+                            "AND workflow = ? AND state = ?", (SUPERSEDED, build_id, now, branch, workflow, TRIGGERING))
+            for old_commit, old_build in active:
+                superseded = old_build in cancelled
+                self.db.execute("UPDATE requests SET state = ?, build_id = ? WHERE commit_sha = ? AND workflow = ? "
+                                "AND build_id = ? AND state IN (?, ?)",
+                                (CANCELLED if superseded else DONE, build_id if superseded else old_build,
+                                 old_commit, workflow, old_build, TRIGGERED, ADOPTED))
+        return build_id
+
+    def _claim(self, workflow, branch, force=False):
+        """Mark a closed burst TRIGGERING; (newest commit, its variables, older commits, their active builds).
+
+        Older means requested before the newest commit of the burst: a retried
+        commit never supersedes the builds of commits requested after it.
+        """
+        with self._transaction():
+            now = time.time()
+            self.db.execute("UPDATE requests SET state = ?, triggered_at = NULL WHERE branch = ? AND workflow = ? "
+                            "AND state = ? AND triggered_at < ?",
+                            (PENDING, branch, workflow, TRIGGERING, now - CLAIM_TIMEOUT))
+            pending = self.db.execute(
+                "SELECT commit_sha, requested_at, variables FROM requests WHERE branch = ? AND workflow = ? "
+                "AND state = ? ORDER BY requested_at", (branch, workflow, PENDING)).fetchall()
+            claiming = self.db.execute("SELECT 1 FROM requests WHERE branch = ? AND workflow = ? AND state = ?",
+                                       (branch, workflow, TRIGGERING)).fetchone()
+            if not pending or claiming or (not force and pending[0][1] + self.window > now):
+                return None
+            commit, requested_at, variables = pending[-1]
+            self.db.execute("UPDATE requests SET state = ?, triggered_at = ? WHERE branch = ? AND workflow = ? "
+                            "AND state = ?", (TRIGGERING, now, branch, workflow, PENDING))
+            older = {sha for (sha,) in self.db.execute(
+                "SELECT commit_sha FROM requests WHERE branch = ? AND workflow = ? AND commit_sha != ? "
+                "AND requested_at <= ?", (branch, workflow, commit, requested_at))}
+            active = self.db.execute(
+                "SELECT commit_sha, build_id FROM requests WHERE branch = ? AND workflow = ? AND state IN (?, ?) "
+                "AND commit_sha != ? AND requested_at <= ?",
+                (branch, workflow, TRIGGERED, ADOPTED, commit, requested_at)).fetchall()
+        return commit, variables, older, active
+
+    def _building(self, workflow, branch):
+        """Whether a build started through the queue for the branch may still be running.
+
+        Builds found finished are marked DONE so they are not asked about again.
+        """
+        for commit, build_id in self.db.execute(
+                "SELECT commit_sha, build_id FROM requests WHERE branch = ? AND workflow = ? AND state IN (?, ?)",
+                (branch, workflow, TRIGGERED, ADOPTED)).fetchall():
+            try:
+                response = self.session.get(f"/builds/{build_id}")
+            except Exception:
+                return True
+            if response.status_code == 200:
+                if normalize_status(unwrap_build(response.json()))[0] != "finished":
+                    return True
+            elif response.status_code != 404:
+                return True
+            with self._transaction():
+                self.db.execute("UPDATE requests SET state = ? WHERE commit_sha = ? AND workflow = ? "
+                                "AND build_id = ? AND state IN (?, ?)",
+                                (DONE, commit, workflow, build_id, TRIGGERED, ADOPTED))
+        return False
+
+    def _recent_builds(self, workflow, branch):
+        response = self.session.get("/builds", params={"appId": self.app_id, "limit": LISTED_BUILDS})
+        if response.status_code != 200:
+            return []
+        return [b for b in response.json().get("builds", [])
+                if b.get("workflowId") == workflow and b.get("branch") == branch]
+
+    def _covered(self, build_id):
+        """Whether build_id is still running or succeeded; an unreachable API counts as covered"""
+        try:
+            response = self.session.get(f"/builds/{build_id}")
+        except Exception:
+            return True
+        if response.status_code == 404:
+            return False
+        if response.status_code != 200:
+            return True
+        return self._reusable(unwrap_build(response.json()))
+
+    @staticmethod
+    def _reusable(build):
+        """A build of the commit that is still going, or that succeeded (a failed one is worth a retry)"""
+        state, result = normalize_status(build)
+        return state != "finished" or result == SUCCESS
+
+    def _post(self, commit, workflow, branch, variables):
+        build_data = {"appId": self.app_id, "workflowId": workflow, "branch": branch}
+        variables = dict(variables or {})
+        if commit:
+            # Checked out by the workflow's first script, whatever head the clone got
+            variables["BUILD_COMMIT"] = commit
+        if variables:
+            build_data["environment"] = {"variables": variables}
+        response = self.session.post("/builds", json=build_data)
+        if response.status_code not in (200, 201):
+            error_data = response.json() if response.content else {}
+            raise RuntimeError(f"trigger: {response.status_code} - {error_data.get('message', 'Unknown error')}")
+        body = response.json()
+        return body.get("buildId") or body.get("_id")
+
+    def _cancel(self, build_id):
+        """Cancel a build unless it has already finished; True if it was cancelled"""
+        response = self.session.get(f"/builds/{build_id}")
+        if response.status_code != 200:
+            return False
+        if normalize_status(unwrap_build(response.json()))[0] == "finished":
+            return False
+        return self.session.post(f"/builds/{build_id}/cancel").status_code in (200, 202, 204)
+
+    def recent(self, limit=20):
+        return self.db.execute("SELECT commit_sha, workflow, branch, state, build_id, requested_at, hits "
+                               "FROM requests ORDER BY requested_at DESC LIMIT ?", (limit,)).fetchall()
+
+
+def print_requests(queue, limit=20):
+    print(f"{'requested':<20} {'commit':<8} {'workflow':<18} {'state':<11} {'asked':>5}  build")
+    for commit, workflow, branch, state, build_id, requested_at, hits in queue.recent(limit):
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(requested_at))
+        print(f"{when:<20} {commit[:7]:<8} {workflow:<18} {state:<11} {hits:>5}  {build_id or '-'}")
+
+
+def benchmark(bursts=10, scale=0.01):
+    """Builds started and M1 minutes used for a day of pushes, with and without the queue.
+
+    Each push starts a webhook build and two scripts (build_manager.py and
+    trigger_build.py) ask for a build of it; pushes come in bursts of 1-4,
+    a few seconds apart, and bursts 5-40 minutes apart. A build takes 15
+    minutes; time is compressed by scale.
+    """
+    import random
+    import shutil
+    import tempfile
+    import threading
+
+    from http_client import make_codemagic_session
+    from mock_backend import MockBackend
+
+    build_seconds = 15 * 60
+    random.seed(24)
+    schedule, at = [], 0.0
+    for burst in range(bursts):
+        for push in range(random.randint(1, 4)):
+            schedule.append((at, f"{burst:02d}{push:02d}".ljust(40, "0")))
+            at += random.uniform(2, 5)
+        at += random.uniform(300, 2400)
+
+    def replay(backend, ask):
+        started = time.monotonic()
+        threads = []
+        for offset, commit in schedule:
+            time.sleep(max(0, offset * scale - (time.monotonic() - started)))
+            backend.add_build(commit=commit)        # the push webhook
+            for _ in range(2):
+                thread = threading.Thread(target=ask, args=(commit,))
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+    def minutes(backend):
+        """M1 minutes: a full build unless it was cancelled, then the time it ran"""
+        seconds = sum(backend.cancelled.get(build_id, build_seconds * scale) for build_id in backend.builds)
+        return seconds / scale / 60
+
+    workdir = tempfile.mkdtemp()
+    results = []
+    try:
+        for label in ("scripts", "queue"):
+            with MockBackend() as backend:
+                backend.default_timeline = lambda: [(build_seconds * scale, {"status": "finished",
+                                                                               "buildStatus": "success"})]
+                session = make_codemagic_session(backend.url)
+                path = os.path.join(workdir, f"{label}.db")
+                if label == "scripts":
+                    def ask(commit):
+                        session.post("/builds", json={"appId": APP_ID, "workflowId": "android-workflow",
+                                                      "branch": "main"})
+                else:
+                    def ask(commit):
+                        queue = TriggerQueue(path, session, window=COALESCE_WINDOW * scale)
+                        queue.request(commit)
+                        queue.close()
+                replay(backend, ask)
+                started, cancelled = len(backend.builds), len(backend.cancelled)
+                results.append((label, started, started - cancelled, cancelled, minutes(backend)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{len(schedule)} pushes in {bursts} bursts, a webhook build and 2 script requests per push")
+    print(f"{'':>8} {'builds':>7} {'ran out':>8} {'cancelled':>10} {'M1 minutes':>11}")
+    for label, started, completed, cancelled, used in results:
+        print(f"{label:>8} {started:>7} {completed:>8} {cancelled:>10} {used:>11.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared CodeMagic build trigger queue")
+    subparsers = parser.add_subparsers(dest="command")
+    listing = subparsers.add_parser("list", help="recent requests")
+    listing.add_argument("-n", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    queue = TriggerQueue()
+    try:
+        print_requests(queue, args.n if args.command == "list" else 20)
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        sys.exit(main())
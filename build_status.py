@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Build status poller
+One place that knows what a CodeMagic build status means and how often to ask
+for it:
+  * conditional GETs (If-None-Match) so an unchanged build costs a 304 and no parse
+  * slow polls while queued, sparse polls early in the build and quick polls
+    around the expected finish time
+  * exponential backoff with jitter on errors
+  * both status vocabularies ("successful" and "finished" + buildStatus)
+    normalised once
+"""
+
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from http_client import APP_ID, codemagic_session
+
+QUEUED_STATUSES = {"queued", "preparing"}
+TERMINAL_STATUSES = {"finished", "successful", "failed", "canceled", "cancelled", "timeout", "skipped"}
+
+# Results a finished build can end with
+SUCCESS = "success"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"
+
+# Used when there is no build history to estimate from
+DEFAULT_EXPECTED_SECONDS = 15 * 60
+
+
+def normalize_status(build):
+    """(state, result) for a build record.
+
+    state is "queued", "running" or "finished"; result is one of SUCCESS,
+    FAILED, CANCELLED, TIMEOUT for finished builds and None otherwise.
+    """
+    status = (build.get("status") or "").lower()
+    if status in QUEUED_STATUSES or not status:
+        return "queued", None
+    if status not in TERMINAL_STATUSES:
+        return "running", None
+    if status == "successful":
+        return "finished", SUCCESS
+    if status in ("canceled", "cancelled", "skipped"):
+        return "finished", CANCELLED
+    if status == "timeout":
+        return "finished", TIMEOUT
+    if status == "failed":
+        return "finished", FAILED
+    # "finished": the outcome lives in buildStatus
+    build_status = (build.get("buildStatus") or "").lower()
+    if build_status in ("success", "successful"):
+        return "finished", SUCCESS
+    if build_status in ("canceled", "cancelled"):
+        return "finished", CANCELLED
+    if build_status == "timeout":
+        return "finished", TIMEOUT
+    return "finished", FAILED
+
+
+def is_terminal(build):
+    return normalize_status(build)[0] == "finished"
+
+
+def unwrap_build(data):
+    """Build record from a /builds/{id} response or webhook payload, with or without a {"build": ...} envelope"""
+    return data.get("build", data)
+
+
+def build_commit(build):
+    """Commit SHA of a build record (an object with "hash" in the API, a plain SHA in the mock)"""
+    commit = build.get("commit")
+    return commit.get("hash") if isinstance(commit, dict) else commit
+
+
+def parse_time(value):
+    """Aware datetime from an API timestamp such as 2025-01-01T10:00:00.000Z"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def expected_duration(workflow_id=None, session=None, limit=20):
+    """Median start-to-finish time of recent finished builds that were not cancelled, in seconds"""
+    session = session or codemagic_session()
+    try:
+        response = session.get("/builds", params={"appId": APP_ID, "limit": limit})
+        builds = response.json().get("builds", []) if response.status_code == 200 else []
+    except Exception:
+        builds = []
+
+    durations = []
+    for build in builds:
+        if workflow_id and build.get("workflowId") != workflow_id:
+            continue
+        # Cancelled builds stopped early and say nothing about how long a build takes
+        state, result = normalize_status(build)
+        if build.get("startedAt") and build.get("finishedAt") and state == "finished" and result != CANCELLED:
+            durations.append((parse_time(build["finishedAt"]) - parse_time(build["startedAt"])).total_seconds())
+    return statistics.median(durations) if durations else DEFAULT_EXPECTED_SECONDS
+
+
+class StatusPoller:
+    """Polls /builds/{id} on an adaptive schedule"""
+
+    def __init__(self, build_id, session=None, expected_seconds=None,
+                 queued_interval=60, far_interval=120, near_interval=5,
+                 backoff_base=5, backoff_cap=120, expected_queue_seconds=None):
+        self.build_id = build_id
+        self.session = session or codemagic_session()
+        self.expected_seconds = expected_seconds or DEFAULT_EXPECTED_SECONDS
+        # Without a queue estimate, queued builds are polled every queued_interval
+        self.expected_queue_seconds = expected_queue_seconds
+        self.queued_interval = queued_interval
+        self.far_interval = far_interval
+        self.near_interval = near_interval
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.etag = None
+        self.build = None
+        self.created = time.monotonic()
+        self.running_since = None
+        self.errors = 0
+        self.requests = 0
+        self.not_modified = 0
+
+    def poll(self):
+        """Fetch the build; returns the (possibly cached) record or None on error"""
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        self.requests += 1
+        try:
+            response = self.session.get(f"/builds/{self.build_id}", headers=headers)
+        except Exception:
+            self.errors += 1
+            return None
+
+        if response.status_code == 304 and self.build is not None:
+            self.not_modified += 1
+            self.errors = 0
+            return self.build
+        if response.status_code != 200:
+            self.errors += 1
+            return None
+
+        self.errors = 0
+        self.etag = response.headers.get("ETag")
+        self.build = unwrap_build(response.json())
+        if self.running_since is None and normalize_status(self.build)[0] == "running":
+            self.running_since = time.monotonic()
+        return self.build
+
+    def next_interval(self):
+        """Seconds to wait before the next poll"""
+        if self.errors:
+            backoff = min(self.backoff_cap, self.backoff_base * 2 ** (self.errors - 1))
+            return random.uniform(backoff / 2, backoff)
+        state = normalize_status(self.build or {})[0]
+        if state == "queued" or self.running_since is None:
+            remaining = (self.expected_queue_seconds or 0) - (time.monotonic() - self.created)
+            if remaining <= 0:
+                # No estimate, or a queue running long: the build can start any time
+                return self.queued_interval
+            return max(self.near_interval, min(self.queued_interval, remaining / 2))
+        remaining = self.expected_seconds - (time.monotonic() - self.running_since)
+        return max(self.near_interval, min(self.far_interval, remaining / 2))
+
+    def wait(self, timeout=None, on_change=None):
+        """Poll until the build finishes; returns (state, result, build).
+
+        on_change(build, state, result) is called whenever the raw status
+        changes. On timeout the state is whatever was seen last.
+        """
+        timeout = timeout or max(1800, 2 * self.expected_seconds)
+        deadline = time.monotonic() + timeout
+        last_status = None
+
+        while True:
+            build = self.poll()
+            if build is not None:
+                state, result = normalize_status(build)
+                if build.get("status") != last_status:
+                    last_status = build.get("status")
+                    if on_change:
+                        on_change(build, state, result)
+                if state == "finished":
+                    return state, result, build
+            if time.monotonic() >= deadline:
+                state, result = normalize_status(self.build or {})
+                return state, result, self.build
+            time.sleep(min(self.next_interval(), max(0, deadline - time.monotonic())))
+
+
+def benchmark(scale=0.01):
+    """Fixed 30 s polling vs StatusPoller on a simulated 2 min queue + 15 min build.
+
+    Time is compressed by `scale` (0.01: one simulated minute is 0.6 s).
+    """
+    from mock_backend import MockBackend
+    from http_client import make_codemagic_session
+
+    queue_time, build_time = 120 * scale, 900 * scale
+
+    def run(use_poller):
+        with MockBackend() as backend:
+            build_id = backend.add_build(timeline=[
+                (queue_time, {"status": "building"}),
+                (queue_time + build_time, {"status": "finished", "buildStatus": "success"})
+            ])["_id"]
+            session = make_codemagic_session(backend.url)
+            done_at = time.time() + queue_time + build_time
+            parsed = 0
+
+            if use_poller:
+                # History says builds take about 15 minutes
+                poller = StatusPoller(build_id, session, expected_seconds=build_time,
+                                      queued_interval=60 * scale, far_interval=120 * scale,
+                                      near_interval=5 * scale, backoff_base=5 * scale,
+                                      backoff_cap=120 * scale)
+                poller.wait()
+                parsed = poller.requests - poller.not_modified
+            else:
+                while True:
+                    build = session.get(f"/builds/{build_id}").json()
+                    parsed += 1
+                    if build.get("status") in TERMINAL_STATUSES:
+                        break
+                    time.sleep(30 * scale)
+            lag = (time.time() - done_at) / scale
+            return backend.request_count, parsed, lag
+
+    fixed = run(False)
+    adaptive = run(True)
+    print("Simulated 2 min queue + 15 min build")
+    print(f"{'monitor':>14} {'requests':>9} {'parsed':>7} {'detection lag':>14}")
+    print(f"{'fixed 30 s':>14} {fixed[0]:>9} {fixed[1]:>7} {fixed[2]:>13.1f}s")
+    print(f"{'StatusPoller':>14} {adaptive[0]:>9} {adaptive[1]:>7} {adaptive[2]:>13.1f}s")
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
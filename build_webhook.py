@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Build webhook receiver
+Small embedded HTTP listener for CodeMagic and GitHub Actions build webhooks.
+A waiting pipeline is woken the moment the completion event arrives instead
+of discovering it on the next poll; if nothing arrives before the deadline it
+falls back to build_status.StatusPoller. GitHub workflow_run events carry no
+CodeMagic build ID: a finished run of the commit being built wakes the
+waiter, which then asks CodeMagic once for the build's own state.
+
+Enable it for the build scripts with BUILD_WEBHOOK_PORT and
+BUILD_WEBHOOK_SECRET, and point the CodeMagic / GitHub webhook at
+http://<this machine>:<port>/webhook. Without a secret anyone could post a
+fake result, so the listener then only binds to 127.0.0.1 (for a tunnel or
+reverse proxy on the same machine).
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from build_status import StatusPoller, build_commit, expected_duration, normalize_status, unwrap_build
+
+WEBHOOK_PORT = int(os.environ.get("BUILD_WEBHOOK_PORT") or 0)
+WEBHOOK_SECRET = os.environ.get("BUILD_WEBHOOK_SECRET", "")
+# The webhook is waited on for this many expected queue + build times before polling takes over
+WEBHOOK_GRACE = 1.25
+
+
+def sign(body, secret):
+    """GitHub-style signature header value for a payload"""
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def parse_event(payload):
+    """Build record from a webhook payload, or None if it is not a build event.
+
+    Accepts CodeMagic payloads (the build record, optionally wrapped in
+    {"build": ...}) and GitHub Actions workflow_run events.
+    """
+    if "workflow_run" in payload:
+        run = payload["workflow_run"]
+        if run.get("status") != "completed":
+            return {"_id": str(run.get("id")), "status": "building", "commit": run.get("head_sha")}
+        return {"_id": str(run.get("id")), "status": "finished",
+                "buildStatus": run.get("conclusion") or "failed",
+                "workflowId": run.get("name"), "branch": run.get("head_branch"),
+                "commit": run.get("head_sha")}
+    build = unwrap_build(payload)
+    if "_id" in build and "status" in build:
+        return build
+    return None
+
+
+class WebhookReceiver:
+    """Collects build events and lets callers block until a build finishes"""
+
+    def __init__(self, port=0, secret="", host=None):
+        self.secret = secret
+        # Unsigned events are only accepted from this machine
+        host = host or ("0.0.0.0" if secret else "127.0.0.1")
+        self.builds = {}
+        self.received_at = {}
+        self.commits = {}           # commit SHA -> ID of the latest event for it
+        self.condition = threading.Condition()
+        self.rejected = 0
+
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not receiver.verify(self.headers, body):
+                    receiver.rejected += 1
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+                try:
+                    build = parse_event(json.loads(body.decode("utf-8")))
+                except ValueError:
+                    build = None
+                self.send_response(204 if build else 202)
+                self.end_headers()
+                if build:
+                    receiver.record(build)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def verify(self, headers, body):
+        """Accept a GitHub HMAC signature or a CodeMagic shared-token header"""
+        if not self.secret:
+            return True
+        signature = headers.get("X-Hub-Signature-256")
+        if signature:
+            return hmac.compare_digest(signature, sign(body, self.secret))
+        token = headers.get("X-Webhook-Token") or headers.get("X-Codemagic-Signature") or ""
+        return hmac.compare_digest(token, self.secret)
+
+    def record(self, build):
+        with self.condition:
+            self.builds[build["_id"]] = build
+            self.received_at[build["_id"]] = time.monotonic()
+            if build_commit(build):
+                self.commits[build_commit(build)] = build["_id"]
+            self.condition.notify_all()
+
+    def wait(self, build_id, timeout, commit=None, since=0):
+        """Block until a terminal event for build_id arrives; None on timeout.
+
+        With commit, a terminal event for any other build or run of that
+        commit received after since (a time.monotonic() value) also returns.
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                build = self.builds.get(build_id)
+                if build and normalize_status(build)[0] == "finished":
+                    return build
+                other = self.builds.get(self.commits.get(commit)) if commit else None
+                if other and normalize_status(other)[0] == "finished" and self.received_at[other["_id"]] > since:
+                    return other
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+
+_receiver = None
+
+
+def get_receiver():
+    """Process-wide receiver when BUILD_WEBHOOK_PORT is set, else None"""
+    global _receiver
+    if _receiver is None and WEBHOOK_PORT:
+        if not WEBHOOK_SECRET:
+            print("⚠️ BUILD_WEBHOOK_SECRET is not set, listening for build webhooks on 127.0.0.1 only")
+        _receiver = WebhookReceiver(WEBHOOK_PORT, WEBHOOK_SECRET).start()
+    return _receiver
+
+
+def wait_for_build(build_id, timeout=1800, webhook_deadline=None, on_change=None, session=None,
+                   expected_seconds=None, poller_options=None, commit=None):
+    """Wait for a build to finish; returns (state, result, build) like StatusPoller.wait.
+
+    Listens for the webhook until webhook_deadline (default: WEBHOOK_GRACE
+    times the expected queue and build time), then falls back to polling for
+    whatever time is left. With commit, a finished event for another build or
+    a GitHub Actions run of that commit wakes the wait, and the build's own
+    state is then fetched once. expected_seconds and poller_options go to the
+    StatusPoller.
+    """
+    started = time.monotonic()
+    expected_seconds = expected_seconds or expected_duration(session=session)
+    poller = StatusPoller(build_id, session, expected_seconds=expected_seconds, **(poller_options or {}))
+    receiver = get_receiver()
+    if receiver:
+        expected_total = (poller_options or {}).get("expected_queue_seconds", 0) + expected_seconds
+        deadline = started + min(timeout, webhook_deadline or WEBHOOK_GRACE * expected_total)
+        since = 0
+        while time.monotonic() < deadline:
+            build = receiver.wait(build_id, deadline - time.monotonic(), commit, since)
+            if build is None:
+                break
+            if build["_id"] != build_id:
+                # Another run of the commit finished: that says nothing about this build's result
+                since = time.monotonic()
+                build = poller.poll()
+                if build is None or normalize_status(build)[0] != "finished":
+                    continue
+            state, result = normalize_status(build)
+            if on_change:
+                on_change(build, state, result)
+            return state, result, build
+        print("⚠️ No webhook received, falling back to polling")
+
+    remaining = max(1, timeout - (time.monotonic() - started))
+    return poller.wait(timeout=remaining, on_change=on_change)
+
+
+# Recorded payloads used by the offline benchmark
+SAMPLE_PAYLOADS = {
+    "codemagic": {"build": {"_id": "68dacf5349fd08c7ce8ee1bc", "appId": "68d2bb0d849df2693dd0a310",
+                            "workflowId": "android-workflow", "branch": "main",
+                            "status": "finished", "buildStatus": "success"}},
+    "github": {"action": "completed",
+               "workflow_run": {"id": 11234567890, "name": "Android Debug Build", "status": "completed",
+                                "conclusion": "success", "head_branch": "main",
+                                "head_sha": "3fc1fb8c0ffee0000000000000000000000000000"}},
+}
+
+
+def benchmark(trials=10, scale=0.01):
+    """Completion-to-notification latency: webhook vs the 30 s polling loop"""
+    import random
+    import statistics
+    import urllib.request
+    from mock_backend import MockBackend
+    from http_client import make_codemagic_session
+
+    secret = "bench-secret"
+    receiver = WebhookReceiver(0, secret, host="127.0.0.1").start()
+    webhook_latencies = []
+    for i in range(trials):
+        for kind, payload in SAMPLE_PAYLOADS.items():
+            payload = json.loads(json.dumps(payload))
+            build = payload.get("build") or payload["workflow_run"]
+            build_key, commit = f"{kind}-{i}", None
+            if "workflow_run" in payload:
+                # Matched by commit: the waiter only knows its CodeMagic build ID
+                build["id"], build["head_sha"] = f"run-{i}", f"{i:040x}"
+                commit = build["head_sha"]
+            else:
+                build["_id"] = build_key
+            body = json.dumps(payload).encode("utf-8")
+            headers = {"Content-Type": "application/json"}
+            if kind == "github":
+                headers["X-Hub-Signature-256"] = sign(body, secret)
+            else:
+                headers["X-Webhook-Token"] = secret
+
+            waiter_done = []
+            waiter = threading.Thread(target=lambda: waiter_done.append(
+                (receiver.wait(build_key, 5, commit), time.perf_counter())))
+            waiter.start()
+            time.sleep(0.01)
+            sent = time.perf_counter()
+            urllib.request.urlopen(urllib.request.Request(
+                f"http://127.0.0.1:{receiver.port}/webhook", body, headers))
+            waiter.join()
+            webhook_latencies.append((waiter_done[0][1] - sent) * 1000)
+    receiver.stop()
+
+    # The current loop: sleep 30 s, then GET, on a build that finishes at a random moment
+    poll_latencies = []
+    random.seed(3)
+    with MockBackend() as backend:
+        session = make_codemagic_session(backend.url)
+        for _ in range(trials):
+            finish = random.uniform(60, 120) * scale
+            build_id = backend.add_build(timeline=[
+                (0, {"status": "building"}),
+                (finish, {"status": "finished", "buildStatus": "success"})])["_id"]
+            start = time.time()
+            while True:
+                time.sleep(30 * scale)
+                if session.get(f"/builds/{build_id}").json().get("status") == "finished":
+                    break
+            poll_latencies.append((time.time() - start - finish) / scale)
+
+    print(f"Completion-to-notification latency over {trials} builds")
+    print(f"  webhook:      median {statistics.median(webhook_latencies):.1f} ms, "
+          f"max {max(webhook_latencies):.1f} ms")
+    print(f"  30 s polling: median {statistics.median(poll_latencies):.1f} s, "
+          f"max {max(poll_latencies):.1f} s")
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        port = int(sys.argv[1]) if len(sys.argv) > 1 else (WEBHOOK_PORT or 8765)
+        receiver = WebhookReceiver(port, WEBHOOK_SECRET).start()
+        print(f"Listening for build webhooks on {receiver.server.server_address[0]}:{receiver.port}...")
+        seen = set()
+        try:
+            while True:
+                with receiver.condition:
+                    receiver.condition.wait(1)
+                    for build_id, build in receiver.builds.items():
+                        key = (build_id, build.get("status"))
+                        if key not in seen:
+                            seen.add(key)
+                            state, result = normalize_status(build)
+                            print(f"[{time.strftime('%H:%M:%S')}] {build_id}: {build.get('status')} {result or ''}")
+        except KeyboardInterrupt:
+            receiver.stop()
@@ -1,20 +1,17 @@
 #!/usr/bin/env python3
-import requests
 import json
 import time
 
+from build_status import unwrap_build
+from http_client import codemagic_session
+
 def check_build_status(build_id):
-    url = f"https://api.codemagic.io/builds/{build_id}"
-    headers = {
-        "x-auth-token": "sC89KeWx9DqYyg1gGFHXF0IIxLwJV4PdM-0L1urk4nQ"
-    }
-    
     try:
-        response = requests.get(url, headers=headers)
+        response = codemagic_session().get(f"/builds/{build_id}")
         print(f"Status Code: {response.status_code}")
         
         if response.status_code == 200:
-            build_data = response.json()
+            build_data = unwrap_build(response.json())
             status = build_data.get('status', 'Unknown')
             workflow = build_data.get('workflowId', 'Unknown')
             branch = build_data.get('branch', 'Unknown')
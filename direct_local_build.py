@@ -7,35 +7,10 @@ This script will build the app locally right now using system's Gradle
 import os
 import subprocess
 import sys
-import time
 
-def run_command(command, cwd=None):
-    """Run a command and return the result"""
-    print(f"🔄 Running: {command}")
-    try:
-        process = subprocess.Popen(
-            command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            cwd=cwd,
-            universal_newlines=True
-        )
-        
-        # Print output in real-time
-        while True:
-            output = process.stdout.readline()
-            if output == '' and process.poll() is not None:
-                break
-            if output:
-                print(output.strip())
-                
-        return process.returncode == 0
-        
-    except Exception as e:
-        print(f"❌ Error running command: {e}")
-        return False
+from gradle_mirrors import write_init_gradle
+from gradle_session import session_from_argv
+from maven_proxy import start_local_repository
 
 def main():
     print("🚀 Persian AI Assistant - Direct Local Build")
@@ -83,23 +58,14 @@ def main():
         f.write(f'sdk.dir={android_home.replace(os.sep, "/")}\n')
     print("✅ Created local.properties")
     
-    # Create Iran-optimized init.gradle
-    init_gradle_content = """
-allprojects {
-    repositories {
-        maven { url 'https://maven.aliyun.com/repository/google' }
-        maven { url 'https://maven.aliyun.com/repository/central' }
-        maven { url 'https://repo1.maven.org/maven2/' }
-        google()
-        mavenCentral()
-        gradlePluginPortal()
-    }
-}
-"""
-    
-    with open('init.gradle', 'w') as f:
-        f.write(init_gradle_content)
-    print("✅ Created init.gradle with Iran-friendly mirrors")
+    if "--maven-proxy" in sys.argv or "--offline-deps" in sys.argv:
+        # Pre-fetched dependencies served from localhost; init.gradle points at the proxy
+        start_local_repository("init.gradle", offline="--offline-deps" in sys.argv)
+    else:
+        # init.gradle with the fastest reachable mirrors first (probe results cached for a few hours)
+        print("🌐 Probing Maven mirrors...")
+        ranked, _ = write_init_gradle("init.gradle", refresh="--refresh-mirrors" in sys.argv)
+        print(f"✅ Created init.gradle, mirrors by speed: {', '.join(result['name'] for result in ranked)}")
     
     # Update gradle.properties for Iran
     gradle_props_content = """
@@ -107,7 +73,7 @@ allprojects {
 org.gradle.jvmargs=-Xmx4g -Dfile.encoding=UTF-8
 org.gradle.parallel=true
 org.gradle.daemon=true
-org.gradle.caching=false
+org.gradle.caching=true
 
 # AndroidX
 android.useAndroidX=true
@@ -125,26 +91,30 @@ org.gradle.configuration-cache=false
         f.write(gradle_props_content)
     print("✅ Updated gradle.properties")
     
+    # One warm daemon for every step; pass --no-clean for an incremental build
+    session = session_from_argv(gradlew=gradlew_path, init_script="init.gradle")
+    
     print("\n🧹 Step 1: Cleaning project...")
-    if run_command(f"{gradlew_path} clean --init-script=init.gradle --no-daemon"):
+    if session.clean_step():
         print("✅ Clean successful")
     else:
-        print("⚠️ Clean failed, trying without init script...")
-        if not run_command(f"{gradlew_path} clean --no-daemon"):
-            print("❌ Clean failed completely")
-            return False
+        print("❌ Clean failed completely")
+        session.print_timings()
+        session.close()
+        return False
     
     print("\n🔨 Step 2: Building APK...")
     print("This may take several minutes...")
     
-    # Try with init script first
-    if run_command(f"{gradlew_path} assembleDebug --init-script=init.gradle --stacktrace --no-daemon"):
-        print("✅ Build with init script successful!")
-    else:
-        print("⚠️ Build with init script failed, trying direct...")
-        if not run_command(f"{gradlew_path} assembleDebug --stacktrace --no-daemon"):
-            print("❌ Build failed!")
-            return False
+    # Init script first, then direct
+    success, parser = session.build_step()
+    parser.print_report()
+    session.print_timings()
+    session.close()
+    if not success:
+        print("❌ Build failed!")
+        return False
+    print("✅ Build successful!")
     
     # Check if APK exists
     apk_path = r"app\build\outputs\apk\debug\app-debug.apk"
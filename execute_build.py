@@ -1,4 +1,3 @@
-import subprocess
 import sys
 import os
 
@@ -8,35 +7,13 @@ print("=" * 60)
 # Change to project directory
 project_dir = "C:\\Users\\Admin\\Downloads\\Compressed\\PersianAIAssistantAndroid-main"
 os.chdir(project_dir)
+sys.path.insert(0, project_dir)
 
 try:
-    # Run the build manager
-    process = subprocess.Popen(
-        [sys.executable, "build_manager.py"], 
-        stdout=subprocess.PIPE, 
-        stderr=subprocess.PIPE, 
-        text=True,
-        bufsize=1,
-        universal_newlines=True
-    )
+    # Run the build manager pipeline in this process; its output streams as it happens
+    from build_manager import main
     
-    # Real-time output
-    while True:
-        output = process.stdout.readline()
-        if output == '' and process.poll() is not None:
-            break
-        if output:
-            print(output.strip())
-    
-    # Get any remaining output
-    stdout, stderr = process.communicate()
-    
-    if stdout:
-        print(stdout)
-    if stderr:
-        print("STDERR:", stderr)
-    
-    return_code = process.returncode
+    return_code = 0 if main() else 1
     print(f"\nProcess completed with return code: {return_code}")
     
     if return_code == 0:
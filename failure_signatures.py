@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Build failure signatures
+Turns a build log into a short list of normalized failure signatures
+(category + message with paths, hashes, timestamps and positions stripped)
+and clusters them across the build-history store, so a new failure is named
+after the known one it matches instead of being read line by line.
+
+Clusters live in the build-history database. Each cluster keeps a 64-bit
+SimHash of its message, and a banded hash index (4 x 16 bits) finds
+near-identical clusters without comparing against all of them.
+
+  failure_signatures.py classify LOG_FILE|URL|BUILD_ID
+  failure_signatures.py index [-n 100]     signatures of failed builds in the history
+  failure_signatures.py clusters [-n 20]   most frequent failure clusters
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import re
+import sys
+import time
+
+from build_history import DB_FILE, BuildHistory
+from multi_pattern import MultiPattern
+
+SCAN_CHUNK = 8 * 1024 * 1024
+INDEX_TAIL_BYTES = 4 * 1024 * 1024      # of each failed action log, when indexing the history
+MAX_SIGNATURE_LINES = 10000             # distinct lines kept; --info logs can repeat triggers a lot
+MAX_LINE = 400
+BANDS = 4
+BAND_BITS = 64 // BANDS
+MAX_DISTANCE = 6                        # SimHash bits two messages of one cluster may differ in
+
+# (category, trigger); a trigger found anywhere in a line makes that line a signature.
+# Categories are listed in the order they are preferred when naming a build's failure.
+RULES = (
+    ("merge-conflict", b"<<<<<<< "),
+    ("kapt/hilt", b"error: [Dagger/"),
+    ("kapt/hilt", b"error: [Hilt]"),
+    ("kapt/hilt", b"error: @"),
+    ("kapt/room", b"error: There is a problem with the query"),
+    ("kapt/room", b"error: Cannot figure out how to"),
+    ("sdk", b"SDK location not found"),
+    ("sdk", b"ANDROID_SDK_ROOT"),
+    ("sdk", b"Failed to find target with hash string"),
+    ("sdk", b"SDK packages as some licences have not been accepted"),
+    ("sdk", b"License for package Android SDK"),
+    ("signing", b"Keystore file"),
+    ("signing", b"Keystore was tampered with"),
+    ("signing", b"keystore password was incorrect"),
+    ("dependency", b"Could not resolve "),
+    ("dependency", b"Could not GET "),
+    ("dependency", b"Could not HEAD "),
+    ("dependency", b"Could not download "),
+    ("dependency", b"Could not find "),
+    ("dependency", b"Read timed out"),
+    ("dependency", b"onnect timed out"),
+    ("memory", b"OutOfMemoryError"),
+    ("memory", b"Java heap space"),
+    ("aapt", b"AAPT: error"),
+    ("kotlin", b"e: "),
+    ("java", b": error: "),
+    ("gradle", b"* What went wrong:"),
+)
+CATEGORY_ORDER = list(dict.fromkeys(category for category, _ in RULES))
+# Triggers that only count at the start of a line
+LINE_START_TRIGGERS = (b"e: ",)
+# The line after "* What went wrong:" carries the message
+DETAIL_TRIGGERS = (b"* What went wrong:",)
+# Categories for a "What went wrong" detail, from the failed task
+TASK_CATEGORIES = (("kapt", "kapt/hilt"), ("hilt", "kapt/hilt"), ("compile", "kotlin"), ("Resources", "aapt"),
+                   ("Manifest", "aapt"), ("sign", "signing"), ("dex", "memory"))
+
+NORMALIZERS = [(re.compile(pattern), replacement) for pattern, replacement in (
+    (r"\x1b\[[0-9;]*[A-Za-z]", ""),                                         # ANSI colors
+    (r"\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d(?:[.,]\d+)?(?:Z|[+-]\d\d:?\d\d)?", "<time>"),
+    (r"\b\d\d:\d\d:\d\d(?:[.,]\d+)?\b", "<time>"),
+    (r"https?://([^/\s'\"]+)[^\s'\"]*", r"<url:\1>"),
+    (r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b", "<uuid>"),
+    (r"(?:[A-Za-z]:)?[\\/](?:[^\s\\/:'\"()]+[\\/])+", "<path>/"),          # keep only the file name
+    (r"\b(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{7,64}\b", "<hash>"),
+    (r"\(\d+, ?\d+\)", "(<n>, <n>)"),
+    (r"\.(java|kt|kts|xml|gradle):\d+(?::\d+)?\b", r".\1:<n>"),
+    (r"\b\d+(?:\.\d+)?\s?(?:ms|s|m|h)\b", "<t>"),
+    (r"\b\d{4,}\b", "<n>"),
+    (r"\s+", " "),
+)]
+
+
+def normalize(line):
+    """Message with paths, hashes, timestamps, positions and long numbers replaced"""
+    for pattern, replacement in NORMALIZERS:
+        line = pattern.sub(replacement, line)
+    return line.strip()[:MAX_LINE]
+
+
+def _triggered(trigger, line):
+    return line.startswith(trigger) if trigger in LINE_START_TRIGGERS else trigger in line
+
+
+def _categorize_detail(text):
+    task = re.search(r"task '([^']+)'", text)
+    if task:
+        for fragment, category in TASK_CATEGORIES:
+            if fragment in task.group(1):
+                return category
+    line = text.encode("utf-8")
+    for category, trigger in RULES:
+        if category != "gradle" and _triggered(trigger, line):
+            return category
+    return "gradle"
+
+
+class SignatureExtractor:
+    """Streaming extractor: feed() byte chunks, then signatures()"""
+
+    def __init__(self, rules=RULES):
+        self.rules = rules
+        self.matcher = MultiPattern([trigger for _, trigger in rules], line_start=LINE_START_TRIGGERS)
+        self.found = {}             # (category, normalized) -> count
+        self.lines = {}             # raw line -> category, so repeats skip normalize()
+        self.carry = b"\n"
+        self.pending_detail = False
+
+    def _add(self, category, line):
+        key = self.lines.get(line)
+        if key is None:
+            if len(self.lines) >= MAX_SIGNATURE_LINES:
+                return
+            text = normalize(line.decode("utf-8", "replace"))
+            if not text:
+                return
+            key = self.lines[line] = (category, text)
+        self.found[key] = self.found.get(key, 0) + 1
+
+    def _detail(self, line):
+        self._add(_categorize_detail(line.decode("utf-8", "replace")), line)
+
+    def _line(self, window, start, end):
+        """Record the line window[start:end] under the first rule it matches"""
+        line = window[start:end]
+        for category, trigger in self.rules:
+            if _triggered(trigger, line):
+                if trigger in DETAIL_TRIGGERS:
+                    following = window.find(b"\n", end + 1)
+                    if end >= len(window) - 1:
+                        self.pending_detail = True
+                    else:
+                        self._detail(window[end + 1:len(window) if following < 0 else following])
+                else:
+                    self._add(category, line)
+                return
+
+    def _scan(self, window):
+        """Signature lines of a buffer starting with a newline and holding whole lines only"""
+        if self.pending_detail:
+            self.pending_detail = False
+            end = window.find(b"\n", 1)
+            self._detail(window[1:end if end >= 0 else len(window)])
+        for start, end, _ in self.matcher.lines(window, 1):
+            self._line(window, start, end)
+
+    def feed(self, chunk):
+        # carry always starts with a newline, so the first line counts as a line start too
+        data = self.carry + chunk
+        cut = data.rfind(b"\n")
+        if cut <= 0:
+            self.carry = data
+            return
+        self._scan(data[:cut + 1])
+        self.carry = data[cut:]
+
+    def signatures(self):
+        """[(category, normalized message, occurrences)], most important category first"""
+        if len(self.carry) > 1:
+            self._scan(self.carry + b"\n")
+            self.carry = b"\n"
+        return sorted(((category, text, count) for (category, text), count in self.found.items()),
+                      key=lambda item: (CATEGORY_ORDER.index(item[0]), -item[2], item[1]))
+
+
+def extract(data):
+    """Signatures of a whole log held in memory (bytes or str)"""
+    extractor = SignatureExtractor()
+    extractor.feed(data.encode("utf-8", "replace") if isinstance(data, str) else data)
+    return extractor.signatures()
+
+
+def extract_file(path, chunk_size=SCAN_CHUNK):
+    """Signatures of a log file, scanned in mmapped windows"""
+    extractor = SignatureExtractor()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for offset in range(0, size, chunk_size):
+                    extractor.feed(buffer[offset:offset + chunk_size])
+    return extractor.signatures()
+
+
+def extract_url(url, session=None, tail_bytes=None):
+    """Signatures of a remote log (only its last tail_bytes when given)"""
+    from get_build_logs import LogReader
+
+    reader = LogReader(url, session)
+    extractor = SignatureExtractor()
+    if tail_bytes:
+        data = b"".join(reader.tail_bytes(tail_bytes))
+        if len(data) >= tail_bytes:
+            data = data[data.find(b"\n") + 1:]    # drop the partial first line
+        extractor.feed(data)
+    else:
+        for chunk in reader.chunks():
+            extractor.feed(chunk)
+    return extractor.signatures()
+
+
+def simhash(text):
+    """64-bit SimHash over word 2-shingles"""
+    words = re.findall(r"<\w+(?::[^>]*)?>|\w+", text.lower())
+    shingles = [" ".join(words[i:i + 2]) for i in range(max(1, len(words) - 1))]
+    weights = [0] * 64
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def _bands(value):
+    return [(band, value >> (band * BAND_BITS) & ((1 << BAND_BITS) - 1)) for band in range(BANDS)]
+
+
+def _signed(value):
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS failure_clusters (
+    id INTEGER PRIMARY KEY,
+    category TEXT,
+    label TEXT,
+    simhash INTEGER,
+    builds INTEGER DEFAULT 0,
+    first_seen TEXT,
+    last_seen TEXT
+);
+CREATE TABLE IF NOT EXISTS failure_bands (
+    band INTEGER,
+    value INTEGER,
+    cluster_id INTEGER,
+    PRIMARY KEY (band, value, cluster_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS build_failures (
+    build_id TEXT,
+    cluster_id INTEGER,
+    signature TEXT,
+    PRIMARY KEY (build_id, cluster_id)
+);
+CREATE INDEX IF NOT EXISTS build_failures_cluster ON build_failures (cluster_id);
+CREATE TABLE IF NOT EXISTS failure_indexed (build_id TEXT PRIMARY KEY);
+"""
+
+
+class FailureIndex:
+    """Failure clusters stored next to the build history"""
+
+    def __init__(self, history=None, path=DB_FILE):
+        self.history = history or BuildHistory(path)
+        self.db = self.history.db
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.history.close()
+
+    def match(self, category, text, fingerprint=None):
+        """Closest cluster row (id, category, label, builds, first_seen, last_seen) or None"""
+        fingerprint = simhash(text) if fingerprint is None else fingerprint
+        best, best_distance = None, MAX_DISTANCE + 1
+        for band, value in _bands(fingerprint):
+            for row in self.db.execute(
+                    "SELECT c.id, c.category, c.label, c.builds, c.first_seen, c.last_seen, c.simhash "
+                    "FROM failure_bands b JOIN failure_clusters c ON c.id = b.cluster_id "
+                    "WHERE b.band = ? AND b.value = ? AND c.category = ?", (band, value, category)):
+                distance = bin((row[6] & ((1 << 64) - 1)) ^ fingerprint).count("1")
+                if distance < best_distance:
+                    best, best_distance = row[:6], distance
+        return best
+
+    def classify(self, signatures):
+        """[(signature, cluster row or None)] without storing anything"""
+        return [((category, text, count), self.match(category, text)) for category, text, count in signatures]
+
+    def add(self, build_id, signatures, seen_at=""):
+        """Store a build's signatures, creating clusters for new ones; returns the cluster ids"""
+        cluster_ids = []
+        with self.db:
+            for category, text, _ in signatures:
+                fingerprint = simhash(text)
+                row = self.match(category, text, fingerprint)
+                if row is None:
+                    cluster_id = self.db.execute(
+                        "INSERT INTO failure_clusters (category, label, simhash, first_seen, last_seen) "
+                        "VALUES (?, ?, ?, ?, ?)", (category, text, _signed(fingerprint), seen_at, seen_at)).lastrowid
+                    self.db.executemany("INSERT OR IGNORE INTO failure_bands VALUES (?, ?, ?)",
+                                        [(band, value, cluster_id) for band, value in _bands(fingerprint)])
+                else:
+                    cluster_id = row[0]
+                if cluster_id in cluster_ids:
+                    continue
+                cluster_ids.append(cluster_id)
+                inserted = self.db.execute("INSERT OR IGNORE INTO build_failures VALUES (?, ?, ?)",
+                                           (build_id, cluster_id, text)).rowcount
+                if inserted:
+                    self.db.execute(
+                        "UPDATE failure_clusters SET builds = builds + 1, "
+                        "first_seen = MIN(first_seen, ?), last_seen = MAX(last_seen, ?) WHERE id = ?",
+                        (seen_at, seen_at, cluster_id))
+            self.db.execute("INSERT OR IGNORE INTO failure_indexed VALUES (?)", (build_id,))
+        return cluster_ids
+
+    def index_history(self, last=100, session=None):
+        """Extract and cluster the failed builds in the history that are not indexed yet"""
+        from http_client import codemagic_session
+
+        session = session or codemagic_session()
+        pending = self.db.execute(
+            "SELECT b.id, b.created_at FROM builds b WHERE b.id IN (%s) AND b.result = 'failed' "
+            "AND b.id NOT IN (SELECT build_id FROM failure_indexed) ORDER BY b.created_at" % self.history._last(last)
+        ).fetchall()
+        indexed = 0
+        for build_id, created_at in pending:
+            signatures = []
+            for (url,) in self.db.execute("SELECT log_url FROM actions WHERE build_id = ? AND status = 'failed' "
+                                          "AND log_url IS NOT NULL", (build_id,)).fetchall():
+                try:
+                    signatures.extend(extract_url(url, session, INDEX_TAIL_BYTES))
+                except Exception as e:
+                    print(f"⚠️ {build_id}: {e}")
+            self.add(build_id, signatures, created_at)
+            indexed += 1
+        return indexed
+
+    def clusters(self, limit=20):
+        return self.db.execute("SELECT id, category, label, builds, first_seen, last_seen FROM failure_clusters "
+                               "ORDER BY builds DESC, last_seen DESC LIMIT ?", (limit,)).fetchall()
+
+
+def print_classification(signatures, index=None, limit=8):
+    """Signatures with the known cluster each one matches"""
+    if not signatures:
+        print("🔎 No known failure signature found")
+        return
+    try:
+        classified = (index or FailureIndex()).classify(signatures[:limit])
+    except Exception:
+        classified = [(signature, None) for signature in signatures[:limit]]
+    print(f"🔎 {len(signatures)} failure signatures:")
+    for (category, text, count), cluster in classified:
+        print(f"   [{category}] {text}" + (f" (x{count})" if count > 1 else ""))
+        if cluster:
+            print(f"      ↳ known cluster #{cluster[0]}: seen in {cluster[3]} builds, last {cluster[5] or '-'}")
+        else:
+            print("      ↳ new failure")
+
+
+def _synthetic_log(size_mb):
+    """--info style log of roughly size_mb megabytes with a kapt failure at the end"""
+    noise = b"".join(
+        b"2025-09-29T12:%02d:%02d [INFO] > Task :app:compileDebugKotlin - "
+        b"Resolved org.jetbrains.kotlin:kotlin-stdlib:1.9.%d from /home/builder/.gradle/caches/%08x\n"
+        % (i // 60 % 60, i % 60, i % 50, i * 7919) for i in range(1000))
+    failure = (b"e: /Users/builder/clone/app/src/main/java/com/persianai/assistant/di/AppModule.kt: (42, 13): "
+               b"Unresolved reference: provideDatabase\n"
+               b"/Users/builder/clone/app/build/tmp/kapt3/stubs/debug/com/persianai/App_HiltComponents.java:128: "
+               b"error: [Dagger/MissingBinding] com.persianai.data.ChatRepository cannot be provided without an "
+               b"@Inject constructor or an @Provides-annotated method.\n"
+               b"\nFAILURE: Build failed with an exception.\n\n* What went wrong:\n"
+               b"Execution failed for task ':app:kaptDebugKotlin'.\n"
+               b"> A failure occurred while executing org.jetbrains.kotlin.gradle.internal.KaptWithoutKotlincTask$KaptExecutionWorkAction\n"
+               b"\nBUILD FAILED in 4m 12s\n")
+    return noise * (size_mb * 1024 * 1024 // len(noise)) + failure
+
+
+def benchmark(size_mb=50, history_builds=2000):
+    """Classify a 50 MB log against a history of a few thousand clustered failures"""
+    import random
+    import tempfile
+
+    random.seed(5)
+    with tempfile.TemporaryDirectory() as workdir:
+        log_path = os.path.join(workdir, "build.log")
+        with open(log_path, "wb") as f:
+            f.write(_synthetic_log(size_mb))
+        index = FailureIndex(path=os.path.join(workdir, "history.db"))
+        # Raw lines as earlier builds printed them, in varying checkouts
+        templates = [
+            ("kapt/hilt", "/Users/builder/{dir}/app/build/tmp/kapt3/stubs/debug/com/persianai/App_HiltComponents.java:{n}: "
+                          "error: [Dagger/MissingBinding] com.persianai.data.{name} cannot be provided without an "
+                          "@Inject constructor or an @Provides-annotated method."),
+            ("merge-conflict", "<<<<<<< HEAD:app/src/main/java/com/persianai/{name}.kt"),
+            ("sdk", "SDK location not found. Define a valid SDK location with an ANDROID_HOME environment variable "
+                    "or by setting the sdk.dir path in your project's local properties file at "
+                    "'/Users/builder/{dir}/local.properties'."),
+            ("dependency", "> Could not resolve androidx.{name}:1.12.0. > Read timed out after {n}ms"),
+            ("kotlin", "e: /Users/builder/{dir}/app/src/main/java/com/persianai/{name}.kt: ({n}, 13): "
+                       "Unresolved reference: viewBinding"),
+        ]
+        names = ["ChatRepository", "SettingsRepository", "MainActivity", "core:core-ktx", "room:room-runtime",
+                 "AppModule", "ChatViewModel"]
+        started = time.perf_counter()
+        for i in range(history_builds):
+            category, template = random.choice(templates)
+            line = template.format(dir=f"clone-{random.getrandbits(32):08x}", n=random.randint(10, 9999),
+                                   name=random.choice(names))
+            index.add(f"build-{i}", [(category, normalize(line), 1)], f"2025-06-{1 + i % 28:02d}")
+        clusters = index.db.execute("SELECT COUNT(*) FROM failure_clusters").fetchone()[0]
+        print(f"history: {history_builds} failed builds -> {clusters} clusters "
+              f"({(time.perf_counter() - started) * 1000 / history_builds:.2f} ms per build)")
+
+        started = time.perf_counter()
+        signatures = extract_file(log_path)
+        extracted = time.perf_counter() - started
+        started = time.perf_counter()
+        classified = index.classify(signatures)
+        matched = time.perf_counter() - started
+        print(f"{size_mb} MB log: {extracted:.2f}s to extract {len(signatures)} signatures, "
+              f"{matched * 1000:.1f} ms to match")
+        print_classification(signatures, index)
+        index.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build failure signatures and clusters")
+    parser.add_argument("command", choices=["classify", "index", "clusters"])
+    parser.add_argument("target", nargs="?", help="log file, log URL or build id (classify)")
+    parser.add_argument("-n", "--last", type=int, help="builds to index / clusters to show")
+    parser.add_argument("--db", default=DB_FILE)
+    args = parser.parse_args(argv)
+
+    index = FailureIndex(path=args.db)
+    if args.command == "classify":
+        if not args.target:
+            parser.error("classify needs a log file, URL or build id")
+        started = time.perf_counter()
+        if os.path.exists(args.target):
+            signatures = extract_file(args.target)
+        elif args.target.startswith(("http://", "https://")):
+            signatures = extract_url(args.target)
+        else:
+            from build_lookup import BuildIndex
+            build = BuildIndex().get(args.target) or {}
+            signatures = []
+            for action in build.get("buildActions") or []:
+                if action.get("status") == "failed" and action.get("logUrl"):
+                    signatures.extend(extract_url(action["logUrl"], tail_bytes=INDEX_TAIL_BYTES))
+        print_classification(signatures, index)
+        print(f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+    elif args.command == "index":
+        try:
+            index.history.sync()
+        except Exception as e:
+            print(f"⚠️ Sync failed ({e}), indexing stored builds")
+        print(f"🗂️ {index.index_history(args.last or 100)} failed builds indexed")
+    else:
+        print(f"{'#':>4} {'builds':>6} {'last seen':<12} {'category':<15} signature")
+        for cluster_id, category, label, builds, _, last_seen in index.clusters(args.last or 20):
+            print(f"{cluster_id:>4} {builds:>6} {(last_seen or '-')[:10]:<12} {category:<15} {label[:90]}")
+    index.close()
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        main()
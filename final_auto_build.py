@@ -1,9 +1,12 @@
 import os
 import subprocess
 import sys
-import time
 import shutil
 
+from gradle_mirrors import write_init_gradle
+from gradle_session import session_from_argv
+from maven_proxy import start_local_repository
+
 def main():
     print("🚀 Persian AI Assistant - خودکار تا بیلد نهایی")
     print("=" * 60)
@@ -42,27 +45,20 @@ def main():
         f.write(f'sdk.dir={android_home.replace(os.sep, "/")}\n')
     print("✅ local.properties ایجاد شد")
     
-    # init.gradle برای دور زدن تحریم
-    init_content = '''allprojects {
-    repositories {
-        maven { url 'https://maven.aliyun.com/repository/google' }
-        maven { url 'https://maven.aliyun.com/repository/central' }
-        maven { url 'https://repo1.maven.org/maven2/' }
-        google()
-        mavenCentral()
-        gradlePluginPortal()
-    }
-}'''
-    
-    with open('init.gradle', 'w', encoding='utf-8') as f:
-        f.write(init_content)
-    print("✅ init.gradle برای ایران")
+    if "--maven-proxy" in sys.argv or "--offline-deps" in sys.argv:
+        # وابستگی‌های از پیش دانلود شده از localhost؛ init.gradle به proxy اشاره می‌کند
+        start_local_repository("init.gradle", offline="--offline-deps" in sys.argv)
+    else:
+        # init.gradle برای دور زدن تحریم: سریع‌ترین mirrorهای در دسترس اول
+        print("🌐 بررسی سرعت mirrorها...")
+        ranked, _ = write_init_gradle("init.gradle", refresh="--refresh-mirrors" in sys.argv)
+        print(f"✅ init.gradle برای ایران: {', '.join(result['name'] for result in ranked)}")
     
     # gradle.properties بهینه
     gradle_content = '''org.gradle.jvmargs=-Xmx4g -Dfile.encoding=UTF-8
 org.gradle.parallel=true
 org.gradle.daemon=true
-org.gradle.caching=false
+org.gradle.caching=true
 android.useAndroidX=true
 android.enableJetifier=true
 kotlin.code.style=official
@@ -81,34 +77,29 @@ org.gradle.configuration-cache=false'''
     
     print(f"✅ {gradlew} موجود است")
     
-    def run_cmd(cmd):
-        print(f"🔄 {cmd}")
+    # یک daemon گرم برای همه مراحل؛ با --no-clean بیلد افزایشی
+    session = session_from_argv(gradlew=gradlew, init_script="init.gradle", echo=False, timeout=1200)
+    
+    def run_cmd(tasks, init=True, extra=()):
         try:
-            result = subprocess.run(cmd, shell=True, text=True, 
-                                  capture_output=True, timeout=1200)
-            if result.returncode == 0:
+            success, parser = session.run(tasks, init=init, extra=extra)
+            if success:
                 print("✅ موفق")
-                return True
             else:
-                print(f"❌ خطا: {result.stderr[-200:] if result.stderr else 'ناشناخته'}")
-                return False
-        except subprocess.TimeoutExpired:
-            print("⏰ timeout")
-            return False
+                print("❌ خطا:")
+            parser.print_report()
+            return success
         except Exception as e:
             print(f"❌ {e}")
             return False
     
     # مرحله 1: پاکسازی
     print("\n🧹 پاکسازی...")
-    clean_success = run_cmd(f"{gradlew} clean --init-script=init.gradle --no-daemon")
-    if not clean_success:
-        print("تلاش دوباره بدون init...")
-        run_cmd(f"{gradlew} clean --no-daemon")
+    session.clean_step()
     
     # مرحله 2: build کامل
     print("\n🔨 build کامل...")
-    build_success = run_cmd(f"{gradlew} assembleDebug --init-script=init.gradle --no-daemon --stacktrace")
+    build_success = run_cmd("assembleDebug", extra=["--stacktrace"])
     
     if not build_success:
         print("\n🔄 تلاش با build ساده...")
@@ -172,12 +163,16 @@ dependencies {
         print("✅ build.gradle ساده شد")
         
         # پاک و build مجدد
-        run_cmd(f"{gradlew} clean --no-daemon")
-        build_success = run_cmd(f"{gradlew} assembleDebug --init-script=init.gradle --no-daemon")
+        if session.clean:
+            run_cmd("clean", init=False)
+        build_success = run_cmd("assembleDebug")
         
         if not build_success:
             print("تلاش نهایی بدون init...")
-            build_success = run_cmd(f"{gradlew} assembleDebug --no-daemon")
+            build_success = run_cmd("assembleDebug", init=False)
+    
+    session.print_timings()
+    session.close()
     
     # بررسی APK
     apk_path = "app/build/outputs/apk/debug/app-debug.apk"
@@ -1,49 +1,330 @@
 #!/usr/bin/env python3
+"""
+Persian AI Assistant - Conflict marker scanner
+Finds leftover git conflict markers in the checkout:
+  * binary files are recognised from a sniffed prefix and skipped
+  * files are screened with the shared multi-pattern matcher (multi_pattern.py)
+    before any line-level work; large files are searched window by window
+    through a memory map, only marker lines are decoded and line numbers come
+    from counting newline bytes
+  * files are scanned in parallel over a process pool
+  * an mtime/size/inode cache (one file per scanned root, in the user cache
+    directory, so nothing is written into the tree being scanned) means a
+    re-scan only opens files that changed
+"""
+
+import hashlib
+import json
+import mmap
 import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from multi_pattern import MultiPattern
+
+# Patterns to exclude
+EXCLUDE_DIRS = {'.git', '.gradle', 'build', '.idea', 'node_modules'}
+# Skip binary and generated files, including what OfflineModelDownloader fetches
+SKIP_EXTENSIONS = (
+    '.jar', '.aar', '.apk', '.aab', '.dex', '.class', '.so', '.o', '.a',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.ico', '.mp3', '.wav', '.ogg',
+    '.zip', '.gz', '.tgz', '.7z', '.tar', '.keystore', '.jks',
+    '.bin', '.onnx', '.tflite', '.gguf', '.ggml', '.pt', '.safetensors',
+    '.mdl', '.fst', '.ie', '.mat', '.carpa',   # Vosk speech model files
+)
+
+MARKERS = (b'<<<<<<<', b'=======', b'>>>>>>>')
+CONFLICT_MATCHER = MultiPattern(MARKERS)
+
+SNIFF_BYTES = 8192              # a NUL byte in here marks the file as binary
+MMAP_THRESHOLD = 1024 * 1024    # larger files are searched through a memory map
+WINDOW = 4 * 1024 * 1024        # mapped bytes searched (and then released) at a time
+
+CACHE_DIR = os.environ.get('CONFLICT_SCAN_CACHE_DIR') or os.path.expanduser('~/.cache/persian-ai/conflict-scan')
+PARALLEL_THRESHOLD = 500    # fewer changed files than this are scanned in-process
+
+
+def _marker_lines(buffer, size, release=None):
+    """[(line number, line)] for bytes or an mmap, scanned window by window.
+
+    Only marker lines are decoded, and release(start, end) is called on every
+    finished window so mapped pages can be dropped.
+    """
+    results = []
+    line_number, counted_to, last_start = 1, 0, -1
+    for window in range(0, size, WINDOW):
+        window_end = min(size, window + WINDOW)
+        # Overlap by a marker length so a marker across the boundary is still seen
+        overlap = min(size, window_end + CONFLICT_MATCHER.longest - 1)
+        for offset, marker in CONFLICT_MATCHER.finditer(buffer, window, overlap):
+            if offset >= window_end:
+                break
+            start = buffer.rfind(b'\n', 0, offset) + 1
+            if start == last_start:
+                continue
+            if start > counted_to:
+                line_number += buffer[counted_to:start].count(b'\n')
+                counted_to = start
+            last_start = start
+            end = buffer.find(b'\n', offset + len(marker))
+            line = buffer[start:end if end >= 0 else size]
+            results.append((line_number, line.decode('utf-8', 'replace').strip()))
+        if window_end > counted_to:
+            line_number += buffer[counted_to:window_end].count(b'\n')
+            counted_to = window_end
+        if release:
+            release(window, window_end)
+    return results
+
+
+def scan_file(filepath):
+    """[(line number, line)] for every conflict marker line in a file"""
+    try:
+        with open(filepath, 'rb') as f:
+            data = f.read(SNIFF_BYTES)
+            if b'\0' in data:
+                return []
+            size = os.fstat(f.fileno()).st_size
+            if size > MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    release = None
+                    if hasattr(buffer, 'madvise') and hasattr(mmap, 'MADV_DONTNEED'):
+                        release = lambda start, end: buffer.madvise(
+                            mmap.MADV_DONTNEED, start - start % mmap.PAGESIZE,
+                            end - (start - start % mmap.PAGESIZE))
+                    return _marker_lines(buffer, len(buffer), release)
+            data += f.read()
+    except (OSError, ValueError):
+        return []
+    if CONFLICT_MATCHER.search(data) is None:
+        return []
+    return _marker_lines(data, len(data))
+
+
+def _walk(root_dir):
+    """Yield (path, (mtime_ns, size, inode)) for every candidate file"""
+    stack = [root_dir]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDE_DIRS:
+                        stack.append(entry.path)
+                elif entry.is_file() and not entry.name.endswith(SKIP_EXTENSIONS):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    yield entry.path, (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def cache_path_for(root_dir):
+    """Cache file for a scanned root, named after its absolute path"""
+    key = hashlib.sha1(os.path.abspath(root_dir).encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f'{key}.json')
+
+
+def _load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path, cache):
+    tmp = path + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def find_conflicts(root_dir, use_cache=True, workers=None, stats=None):
+    """Find all files with git conflict markers; {path: [(line, text), ...]}"""
+    cache_path = cache_path_for(root_dir)
+    cache = _load_cache(cache_path) if use_cache else {}
+    fresh = {}
+    changed = []
+
+    for filepath, signature in _walk(root_dir):
+        entry = cache.get(filepath)
+        if entry and tuple(entry[0]) == signature:
+            fresh[filepath] = entry
+        else:
+            changed.append((filepath, signature))
+
+    paths = [filepath for filepath, _ in changed]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(paths) >= PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(scan_file, paths, chunksize=max(1, len(paths) // (workers * 8))))
+    else:
+        results = [scan_file(filepath) for filepath in paths]
+
+    for (filepath, signature), lines in zip(changed, results):
+        fresh[filepath] = [signature, lines]
+
+    if use_cache and (changed or len(fresh) != len(cache)):
+        _save_cache(cache_path, fresh)
+    if stats is not None:
+        stats.update(files=len(fresh), scanned=len(changed))
 
-def find_conflicts(root_dir):
-    """Find all files with git conflict markers"""
+    return {filepath: [tuple(line) for line in entry[1]]
+            for filepath, entry in sorted(fresh.items()) if entry[1]}
+
+
+LINE_PATTERN = re.compile(r'<<<<<<<|=======|>>>>>>>')
+
+
+def _readlines_scan(root_dir):
+    """The previous single-threaded scanner, kept for the benchmark"""
     conflicts = {}
-    conflict_pattern = re.compile(r'<<<<<<<|=======|>>>>>>>')
-    
-    # Patterns to exclude
-    exclude_dirs = {'.git', '.gradle', 'build', '.idea', 'node_modules'}
-    
     for dirpath, dirnames, filenames in os.walk(root_dir):
-        # Remove excluded directories
-        dirnames[:] = [d for d in dirnames if d not in exclude_dirs]
-        
+        dirnames[:] = [d for d in dirnames if d not in EXCLUDE_DIRS]
         for filename in filenames:
-            # Skip binary and generated files
-            if filename.endswith(('.jar', '.apk', '.png', '.jpg', '.class', '.dex')):
+            if filename.endswith(SKIP_EXTENSIONS):
                 continue
-                
             filepath = os.path.join(dirpath, filename)
             try:
                 with open(filepath, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    conflict_lines = []
-                    for i, line in enumerate(lines, 1):
-                        if conflict_pattern.search(line):
-                            conflict_lines.append((i, line.strip()))
-                    
-                    if conflict_lines:
-                        conflicts[filepath] = conflict_lines
-            except:
-                # Skip files that can't be read as text
+                    conflict_lines = [(i, line.strip()) for i, line in enumerate(f.readlines(), 1)
+                                      if LINE_PATTERN.search(line)]
+                if conflict_lines:
+                    conflicts[filepath] = conflict_lines
+            except Exception:
                 pass
-    
     return conflicts
 
+
+def _make_tree(root, count):
+    """Synthetic checkout: Kotlin sources, resources, libs and a few conflicts"""
+    import random
+
+    random.seed(5)
+    source = ''.join(f'    fun method{i}(value: Int): Int = value * {i} + helper(value)\n' for i in range(40))
+    conflict = ('<<<<<<< HEAD\n    val db = Room.databaseBuilder(context, AppDb::class.java, "app").build()\n'
+                '=======\n    val db = Room.inMemoryDatabaseBuilder(context, AppDb::class.java).build()\n'
+                '>>>>>>> feature/offline-models\n')
+    for i in range(count):
+        directory = os.path.join(root, 'app', 'src', 'main', 'java', f'pkg{i % 100}', f'sub{i // 100 % 10}')
+        os.makedirs(directory, exist_ok=True)
+        kind = i % 20
+        if kind == 0:
+            name, data = f'model{i}.bin', os.urandom(4096)
+        elif kind == 1:
+            name, data = f'strings{i}.xml', ('<string name="s">متن فارسی</string>\n' * 30).encode('utf-8')
+        else:
+            body = source + (conflict if random.random() < 0.001 else '')
+            name, data = f'File{i}.kt', f'package pkg{i % 100}\n\nclass File{i} {{\n{body}}}\n'.encode('utf-8')
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(data)
+
+
+def _peak_rss(scanner, root, conn):
+    import resource
+    found = scanner(root)
+    conn.send((len(found), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def benchmark_memory(size_mb=200):
+    """Peak RSS scanning a large text file and an unlisted binary, each scanner in a fresh process"""
+    import functools
+    import multiprocessing
+    import shutil
+    import tempfile
+
+    root = tempfile.mkdtemp()
+    try:
+        line = b'    <string name="generated">\xd9\x85\xd8\xaa\xd9\x86 \xd9\x81\xd8\xa7\xd8\xb1\xd8\xb3\xdb\x8c</string>\n'
+        with open(os.path.join(root, 'generated_strings.xml'), 'wb') as f:
+            for _ in range(size_mb * 1024 * 1024 // len(line) // 1024):
+                f.write(line * 1024)
+            f.write(b'<<<<<<< HEAD\n<string name="a">1</string>\n=======\n<string name="a">2</string>\n>>>>>>> main\n')
+        with open(os.path.join(root, 'vosk-model-fa.dat'), 'wb') as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(size_mb):
+                f.write(block)
+
+        context = multiprocessing.get_context('spawn')
+        print(f"{size_mb} MB text file + {size_mb} MB binary model file")
+        print(f"{'scanner':>12} {'files':>6} {'peak RSS':>9}")
+        for label, scanner in (('readlines', _readlines_scan),
+                               ('mmap', functools.partial(find_conflicts, use_cache=False))):
+            parent, child = context.Pipe()
+            process = context.Process(target=_peak_rss, args=(scanner, root, child))
+            process.start()
+            files, rss = parent.recv()
+            process.join()
+            print(f"{label:>12} {files:>6} {rss:>7.0f}MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def benchmark(count=100_000):
+    """Cold and warm scans of a synthetic 100k-file tree vs the readlines scanner"""
+    import shutil
+    import tempfile
+    import time
+
+    root = tempfile.mkdtemp()
+    try:
+        print(f"Creating {count} files...")
+        _make_tree(root, count)
+
+        timings = []
+        started = time.perf_counter()
+        old = _readlines_scan(root)
+        timings.append(('readlines (every run)', time.perf_counter() - started, count))
+
+        for label in ('scanner cold', 'scanner warm'):
+            stats = {}
+            started = time.perf_counter()
+            new = find_conflicts(root, stats=stats)
+            timings.append((label, time.perf_counter() - started, stats['scanned']))
+
+        # Touch 1% of the files and re-scan
+        for i, (filepath, _) in enumerate(_walk(root)):
+            if i % 100 == 0:
+                os.utime(filepath, ns=(0, i + 1))
+        stats = {}
+        started = time.perf_counter()
+        find_conflicts(root, stats=stats)
+        timings.append(('scanner, 1% changed', time.perf_counter() - started, stats['scanned']))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        if os.path.exists(cache_path_for(root)):
+            os.remove(cache_path_for(root))
+
+    assert set(old) == set(new)
+    print(f"{len(new)} files with conflicts, {os.cpu_count()} CPU(s)")
+    print(f"{'scan':>22} {'files opened':>13} {'time':>8}")
+    for label, seconds, opened in timings:
+        print(f"{label:>22} {opened:>13} {seconds:>7.2f}s")
+
+
 if __name__ == "__main__":
-    root = r"c:\Users\Admin\CascadeProjects\PersianAIAssistant"
-    
+    if "--benchmark" in sys.argv:
+        # Memory first: spawned children inherit the parent's peak RSS
+        benchmark_memory()
+        benchmark()
+        sys.exit(0)
+
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.abspath(__file__))
+
     print("[*] Searching for conflict markers...")
     print("=" * 60)
-    
+
     conflicts = find_conflicts(root)
-    
+
     if conflicts:
         print(f"\n[ERROR] Found conflicts in {len(conflicts)} files:\n")
         for filepath, lines in conflicts.items():
@@ -55,6 +336,6 @@ if __name__ == "__main__":
             print()
     else:
         print("\n[OK] No conflict markers found!")
-    
+
     print("=" * 60)
     print(f"Total files with conflicts: {len(conflicts)}")
@@ -1,61 +1,207 @@
 #!/usr/bin/env python3
+"""
+Persian AI Assistant - Conflict resolver
+Resolves git conflict blocks left in the checkout:
+  * picks ours / theirs / base / union per path glob (diff3 "|||||||" base
+    sections are understood)
+  * streams each file line by line into a temp file and renames it over the
+    original, so a crash never leaves a truncated source file
+  * takes its file list from find_all_conflicts.py and resolves files in parallel
+  * --dry-run prints a unified diff and writes nothing
+
+  fix_all_conflicts.py [PATH ...] [--root DIR] [--strategy '*.md=union' ...]
+                       [--default ours] [--dry-run]
+"""
+
+import argparse
+import difflib
+import fnmatch
+import io
 import os
-import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from find_all_conflicts import find_conflicts
+
+STRATEGIES = ("ours", "theirs", "base", "union")
+
+
+class ConflictError(Exception):
+    """A file has conflict markers that do not form complete blocks"""
+
+
+def _marker(line, marker):
+    """True for a conflict marker line (7 characters, then a space or end of line)"""
+    return line.startswith(marker) and line[7:8] in ("", " ", "\n", "\r")
+
+
+def resolve_stream(source, target, strategy="ours"):
+    """Copy source lines to target with every conflict block resolved; returns the count.
+
+    base keeps the diff3 base section, or ours when a block has none; union
+    keeps ours followed by theirs.
+    """
+    resolved = 0
+    section = None          # None outside a block, else "ours", "base" or "theirs"
+    sides = {}
+    for number, line in enumerate(source, 1):
+        if section is None:
+            if _marker(line, "<<<<<<<"):
+                section, sides = "ours", {"ours": [], "base": None, "theirs": []}
+            else:
+                target.write(line)
+            continue
+
+        if section == "ours" and _marker(line, "|||||||"):
+            section, sides["base"] = "base", []
+        elif section in ("ours", "base") and _marker(line, "======="):
+            section = "theirs"
+        elif section == "theirs" and _marker(line, ">>>>>>>"):
+            if strategy == "union":
+                kept = sides["ours"] + sides["theirs"]
+            elif strategy == "base" and sides["base"] is not None:
+                kept = sides["base"]
+            else:
+                kept = sides["theirs" if strategy == "theirs" else "ours"]
+            target.writelines(kept)
+            resolved += 1
+            section = None
+        elif _marker(line, "<<<<<<<"):
+            raise ConflictError(f"line {number}: nested conflict marker")
+        else:
+            sides[section].append(line)
+
+    if section is not None:
+        raise ConflictError("file ends inside a conflict block")
+    return resolved
+
+
+def strategy_for(path, rules, default="ours"):
+    """First (glob, strategy) rule matching the path or its file name"""
+    normalized = path.replace(os.sep, "/")
+    for pattern, strategy in rules:
+        if fnmatch.fnmatch(normalized, pattern) or fnmatch.fnmatch(os.path.basename(path), pattern):
+            return strategy
+    return default
+
+
+def _diff_lines(lines):
+    """Lines for difflib, with the last one carrying diff's "no newline" marker if it has no newline"""
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n\\ No newline at end of file\n"
+    return lines
+
 
-def fix_conflicts_in_file(filepath):
-    """Remove git conflict markers from a file"""
+def resolve_file(filepath, strategy="ours", dry_run=False, label=None):
+    """(conflicts resolved, unified diff or None); the file is replaced atomically"""
+    label = label or filepath
+    open_args = {"encoding": "utf-8", "errors": "surrogateescape", "newline": ""}
+    if dry_run:
+        output = io.StringIO()
+        with open(filepath, "r", **open_args) as source:
+            resolved = resolve_stream(source, output, strategy)
+        if not resolved:
+            return 0, None
+        with open(filepath, "r", **open_args) as source:
+            diff = "".join(difflib.unified_diff(_diff_lines(source.readlines()),
+                                                _diff_lines(output.getvalue().splitlines(True)),
+                                                f"a/{label}", f"b/{label}"))
+        return resolved, diff
+
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp = tempfile.mkstemp(prefix=".resolve-", dir=directory)
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Remove conflict markers and keep HEAD version
-        lines = content.split('\n')
-        result = []
-        skip_mode = None
-        
-        for line in lines:
-            if line.startswith('<<<<<<< HEAD'):
-                skip_mode = None  # Keep HEAD content
-            elif line.startswith('======='):
-                skip_mode = 'skip'  # Start skipping non-HEAD content
-            elif line.startswith('>>>>>>> '):
-                skip_mode = None  # End of conflict
-            elif skip_mode != 'skip':
-                result.append(line)
-        
-        # Write back
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(result))
-        
+        with open(filepath, "r", **open_args) as source, os.fdopen(fd, "w", **open_args) as target:
+            resolved = resolve_stream(source, target, strategy)
+            target.flush()
+            os.fsync(target.fileno())
+        if resolved:
+            os.chmod(tmp, os.stat(filepath).st_mode & 0o7777)
+            os.replace(tmp, filepath)
+            return resolved, None
+        os.remove(tmp)
+        return 0, None
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def fix_conflicts_in_file(filepath, strategy="ours"):
+    """Resolve a file in place, keeping HEAD by default"""
+    try:
+        resolve_file(filepath, strategy)
         return True
     except Exception as e:
         print(f"Error processing {filepath}: {e}")
         return False
 
+
+def _resolve_job(job):
+    filepath, label, strategy, dry_run = job
+    try:
+        return filepath, strategy, resolve_file(filepath, strategy, dry_run, label), None
+    except Exception as e:
+        return filepath, strategy, (0, None), e
+
+
+def resolve_all(paths, rules=(), default="ours", dry_run=False, workers=None, root=None):
+    """Resolve many files in parallel; returns [(path, strategy, resolved, diff, error)]"""
+    labels = [os.path.relpath(path, root) if root else path for path in paths]
+    jobs = [(path, label, strategy_for(label, rules, default), dry_run) for path, label in zip(paths, labels)]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(min(workers, len(jobs))) as pool:
+            results = list(pool.map(_resolve_job, jobs))
+    else:
+        results = [_resolve_job(job) for job in jobs]
+    return [(path, strategy, resolved, diff, error) for path, strategy, (resolved, diff), error in results]
+
+
+def conflicted_files(root):
+    """Files the scanner found with a conflict-opening marker"""
+    return [path for path, lines in find_conflicts(root).items()
+            if any(text.startswith("<<<<<<<") for _, text in lines)]
+
+
+def _rule(value):
+    pattern, _, strategy = value.rpartition("=")
+    if not pattern or strategy not in STRATEGIES:
+        raise argparse.ArgumentTypeError(f"expected GLOB=STRATEGY with one of {', '.join(STRATEGIES)}")
+    return pattern, strategy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve git conflict blocks")
+    parser.add_argument("paths", nargs="*", help="files to resolve (default: everything the scanner finds)")
+    parser.add_argument("--root", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--strategy", action="append", type=_rule, default=[], metavar="GLOB=STRATEGY",
+                        help="side to keep for matching paths; first match wins")
+    parser.add_argument("--default", choices=STRATEGIES, default="ours")
+    parser.add_argument("--dry-run", action="store_true", help="print a unified diff instead of writing")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    paths = args.paths or conflicted_files(args.root)
+    print("[*] Resolving conflicts...", file=sys.stderr if args.dry_run else sys.stdout)
+    fixed_count = failed = 0
+    for path, strategy, resolved, diff, error in resolve_all(paths, args.strategy, args.default,
+                                                            args.dry_run, args.workers, args.root):
+        rel_path = os.path.relpath(path, args.root)
+        if error:
+            failed += 1
+            print(f"[ERROR] Failed: {rel_path}: {error}", file=sys.stderr)
+        elif diff:
+            print(diff, end="")
+            fixed_count += 1
+        elif resolved:
+            print(f"[OK] Fixed: {rel_path} ({resolved} blocks, {strategy})")
+            fixed_count += 1
+    summary = f"{'Would fix' if args.dry_run else 'Fixed'} {fixed_count} files" + (f", {failed} failed" if failed else "")
+    print(summary, file=sys.stderr if args.dry_run else sys.stdout)
+    return 1 if failed else 0
+
+
 if __name__ == "__main__":
-    # Only fix important build files
-    important_files = [
-        r"app\src\main\java\com\example\persianaiapp\di\DatabaseModule.kt",
-        r"app\src\main\java\com\example\persianaiapp\di\RepositoryModule.kt",
-        r"app\src\main\java\com\example\persianaiapp\ui\chat\ChatViewModel.kt",
-    ]
-    
-    root = r"c:\Users\Admin\CascadeProjects\PersianAIAssistant"
-    
-    print("[*] Fixing conflicts in important files...")
-    print("=" * 60)
-    
-    fixed_count = 0
-    for rel_path in important_files:
-        filepath = os.path.join(root, rel_path)
-        if os.path.exists(filepath):
-            if fix_conflicts_in_file(filepath):
-                print(f"[OK] Fixed: {rel_path}")
-                fixed_count += 1
-            else:
-                print(f"[ERROR] Failed: {rel_path}")
-        else:
-            print(f"[WARN] Not found: {rel_path}")
-    
-    print("=" * 60)
-    print(f"Fixed {fixed_count} files")
+    sys.exit(main())
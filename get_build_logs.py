@@ -1,85 +1,255 @@
 #!/usr/bin/env python3
-import requests
+"""
+Persian AI Assistant - Build log reader
+Shows why a CodeMagic build failed without downloading the whole action log:
+the tail is fetched with HTTP Range requests and grown backwards until the
+Gradle failure block is in view. --full streams the log line by line.
+"""
+
 import json
+import sys
+from collections import deque
 
-def get_build_logs(build_id):
-    url = f"https://api.codemagic.io/builds"
-    headers = {
-        "x-auth-token": "sC89KeWx9DqYyg1gGFHXF0IIxLwJV4PdM-0L1urk4nQ"
-    }
-    
-    params = {
-        "appId": "68d2bb0d849df2693dd0a310",
-        "limit": 10
-    }
+from build_lookup import BuildIndex
+from failure_signatures import SignatureExtractor, print_classification
+from http_client import codemagic_session
+
+TAIL_BYTES = 64 * 1024              # first tail request
+MAX_TAIL_BYTES = 8 * 1024 * 1024    # stop growing backwards after this much
+TAIL_LINES = 60                     # shown when no failure block is found
+# Start of the block Gradle prints when a build fails
+FAILURE_MARKERS = (b"FAILURE: ", b"* What went wrong:")
+# Byte offsets must refer to the stored log, not a gzip-encoded body
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+class LogReader:
+    """Range-aware reader for one log URL; bytes_read counts body bytes received"""
+
+    def __init__(self, url, session=None, chunk_size=64 * 1024):
+        self.url = url
+        self.session = session or codemagic_session()
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+
+    def _read(self, response):
+        for chunk in response.iter_content(self.chunk_size):
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def _range(self, spec):
+        """(bytes, total size) for a Range spec, or (None, None) without Range support"""
+        with self.session.get(self.url, headers={"Range": f"bytes={spec}", **IDENTITY},
+                              stream=True) as response:
+            if response.status_code == 416:
+                return b"", 0
+            if response.status_code != 206:
+                response.raise_for_status()
+                return None, None
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            return b"".join(self._read(response)), int(total) if total.isdigit() else None
+
+    def chunks(self):
+        """Stream the whole log as raw byte chunks"""
+        with self.session.get(self.url, headers=IDENTITY, stream=True) as response:
+            response.raise_for_status()
+            yield from self._read(response)
+
+    def lines(self):
+        """Stream the whole log as decoded lines"""
+        rest = b""
+        for chunk in self.chunks():
+            parts = (rest + chunk).split(b"\n")
+            rest = parts.pop()
+            for line in parts:
+                yield line.decode("utf-8", "replace").rstrip("\r")
+        if rest:
+            yield rest.decode("utf-8", "replace")
+
+    def tail_bytes(self, size):
+        """Chunks of the last size bytes (the whole log if the server ignores Range)"""
+        data, _ = self._range(f"-{size}")
+        if data is None:
+            yield from self.chunks()
+        else:
+            yield data
+
+    def tail(self, markers=FAILURE_MARKERS, initial=TAIL_BYTES, limit=MAX_TAIL_BYTES):
+        """Text from the last failure marker to the end, or the last TAIL_LINES lines.
+
+        markers are tried in order, so the first one names the preferred block start.
+        """
+        data, total = self._range(f"-{initial}")
+        if data is None:
+            return self._stream_tail(markers, limit)
+
+        start = total - len(data) if total else 0
+        chunks = [data]
+        size = initial
+        while start > 0 and len(data) < limit and not any(m in data for m in markers):
+            size = min(size * 2, limit - len(data))
+            begin = max(0, start - size)
+            piece, _ = self._range(f"{begin}-{start - 1}")
+            chunks.insert(0, piece)
+            data = b"".join(chunks)
+            chunks = [data]
+            start = begin
+
+        for marker in markers:
+            found = data.rfind(marker)
+            if found >= 0:
+                return data[data.rfind(b"\n", 0, found) + 1:].decode("utf-8", "replace")
+        if start > 0:
+            data = data[data.find(b"\n") + 1:]   # drop the partial first line
+        return b"\n".join(data.rstrip(b"\n").split(b"\n")[-TAIL_LINES:]).decode("utf-8", "replace")
+
+    def _stream_tail(self, markers, limit):
+        """tail() for servers that ignore Range: one pass, bounded memory"""
+        markers = tuple(m.decode("utf-8") for m in markers)
+        recent = deque(maxlen=TAIL_LINES)
+        block, block_size = None, 0
+        for line in self.lines():
+            recent.append(line)
+            if line.startswith(markers[0]) or (block is None and line.startswith(markers)):
+                block, block_size = [], 0
+            if block is not None and block_size < limit:
+                block.append(line)
+                block_size += len(line) + 1
+        return "\n".join(block if block is not None else recent)
+
+
+def get_build_logs(build_id, full=False):
+    session = codemagic_session()
     
     try:
-        response = requests.get(url, headers=headers, params=params)
+        target_build = BuildIndex(session=session).get(build_id)
         
-        if response.status_code == 200:
-            data = response.json()
-            builds = data.get('builds', [])
+        if target_build:
+            print(f"Build {build_id} - Status: {target_build.get('status')}")
+            print("="*60)
             
-            # Find the specific build
-            target_build = None
-            for build in builds:
-                if build.get('_id') == build_id:
-                    target_build = build
-                    break
+            # Check build actions for failures
+            build_actions = target_build.get('buildActions', [])
             
-            if target_build:
-                print(f"Build {build_id} - Status: {target_build.get('status')}")
-                print("="*60)
+            for action in build_actions:
+                action_name = action.get('name', 'Unknown')
+                action_status = action.get('status', 'Unknown')
+                log_url = action.get('logUrl')
                 
-                # Check build actions for failures
-                build_actions = target_build.get('buildActions', [])
+                print(f"\nAction: {action_name}")
+                print(f"Status: {action_status}")
                 
-                for action in build_actions:
-                    action_name = action.get('name', 'Unknown')
-                    action_status = action.get('status', 'Unknown')
-                    log_url = action.get('logUrl')
+                if action_status == 'failed':
+                    print(f"*** FAILED ACTION FOUND ***")
                     
-                    print(f"\nAction: {action_name}")
-                    print(f"Status: {action_status}")
-                    
-                    if action_status == 'failed':
-                        print(f"*** FAILED ACTION FOUND ***")
-                        
-                        # Try to get logs for this failed action
-                        if log_url:
-                            print(f"Getting logs from: {log_url}")
-                            try:
-                                log_response = requests.get(log_url, headers=headers)
-                                if log_response.status_code == 200:
-                                    log_content = log_response.text
-                                    print("FAILURE LOGS:")
-                                    print("-" * 40)
-                                    print(log_content[-2000:])  # Last 2000 chars
-                                    print("-" * 40)
-                                else:
-                                    print(f"Failed to get logs: {log_response.status_code}")
-                            except Exception as e:
-                                print(f"Error getting logs: {e}")
-                    
-                    # Check subactions
-                    subactions = action.get('subactions', [])
-                    for subaction in subactions:
-                        sub_status = subaction.get('status', 'Unknown')
-                        if sub_status == 'failed':
-                            print(f"  Subaction failed: {subaction.get('command', 'Unknown')[:100]}...")
-                            if 'output' in subaction:
-                                print(f"  Output: {subaction['output'][-500:]}")
+                    # Try to get logs for this failed action
+                    if log_url:
+                        print(f"Getting logs from: {log_url}")
+                        try:
+                            reader = LogReader(log_url, session)
+                            print("FAILURE LOGS:")
+                            print("-" * 40)
+                            extractor = SignatureExtractor()
+                            if full:
+                                for line in reader.lines():
+                                    print(line)
+                                    extractor.feed(line.encode("utf-8") + b"\n")
+                            else:
+                                text = reader.tail()
+                                print(text)
+                                extractor.feed(text.encode("utf-8") + b"\n")
+                            print("-" * 40)
+                            print_classification(extractor.signatures())
+                        except Exception as e:
+                            print(f"Error getting logs: {e}")
                 
-                # Also check if there's a general error message
-                if 'errorMessage' in target_build:
-                    print(f"\nGeneral Error: {target_build['errorMessage']}")
-                    
-            else:
-                print(f"Build {build_id} not found")
+                # Check subactions
+                subactions = action.get('subactions', [])
+                for subaction in subactions:
+                    sub_status = subaction.get('status', 'Unknown')
+                    if sub_status == 'failed':
+                        print(f"  Subaction failed: {subaction.get('command', 'Unknown')[:100]}...")
+                        if 'output' in subaction:
+                            print(f"  Output: {subaction['output'][-500:]}")
+            
+            # Also check if there's a general error message
+            if 'errorMessage' in target_build:
+                print(f"\nGeneral Error: {target_build['errorMessage']}")
                 
+        else:
+            print(f"Build {build_id} not found")
+            
     except Exception as e:
         print(f"Error: {e}")
 
+def _synthetic_log(size_mb):
+    """Gradle --info style log of roughly size_mb megabytes ending in a failure"""
+    noise = b"".join(
+        b"2025-09-29T12:%02d:%02d [INFO] > Task :app:compileDebugKotlin - "
+        b"Resolved org.jetbrains.kotlin:kotlin-stdlib:1.9.%d from cache\n" % (i // 60 % 60, i % 60, i % 50)
+        for i in range(1000))
+    failure = (b"e: /app/src/main/java/com/persianai/assistant/MainActivity.kt: (42, 13): Unresolved reference: viewBinding\n"
+               b"\nFAILURE: Build failed with an exception.\n\n* What went wrong:\n"
+               b"Execution failed for task ':app:compileDebugKotlin'.\n"
+               b"> Compilation error. See log for more details\n\n* Try:\n"
+               b"> Run with --scan to get full insights.\n\nBUILD FAILED in 4m 12s\n")
+    return noise * (size_mb * 1024 * 1024 // len(noise)) + failure
+
+
+def _serve_log(size_mb, conn):
+    from mock_backend import MockBackend
+    with MockBackend() as backend:
+        conn.send(backend.add_file("build.log", _synthetic_log(size_mb)))
+        conn.recv()
+
+
+def _measure(mode, url, conn):
+    import resource
+    from http_client import make_codemagic_session
+
+    session = make_codemagic_session()
+    reader = LogReader(url, session)
+    if mode == "whole body":
+        response = session.get(url, headers=IDENTITY)
+        reader.bytes_read = len(response.content)
+        shown = response.text[-2000:]
+    elif mode == "streamed lines":
+        shown = "\n".join(deque(reader.lines(), maxlen=TAIL_LINES))
+    else:
+        shown = reader.tail()
+    conn.send((reader.bytes_read, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+               "FAILURE: Build failed" in shown))
+
+
+def benchmark(size_mb=100):
+    """Peak RSS and bytes transferred reading a 100 MB log, each in a fresh process"""
+    import multiprocessing
+
+    context = multiprocessing.get_context("spawn")
+    server_conn, child_conn = context.Pipe()
+    server = context.Process(target=_serve_log, args=(size_mb, child_conn))
+    server.start()
+    url = server_conn.recv()
+
+    print(f"Reading the failure from a {size_mb} MB build log")
+    print(f"{'method':>16} {'transferred':>12} {'peak RSS':>9} {'found':>6}")
+    try:
+        for mode in ("whole body", "streamed lines", "Range tail"):
+            parent, child = context.Pipe()
+            process = context.Process(target=_measure, args=(mode, url, child))
+            process.start()
+            transferred, rss, found = parent.recv()
+            process.join()
+            print(f"{mode:>16} {transferred / 1024 / 1024:>10.2f}MB {rss:>7.0f}MB {str(found):>6}")
+    finally:
+        server_conn.send("stop")
+        server.join()
+
+
 if __name__ == "__main__":
-    build_id = "68dacf5349fd08c7ce8ee1bc"  # Latest failed build
-    get_build_logs(build_id)
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+        build_id = args[0] if args else "68dacf5349fd08c7ce8ee1bc"  # Latest failed build
+        get_build_logs(build_id, full="--full" in sys.argv)
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - GitHub Publisher
+Pushes a set of files to GitHub as ONE commit through the Git Data API
+(ref -> tree -> new tree -> commit -> ref) instead of a GET+PUT pair and a
+separate commit per file through the Contents API.
+"""
+
+import base64
+import hashlib
+import sys
+import time
+
+from http_client import REPO_NAME, REPO_OWNER, github_session, make_github_session
+
+# Status codes meaning "this endpoint is not available to us", as opposed to
+# a real error such as a conflicting ref update
+UNAVAILABLE_STATUSES = {403, 404, 405, 501}
+
+# Returned by update_github_file() when the remote copy is already identical
+UNCHANGED = "unchanged"
+
+# Polling for a pushed commit to become visible: usually well under a second,
+# so start short and double up to a few seconds
+REF_TIMEOUT = 120
+REF_FIRST_POLL = 0.25
+REF_MAX_POLL = 4.0
+
+
+class BatchUnavailable(Exception):
+    """The Git Data API cannot be used; callers fall back to the Contents API"""
+
+
+def print_status(message, status="INFO"):
+    symbols = {"INFO": "ℹ️", "SUCCESS": "✅", "ERROR": "❌", "WARNING": "⚠️"}
+    print(f"{symbols.get(status, 'ℹ️')} {message}")
+
+
+def _as_bytes(content):
+    return content.encode("utf-8") if isinstance(content, str) else content
+
+
+def git_blob_sha(content):
+    """SHA-1 git assigns to a blob with this content (what GitHub reports as "sha")"""
+    data = _as_bytes(content)
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _repo_url(path):
+    return f"/repos/{REPO_OWNER}/{REPO_NAME}/{path}"
+
+
+def _check(response, what):
+    if response.status_code in UNAVAILABLE_STATUSES:
+        raise BatchUnavailable(f"{what}: {response.status_code}")
+    if response.status_code not in (200, 201):
+        error_data = response.json() if response.content else {}
+        raise RuntimeError(f"{what}: {response.status_code} - {error_data.get('message', 'Unknown error')}")
+    return response.json()
+
+
+def _base_entries(commit_sha, session):
+    """(root tree SHA, {path: (mode, blob sha)}) of the commit a new one builds on.
+
+    The trees endpoint takes the commit SHA directly. A listing GitHub cut
+    short raises BatchUnavailable: without every entry, modes and unchanged
+    files cannot be told apart, so the per-file path is used instead.
+    """
+    response = session.get(_repo_url(f"git/trees/{commit_sha}"), params={"recursive": "1"})
+    listing = _check(response, "list tree")
+    if listing.get("truncated"):
+        raise BatchUnavailable("list tree: truncated")
+    return listing["sha"], {item["path"]: (item.get("mode"), item.get("sha"))
+                            for item in listing.get("tree", []) if item.get("type") == "blob"}
+
+
+def _tree_entry(path, data, session, mode="100644"):
+    """Inline UTF-8 text in the tree request; upload anything else as a blob"""
+    try:
+        return {"path": path, "mode": mode, "type": "blob", "content": data.decode("utf-8")}
+    except UnicodeDecodeError:
+        response = session.post(_repo_url("git/blobs"), json={
+            "content": base64.b64encode(data).decode("ascii"),
+            "encoding": "base64"
+        })
+        blob = _check(response, "create blob")
+        return {"path": path, "mode": mode, "type": "blob", "sha": blob["sha"]}
+
+
+def _publish_batch(files, message, branch, session):
+    """One commit for the files that differ from the branch.
+
+    Returns (new commit SHA, paths written), or (None, []) if every file
+    already matches (nothing to commit). Existing files keep their mode, so
+    gradlew stays executable.
+    """
+    response = session.get(_repo_url(f"git/ref/heads/{branch}"))
+    head_sha = _check(response, "get ref")["object"]["sha"]
+
+    base_tree, existing = _base_entries(head_sha, session)
+    changed = [(path, data) for path, data in files if existing.get(path, (None, None))[1] != git_blob_sha(data)]
+    if not changed:
+        return None, []
+    entries = []
+    for path, data in changed:
+        mode = existing.get(path, (None, None))[0]
+        entries.append(_tree_entry(path, data, session, mode if mode in ("100644", "100755") else "100644"))
+    response = session.post(_repo_url("git/trees"), json={"base_tree": base_tree, "tree": entries})
+    tree_sha = _check(response, "create tree")["sha"]
+    if tree_sha == base_tree:
+        return None, []
+
+    response = session.post(_repo_url("git/commits"),
+                            json={"message": message, "tree": tree_sha, "parents": [head_sha]})
+    commit_sha = _check(response, "create commit")["sha"]
+
+    response = session.patch(_repo_url(f"git/refs/heads/{branch}"),
+                             json={"sha": commit_sha, "force": False})
+    if response.status_code == 422:
+        # Someone else moved the branch while we were building the commit
+        raise ConnectionResetError("branch moved during publish")
+    _check(response, "update ref")
+    return commit_sha, [path for path, _ in changed]
+
+
+def branch_head(branch="main", session=None):
+    """Commit SHA the branch currently resolves to, or None if the ref cannot be read"""
+    session = session or github_session()
+    try:
+        response = session.get(_repo_url(f"git/ref/heads/{branch}"))
+    except Exception:
+        return None
+    if response.status_code != 200:
+        return None
+    return response.json().get("object", {}).get("sha")
+
+
+def contains_commit(head, commit, session=None):
+    """Whether head is commit or has it as an ancestor (compare API); False if that cannot be read"""
+    if head == commit:
+        return True
+    session = session or github_session()
+    try:
+        response = session.get(_repo_url(f"compare/{commit}...{head}"))
+    except Exception:
+        return False
+    return response.status_code == 200 and response.json().get("status") in ("ahead", "identical")
+
+
+def wait_for_ref(commit, branch="main", session=None, timeout=REF_TIMEOUT,
+                 first_poll=REF_FIRST_POLL, max_poll=REF_MAX_POLL):
+    """Wait until the branch contains commit, polling with doubling intervals.
+
+    Returns True once the branch head is commit or a descendant of it (someone
+    pushed on top), False if that is still not confirmed after timeout seconds,
+    including when the ref cannot be read at all.
+    """
+    session = session or github_session()
+    deadline = time.monotonic() + timeout
+    interval = first_poll
+    while True:
+        head = branch_head(branch, session)
+        if head is not None and contains_commit(head, commit, session):
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining))
+        interval = min(max_poll, interval * 2)
+
+
+def update_github_file(file_path, content, commit_message, branch="main", session=None):
+    """Update a single file through the Contents API (one commit per file).
+
+    Returns the new commit SHA, UNCHANGED if the remote blob already has the
+    same content (no PUT is made), or None on failure.
+    """
+    session = session or github_session()
+    url = _repo_url(f"contents/{file_path}")
+
+    try:
+        response = session.get(url, params={"ref": branch})
+        sha = None
+
+        if response.status_code == 200:
+            sha = response.json()['sha']
+            if sha == git_blob_sha(content):
+                print_status(f"{file_path} is unchanged, skipping")
+                return UNCHANGED
+            print_status(f"Found existing {file_path}, SHA: {sha[:7]}")
+        elif response.status_code == 404:
+            print_status(f"Creating new file: {file_path}")
+        else:
+            print_status(f"Error getting file info: {response.status_code}", "ERROR")
+            return None
+
+        update_data = {
+            "message": commit_message,
+            "content": base64.b64encode(_as_bytes(content)).decode('utf-8'),
+            "branch": branch
+        }
+        if sha:
+            update_data["sha"] = sha
+
+        response = session.put(url, json=update_data)
+
+        if response.status_code in [200, 201]:
+            print_status(f"Successfully updated {file_path}", "SUCCESS")
+            return response.json().get("commit", {}).get("sha")
+
+        error_data = response.json() if response.content else {}
+        print_status(f"Failed to update {file_path}: {response.status_code} - {error_data.get('message', 'Unknown error')}", "ERROR")
+        return None
+
+    except Exception as e:
+        print_status(f"Exception updating {file_path}: {str(e)}", "ERROR")
+        return None
+
+
+def publish_files(files, message, branch="main", session=None, retries=2):
+    """Push [(github_path, content), ...] to a branch as a single commit.
+
+    Returns a dict with the resulting commit SHA ("commit"), the paths that
+    were written ("files"), the paths that already matched ("unchanged") and
+    the transport used ("mode": "batch" or "contents"), or None if the push
+    failed. When every file already matches the branch, nothing is committed:
+    "commit" is None and "files" is empty.
+    """
+    session = session or github_session()
+    files = [(path, _as_bytes(content)) for path, content in files]
+    if not files:
+        return {"commit": None, "files": [], "unchanged": [], "mode": "batch"}
+
+    for attempt in range(retries + 1):
+        try:
+            commit_sha, written = _publish_batch(files, message, branch, session)
+            unchanged = [path for path, _ in files if path not in written]
+            if commit_sha is None:
+                print_status(f"All {len(files)} files already up to date on {branch}, nothing to commit")
+                return {"commit": None, "files": [], "unchanged": unchanged, "mode": "batch"}
+            print_status(f"Published {len(written)} files in commit {commit_sha[:7]}"
+                         + (f" ({len(unchanged)} unchanged)" if unchanged else ""), "SUCCESS")
+            return {"commit": commit_sha, "files": written, "unchanged": unchanged, "mode": "batch"}
+        except BatchUnavailable as e:
+            print_status(f"Git Data API unavailable ({e}), falling back to per-file updates", "WARNING")
+            break
+        except ConnectionResetError:
+            if attempt < retries:
+                print_status(f"Branch {branch} moved, retrying ({attempt + 1}/{retries})", "WARNING")
+                time.sleep(1)
+        except Exception as e:
+            print_status(f"Batch publish failed: {e}", "ERROR")
+            return None
+    else:
+        print_status("Could not publish: branch kept moving", "ERROR")
+        return None
+
+    commit_sha = None
+    changed, unchanged = [], []
+    for path, data in files:
+        result = update_github_file(path, data, message, branch, session)
+        if result is None:
+            return None
+        if result == UNCHANGED:
+            unchanged.append(path)
+        else:
+            commit_sha = result
+            changed.append(path)
+    return {"commit": commit_sha, "files": changed, "unchanged": unchanged, "mode": "contents"}
+
+
+def benchmark():
+    """Count HTTP requests for batch vs per-file pushes against the local stub"""
+    from mock_backend import MockBackend
+
+    small_set = [
+        ("codemagic.yaml", open("codemagic.yaml", encoding="utf-8").read()),
+        ("gradle.properties", open("gradle.properties", encoding="utf-8").read()),
+        ("app/build.gradle", open("app/build.gradle", encoding="utf-8").read()),
+    ]
+    large_set = [(f"app/src/main/res/values/generated_{i}.xml", f"<resources>{i}</resources>\n")
+                 for i in range(50)]
+
+    print(f"{'files':>6} {'per-file requests':>18} {'per-file commits':>17} {'batch requests':>15} {'batch commits':>14}")
+    for files in (small_set, large_set):
+        with MockBackend() as backend:
+            for path, content in files:
+                update_github_file(path, content, "bench", session=make_github_session(backend.url))
+            per_file = (backend.request_count, backend.commit_count() - 1)
+
+        with MockBackend() as backend:
+            publish_files(files, "bench", session=make_github_session(backend.url))
+            batch = (backend.request_count, backend.commit_count() - 1)
+
+        print(f"{len(files):>6} {per_file[0]:>18} {per_file[1]:>17} {batch[0]:>15} {batch[1]:>14}")
+
+
+def benchmark_ref_wait(trials=100, scale=0.05):
+    """Push-to-trigger wait and stale builds: fixed sleeps vs polling for the pushed commit.
+
+    Propagation delays are drawn from a log-normal distribution (median 1 s,
+    about 1 in 25 over 8 s); time is compressed by scale (0.05: a simulated
+    second takes 50 ms, so request overhead stays small). A build is stale when
+    CodeMagic builds a different commit than the one just pushed.
+    """
+    import contextlib
+    import io
+    import random
+    import statistics
+
+    from http_client import APP_ID, make_codemagic_session
+    from mock_backend import MockBackend
+
+    random.seed(23)
+    lags = [random.lognormvariate(0, 1.2) for _ in range(trials)]
+    print(f"{trials} pushes, propagation delay median {statistics.median(lags):.1f}s, "
+          f"max {max(lags):.1f}s")
+    print(f"{'wait':>16} {'median':>8} {'p90':>8} {'stale builds':>13}")
+    for sleep in (8, 10, 15, None):
+        waits, stale = [], 0
+        with MockBackend() as backend:
+            github, codemagic = make_github_session(backend.url), make_codemagic_session(backend.url)
+            for trial, lag in enumerate(lags):
+                backend.ref_lag = lag * scale
+                with contextlib.redirect_stdout(io.StringIO()):
+                    commit = publish_files([("codemagic.yaml", f"# push {trial}\n")], "bench",
+                                           session=github)["commit"]
+                started = time.monotonic()
+                build_data = {"appId": APP_ID, "workflowId": "android-workflow", "branch": "main"}
+                if sleep is None:
+                    wait_for_ref(commit, session=github, first_poll=REF_FIRST_POLL * scale,
+                                 max_poll=REF_MAX_POLL * scale)
+                    build_data["environment"] = {"variables": {"BUILD_COMMIT": commit}}
+                else:
+                    time.sleep(sleep * scale)
+                waits.append((time.monotonic() - started) / scale)
+                build_id = codemagic.post("/builds", json=build_data).json()["_id"]
+                stale += backend.builds[build_id]["commit"] != commit
+                # Let the push settle so the next trial starts from a visible head
+                while backend.visible_ref("main") != commit:
+                    time.sleep(0.001)
+        label = "poll for commit" if sleep is None else f"sleep {sleep}s"
+        print(f"{label:>16} {statistics.median(waits):>7.2f}s "
+              f"{statistics.quantiles(waits, n=10)[-1]:>7.2f}s {stale:>6} ({stale / trials:.0%})")
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+        print()
+        benchmark_ref_wait()
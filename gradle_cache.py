@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Gradle build cache
+Lets the local build drivers reuse task outputs instead of cold-building:
+  * a local build-cache directory with size-bounded LRU eviction
+  * an optional HTTP build-cache server (Gradle's HttpBuildCache protocol:
+    GET/PUT <url>/<key>) that developer machines and CI runners can share;
+    stores need the GRADLE_REMOTE_CACHE_USER / GRADLE_REMOTE_CACHE_PASSWORD
+    credentials, and without them the server only listens on 127.0.0.1;
+    entries over GRADLE_BUILD_CACHE_ENTRY_MB are refused
+  * per-task cache hit rates from the Gradle output, to see whether caching
+    pays off for the kapt/Hilt/Room tasks
+
+  gradle_cache.py serve [PORT] [HOST]    run a shared cache server (HOST defaults to 127.0.0.1)
+  gradle_cache.py evict           trim the local cache to its size limit
+"""
+
+import base64
+import hmac
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CACHE_DIR = os.environ.get("GRADLE_BUILD_CACHE_DIR") or os.path.expanduser("~/.cache/persian-ai/gradle-build-cache")
+CACHE_MAX_MB = int(os.environ.get("GRADLE_BUILD_CACHE_MB") or 2048)
+REMOTE_CACHE_URL = os.environ.get("GRADLE_REMOTE_CACHE_URL", "")
+REMOTE_CACHE_USER = os.environ.get("GRADLE_REMOTE_CACHE_USER", "")
+REMOTE_CACHE_PASSWORD = os.environ.get("GRADLE_REMOTE_CACHE_PASSWORD", "")
+SERVER_PORT = 5071
+# Larger uploads get 413 before their body is read (Gradle then just skips storing that entry)
+ENTRY_MAX_MB = int(os.environ.get("GRADLE_BUILD_CACHE_ENTRY_MB") or 100)
+
+# Task name fragments worth calling out in the hit-rate report
+TASK_GROUPS = (("kapt", "kapt"), ("hilt", "Hilt"), ("room", "Room"), ("compile", "compile"),
+               ("dex", "dex"), ("merge", "merge"), ("process", "process"))
+
+
+def is_entry(filename):
+    """Cache entries are named by their 32-hex-digit key"""
+    return len(filename) == 32 and all(c in "0123456789abcdef" for c in filename)
+
+
+def evict(directory, max_bytes):
+    """Delete least recently used cache entries until they fit; returns bytes freed.
+
+    Anything else in the directory (Gradle's *.lock and gc.properties, uploads
+    still in flight) is left alone and not counted.
+    """
+    entries = []
+    total = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if not is_entry(filename):
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            # atime is often not updated (noatime), so hits also touch mtime
+            entries.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+            total += st.st_size
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            freed += size
+        except OSError:
+            pass
+    return freed
+
+
+class BuildCache:
+    """Local cache directory (plus optional remote) wired into Gradle via an init script"""
+
+    def __init__(self, directory=CACHE_DIR, max_mb=CACHE_MAX_MB, remote_url=REMOTE_CACHE_URL, push=True):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.remote_url = remote_url.rstrip("/") + "/" if remote_url else ""
+        self.push = push
+
+    def init_script(self, path="build-cache.gradle"):
+        """Write the Gradle init script that points the build cache here; returns its path"""
+        os.makedirs(self.directory, exist_ok=True)
+        directory = self.directory.replace("\\", "/")
+        remote = ""
+        credentials = ""
+        if REMOTE_CACHE_USER:
+            # Read from the environment by Gradle, so the password is not written to disk
+            credentials = """
+            credentials {
+                username = System.getenv('GRADLE_REMOTE_CACHE_USER')
+                password = System.getenv('GRADLE_REMOTE_CACHE_PASSWORD')
+            }"""
+        if self.remote_url:
+            remote = f"""
+        remote(HttpBuildCache) {{
+            url = '{self.remote_url}'
+            push = {'true' if self.push else 'false'}
+            allowInsecureProtocol = {'false' if self.remote_url.startswith('https:') else 'true'}{credentials}
+        }}"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"""gradle.settingsEvaluated {{ settings ->
+    settings.buildCache {{
+        local {{
+            enabled = true
+            directory = new File('{directory}')
+        }}{remote}
+    }}
+}}
+""")
+        return path
+
+    def evict(self):
+        freed = evict(self.directory, self.max_bytes)
+        if freed:
+            print(f"🧹 Build cache trimmed by {freed / 1024 / 1024:.0f} MB")
+        return freed
+
+
+class BuildCacheServer:
+    """Minimal HTTP build-cache backend storing entries as files, LRU-bounded.
+
+    PUTs must carry the username/password as HTTP basic auth. Without
+    credentials anyone could plant task outputs in other machines' builds, so
+    the server then refuses to listen beyond 127.0.0.1.
+    """
+
+    def __init__(self, directory=CACHE_DIR + "-remote", port=SERVER_PORT, max_mb=CACHE_MAX_MB, host="127.0.0.1",
+                 username=REMOTE_CACHE_USER, password=REMOTE_CACHE_PASSWORD, entry_max_mb=ENTRY_MAX_MB):
+        if not password and host not in ("127.0.0.1", "localhost", "::1"):
+            raise ValueError(f"refusing to serve the build cache on {host} without "
+                             f"GRADLE_REMOTE_CACHE_USER / GRADLE_REMOTE_CACHE_PASSWORD")
+        self.authorization = ("Basic " + base64.b64encode(f"{username}:{password}".encode("utf-8")).decode("ascii")
+                              if password else "")
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.entry_max_bytes = min(entry_max_mb * 1024 * 1024, self.max_bytes)
+        self.hits = self.misses = self.stores = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Tracked incrementally so a PUT only walks the directory when over the limit
+        self.size = sum(entry.stat().st_size for entry in os.scandir(directory)
+                        if entry.is_file() and is_entry(entry.name))
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _path(self):
+                key = self.path.rstrip("/").rpartition("/")[2]
+                if not is_entry(key):
+                    return None
+                return os.path.join(server.directory, key)
+
+            def do_GET(self):
+                path = self._path()
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                except (OSError, TypeError):
+                    server.misses += 1
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                os.utime(path)      # recently used
+                server.hits += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/vnd.gradle.build-cache-artifact.v2")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if self.command == "GET":
+                    self.wfile.write(data)
+
+            do_HEAD = do_GET
+
+            def _refuse(self, status, headers=None):
+                """Answer without reading the request body, so the connection cannot be reused"""
+                self.close_connection = True
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+            def do_PUT(self):
+                # Nothing is read from an unauthenticated, malformed or oversized upload
+                if server.authorization and not hmac.compare_digest(
+                        self.headers.get("Authorization") or "", server.authorization):
+                    return self._refuse(401, {"WWW-Authenticate": 'Basic realm="build-cache"'})
+                path = self._path()
+                if path is None:
+                    return self._refuse(400)
+                length = self.headers.get("Content-Length")
+                if not length or not length.isdigit():
+                    return self._refuse(411)
+                length = int(length)
+                if length > server.entry_max_bytes:
+                    return self._refuse(413)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    remaining = length
+                    while remaining:
+                        chunk = self.rfile.read(min(remaining, 1024 * 1024))
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        remaining -= len(chunk)
+                if remaining:
+                    os.remove(tmp)
+                    return self._refuse(400)
+                with server.lock:
+                    if os.path.exists(path):
+                        server.size -= os.path.getsize(path)
+                    os.replace(tmp, path)
+                    server.size += length
+                    server.stores += 1
+                    if server.size > server.max_bytes:
+                        server.size -= evict(server.directory, server.max_bytes)
+                self.send_response(201)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}/cache/"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _task_group(task):
+    name = task.rpartition(":")[2].lower()
+    for fragment, label in TASK_GROUPS:
+        if fragment in name:
+            return label
+    return "other"
+
+
+def hit_rates(parsers):
+    """({task: (hits, executed, up_to_date)}, {group: (hits, executed)}) over the parsed runs"""
+    tasks = {}
+    for parser in parsers:
+        for task, info in parser.tasks.items():
+            hits, executed, up_to_date = tasks.get(task, (0, 0, 0))
+            outcome = info["outcome"]
+            tasks[task] = (hits + (outcome == "FROM-CACHE"),
+                           executed + (outcome in ("EXECUTED", "FAILED")),
+                           up_to_date + (outcome == "UP-TO-DATE"))
+    groups = {}
+    for task, (hits, executed, _) in tasks.items():
+        group_hits, group_executed = groups.get(_task_group(task), (0, 0))
+        groups[_task_group(task)] = (group_hits + hits, group_executed + executed)
+    return tasks, groups
+
+
+def print_hit_rates(parsers, top=15):
+    """Cache hit rate per task and per task group (kapt, Hilt, Room, ...)"""
+    tasks, groups = hit_rates(parsers)
+    cacheable = {task: counts for task, counts in tasks.items() if counts[0] + counts[1]}
+    if not cacheable:
+        print("🗃️ No cacheable tasks ran (all up-to-date or skipped)")
+        return
+    hits = sum(counts[0] for counts in cacheable.values())
+    total = sum(counts[0] + counts[1] for counts in cacheable.values())
+    print(f"🗃️ Build cache: {hits}/{total} task runs from cache ({hits / total:.0%})")
+    for group, (group_hits, executed) in sorted(groups.items(), key=lambda item: -sum(item[1])):
+        if group_hits + executed:
+            print(f"   {group:<10} {group_hits:>4}/{group_hits + executed:<4} {group_hits / (group_hits + executed):>5.0%}")
+    misses = sorted(((task, counts) for task, counts in cacheable.items() if counts[1]), key=lambda item: -item[1][1])
+    for task, (task_hits, executed, _) in misses[:top]:
+        print(f"   miss: {task} ({task_hits}/{task_hits + executed} from cache)")
+
+
+def benchmark(entries=400, entry_kb=256, max_mb=50):
+    """Push/pull synthetic cache entries through the HTTP server and check the LRU bound"""
+    import random
+    import shutil
+    import tempfile
+
+    import requests
+
+    from gradle_output import GradleOutputParser
+
+    root = tempfile.mkdtemp(prefix="gradle-cache-bench-")
+    cache_server = BuildCacheServer(os.path.join(root, "remote"), port=0, max_mb=max_mb,
+                                    username="bench", password="bench-secret").start()
+    session = requests.Session()
+    session.auth = ("bench", "bench-secret")
+    payload = os.urandom(entry_kb * 1024)
+    try:
+        keys = [f"{i:032x}" for i in range(entries)]
+        started = time.perf_counter()
+        for key in keys:
+            session.put(cache_server.url + key, data=payload).raise_for_status()
+        put_seconds = time.perf_counter() - started
+        stored = sum(os.path.getsize(os.path.join(cache_server.directory, name))
+                     for name in os.listdir(cache_server.directory))
+        # Recently written keys survive eviction, the oldest do not
+        started = time.perf_counter()
+        found = sum(session.get(cache_server.url + key).status_code == 200 for key in keys)
+        get_seconds = time.perf_counter() - started
+        recent = sum(session.head(cache_server.url + key).status_code == 200 for key in keys[-100:])
+        megabytes = entries * entry_kb / 1024
+        print(f"PUT {entries} x {entry_kb} KB: {put_seconds:.2f}s ({megabytes / put_seconds:.0f} MB/s)")
+        print(f"GET {entries}: {get_seconds:.2f}s, {found} hits, {entries - found} evicted")
+        print(f"stored {stored / 1024 / 1024:.1f} MB (limit {max_mb} MB), newest 100 present: {recent}/100")
+
+        # Hit-rate report: a cold build, then a clean build served from the cache
+        random.seed(1)
+        modules = [":app", ":core", ":data"]
+        names = ["kaptGenerateStubsDebugKotlin", "kaptDebugKotlin", "hiltJavaCompileDebug", "compileDebugKotlin",
+                 "compileDebugJavaWithJavac", "mergeDebugResources", "dexBuilderDebug", "processDebugManifest"]
+        parsers = []
+        for warm in (False, True):
+            parser = GradleOutputParser()
+            for module in modules:
+                for name in names:
+                    outcome = " FROM-CACHE" if warm and random.random() < 0.85 else ""
+                    parser.feed(f"> Task {module}:{name}{outcome}")
+            parser.feed("BUILD SUCCESSFUL in 1m 2s")
+            parsers.append(parser)
+        print_hit_rates(parsers, top=5)
+    finally:
+        cache_server.stop()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else SERVER_PORT
+        host = sys.argv[3] if len(sys.argv) > 3 else "127.0.0.1"
+        try:
+            cache_server = BuildCacheServer(port=port, host=host).start()
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if not cache_server.authorization:
+            print("⚠️ No GRADLE_REMOTE_CACHE_PASSWORD set: stores are not authenticated (127.0.0.1 only)")
+        print(f"🗃️ Build cache server on {cache_server.url} ({cache_server.directory}, {CACHE_MAX_MB} MB)")
+        try:
+            while True:
+                time.sleep(60)
+                print(f"[{time.strftime('%H:%M:%S')}] hits {cache_server.hits}, misses {cache_server.misses}, "
+                      f"stores {cache_server.stores}")
+        except KeyboardInterrupt:
+            cache_server.stop()
+    elif len(sys.argv) > 1 and sys.argv[1] == "evict":
+        BuildCache().evict()
+    else:
+        print(__doc__)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Maven mirror prober
+Measures latency and throughput of every configured Maven repository in
+parallel (a HEAD plus a small Range GET of a known POM), caches the results
+with a TTL and writes init.gradle with the fastest reachable mirrors first,
+so dependency resolution stops sitting out 300 s timeouts on a slow or
+blocked mirror.
+
+  gradle_mirrors.py [--refresh] [--output init.gradle]
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+CACHE_FILE = ".mirror_probe.json"
+CACHE_TTL = 6 * 3600
+PROBE_TIMEOUT = (3, 5)      # (connect, read) seconds; anything slower is not worth waiting for
+PROBE_BYTES = 64 * 1024
+SAMPLES = 3
+
+# A small, always-present POM per repository kind
+PROBE_PATHS = {
+    "google": "androidx/core/core-ktx/1.12.0/core-ktx-1.12.0.pom",
+    "central": "junit/junit/4.13.2/junit-4.13.2.pom",
+    "plugins": "org/jetbrains/kotlin/jvm/org.jetbrains.kotlin.jvm.gradle.plugin/1.9.21/"
+               "org.jetbrains.kotlin.jvm.gradle.plugin-1.9.21.pom",
+    "jitpack": "com/github/jitpack/gradle-simple/1.0/gradle-simple-1.0.pom",
+}
+
+# (name, base url, kind) for every repository the build files mention
+MIRRORS = [
+    ("aliyun-google", "https://maven.aliyun.com/repository/google/", "google"),
+    ("aliyun-central", "https://maven.aliyun.com/repository/central/", "central"),
+    ("aliyun-gradle-plugin", "https://maven.aliyun.com/repository/gradle-plugin/", "plugins"),
+    ("repo1", "https://repo1.maven.org/maven2/", "central"),
+    ("google", "https://dl.google.com/dl/android/maven2/", "google"),
+    ("mavenCentral", "https://repo.maven.apache.org/maven2/", "central"),
+    ("gradlePluginPortal", "https://plugins.gradle.org/m2/", "plugins"),
+    ("jitpack", "https://jitpack.io/", "jitpack"),
+]
+
+
+def probe(mirror, session=None, samples=SAMPLES, timeout=PROBE_TIMEOUT):
+    """Latency (median HEAD round trip) and throughput (Range GET) of one mirror"""
+    name, url, kind = mirror
+    session = session or requests.Session()
+    target = url + PROBE_PATHS[kind]
+    result = {"name": name, "url": url, "kind": kind, "probed_at": time.time(),
+              "reachable": False, "latency": None, "throughput": None, "error": None}
+    latencies = []
+    try:
+        for _ in range(samples):
+            started = time.perf_counter()
+            response = session.head(target, timeout=timeout, allow_redirects=True)
+            if response.status_code >= 400:
+                result["error"] = f"HTTP {response.status_code}"
+                return result
+            latencies.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        response = session.get(target, timeout=timeout, stream=True,
+                               headers={"Range": f"bytes=0-{PROBE_BYTES - 1}", "Accept-Encoding": "identity"})
+        received = sum(len(chunk) for chunk in response.iter_content(16384))
+        response.close()
+        elapsed = time.perf_counter() - started
+    except requests.RequestException as e:
+        result["error"] = type(e).__name__
+        return result
+    result.update(reachable=True, latency=statistics.median(latencies),
+                  throughput=received / max(elapsed, 1e-6))
+    return result
+
+
+def probe_all(mirrors=MIRRORS, samples=SAMPLES, timeout=PROBE_TIMEOUT):
+    """Probe every mirror at once; one session per mirror so keep-alive is measured fairly"""
+    with ThreadPoolExecutor(max_workers=len(mirrors) or 1) as pool:
+        return list(pool.map(lambda mirror: probe(mirror, requests.Session(), samples, timeout), mirrors))
+
+
+def score(result):
+    """Estimated seconds to fetch one small artifact; lower is better"""
+    return result["latency"] + PROBE_BYTES / max(result["throughput"] or 0, 1)
+
+
+def rank(results):
+    """Reachable mirrors, fastest first"""
+    return sorted((result for result in results if result["reachable"]), key=score)
+
+
+class MirrorProbeCache:
+    """Probe results on disk, re-probed once older than the TTL"""
+
+    def __init__(self, path=CACHE_FILE, ttl=CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.results = json.load(f)
+        except (OSError, ValueError):
+            self.results = {}
+
+    def fresh(self, url, now=None):
+        result = self.results.get(url)
+        return result is not None and (now or time.time()) - result["probed_at"] < self.ttl
+
+    def get(self, mirrors=MIRRORS, refresh=False, **probe_kw):
+        """Results for mirrors, probing only those missing or stale"""
+        stale = [mirror for mirror in mirrors if refresh or not self.fresh(mirror[1])]
+        if stale:
+            for result in probe_all(stale, **probe_kw):
+                self.results[result["url"]] = result
+            self.save()
+        return [self.results[mirror[1]] for mirror in mirrors]
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.results, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+def _maven(url):
+    insecure = "; allowInsecureProtocol = true" if url.startswith("http://") else ""
+    return f"            maven {{ url '{url}'{insecure} }}"
+
+
+def init_gradle(ranked):
+    """init.gradle listing the ranked mirrors ahead of whatever the build files declare"""
+    repos = "\n".join(_maven(result["url"]) for result in ranked)
+    plugin_repos = "\n".join(_maven(result["url"]) for result in ranked
+                             if result["kind"] in ("plugins", "google", "central"))
+    return f"""// Generated by gradle_mirrors.py - fastest reachable mirrors first
+beforeSettings {{ settings ->
+    settings.pluginManagement {{
+        repositories {{
+{plugin_repos}
+        }}
+    }}
+    settings.dependencyResolutionManagement {{
+        repositories {{
+{repos}
+        }}
+    }}
+}}
+
+allprojects {{
+    buildscript {{
+        repositories {{
+{plugin_repos}
+        }}
+    }}
+}}
+"""
+
+
+def write_init_gradle(path="init.gradle", mirrors=MIRRORS, refresh=False, cache=None):
+    """Probe (or reuse cached results), write init.gradle and return the ranking"""
+    cache = cache or MirrorProbeCache()
+    results = cache.get(mirrors, refresh=refresh)
+    ranked = rank(results)
+    if not ranked:
+        print("⚠️ No mirror answered the probe; keeping the configured order")
+        ranked = [dict(result, latency=0.0, throughput=1.0) for result in results]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(init_gradle(ranked))
+    return ranked, results
+
+
+def print_results(results):
+    for result in sorted(results, key=lambda result: (not result["reachable"], score(result) if result["reachable"] else 0)):
+        if result["reachable"]:
+            print(f"   ✅ {result['name']:<22} {result['latency'] * 1000:7.0f} ms  "
+                  f"{result['throughput'] / 1024:8.0f} KB/s  {result['url']}")
+        else:
+            print(f"   ❌ {result['name']:<22} {result['error']:<24} {result['url']}")
+
+
+def benchmark(artifacts=20, timeout=1.0):
+    """Stub repositories with injected delays: resolution time in the fixed vs probed order"""
+    import socket
+
+    from mock_backend import MockBackend
+
+    delays = {"slow-mirror": 0.25, "medium-mirror": 0.08, "fast-mirror": 0.005}
+    backends = {name: MockBackend(latency=delay) for name, delay in delays.items()}
+    blackhole = socket.socket()         # accepts connections, never answers
+    blackhole.bind(("127.0.0.1", 0))
+    blackhole.listen(64)
+    try:
+        mirrors = [("blocked-mirror", f"http://127.0.0.1:{blackhole.getsockname()[1]}/files/", "central")]
+        for name, backend in backends.items():
+            backend.start()
+            backend.add_file(PROBE_PATHS["central"], b"<project/>" * 2000)
+            for i in range(artifacts):
+                backend.add_file(f"lib/{i}.pom", b"<project/>")
+            mirrors.append((name, backend.url + "/files/", "central"))
+
+        def resolve(order):
+            """Gradle-style lookup: try each repository in order until the artifact is found"""
+            session = requests.Session()
+            started = time.perf_counter()
+            for i in range(artifacts):
+                for _, url, _ in order:
+                    try:
+                        if session.head(f"{url}lib/{i}.pom", timeout=timeout).status_code == 200:
+                            break
+                    except requests.RequestException:
+                        continue
+            return time.perf_counter() - started
+
+        fixed = resolve(mirrors)
+        started = time.perf_counter()
+        results = probe_all(mirrors, samples=2, timeout=timeout)
+        probe_seconds = time.perf_counter() - started
+        print_results(results)
+        ranked = rank(results)
+        probed = resolve([(result["name"], result["url"], result["kind"]) for result in ranked])
+        print(f"probe: {probe_seconds:.2f}s for {len(mirrors)} mirrors in parallel")
+        print(f"resolve {artifacts} artifacts, configured order: {fixed:.2f}s")
+        print(f"resolve {artifacts} artifacts, probed order:     {probed:.2f}s ({fixed / probed:.0f}x)")
+        print("order: " + ", ".join(result["name"] for result in ranked))
+    finally:
+        blackhole.close()
+        for backend in backends.values():
+            backend.stop()
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        output = sys.argv[sys.argv.index("--output") + 1] if "--output" in sys.argv[:-1] else "init.gradle"
+        print("🌐 Probing Maven mirrors...")
+        ranked, results = write_init_gradle(output, refresh="--refresh" in sys.argv)
+        print_results(results)
+        print(f"✅ {output} written with {len(ranked)} mirrors, fastest first")
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Gradle output parser
+Turns Gradle console output into a timeline of events while the build runs:
+daemon start, configuration, dependency downloads, task start/finish with outcome
+(UP-TO-DATE, FROM-CACHE, NO-SOURCE, SKIPPED, FAILED), Kotlin/Java/AAPT
+warnings and errors with file:line, and the final result.
+
+Lines are handled one at a time and events go straight to a JSON-lines file,
+so memory stays constant on multi-hundred-MB --info logs. Task durations come
+from the "completed. Took ..." lines Gradle prints with --info; without them
+they are estimated from the gap between task headers.
+
+  gradle_output.py report build.log [events.jsonl]   parse a saved log
+  gradle_output.py diff old.jsonl new.jsonl          tasks that got slower
+"""
+
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+TASK_RE = re.compile(r"> Task (?P<task>:\S+)(?: (?P<outcome>UP-TO-DATE|FROM-CACHE|NO-SOURCE|SKIPPED|FAILED))?\s*$")
+TOOK_RE = re.compile(r"(?P<task>:\S+) \(Thread\[.*\]\) completed\. Took (?P<took>.+?)\.?\s*$")
+CONFIGURE_RE = re.compile(r"> Configure project (?P<project>\S+)")
+DOWNLOAD_RE = re.compile(r"Download(?:ing)? (?P<url>https?://\S+?)(?:, took (?P<took>.+?))?\s*$")
+RESULT_RE = re.compile(r"BUILD (?P<result>SUCCESSFUL|FAILED) in (?P<took>.+?)\s*$")
+# Kotlin: "e: file:///src/A.kt:12:5 msg" (1.9+; "file:///C:/src/A.kt" on Windows) or "e: /src/A.kt: (12, 5): msg"
+KOTLIN_RE = re.compile(r"(?P<level>[ew]): (?:file://(?:/(?=[A-Za-z]:))?)?(?P<file>(?:[A-Za-z]:)?[^:]+?)"
+                       r"(?::(?P<line>\d+):(?P<column>\d+)|: \((?P<line2>\d+), (?P<column2>\d+)\):?)?"
+                       r"\s+(?P<message>.*)$")
+# javac: "/src/A.java:12: error: msg"
+JAVA_RE = re.compile(r"(?P<file>(?:[A-Za-z]:)?[^:\s][^:]*\.java):(?P<line>\d+): (?P<level>error|warning): (?P<message>.*)$")
+# AAPT: "ERROR: /res/layout/a.xml:12: AAPT: error: msg"
+AAPT_RE = re.compile(r"ERROR:\s*(?P<file>(?:[A-Za-z]:)?[^:]+):(?P<line>\d+): AAPT: (?:error: )?(?P<message>.*)$")
+DURATION_RE = re.compile(r"([\d.]+)\s*(hrs?|mins?|secs?|ms|h|m|s)\b")
+DURATION_UNITS = {"hr": 3600, "hrs": 3600, "h": 3600, "min": 60, "mins": 60, "m": 60,
+                  "sec": 1, "secs": 1, "s": 1, "ms": 0.001}
+
+KEPT_DIAGNOSTICS = 50   # errors/warnings kept in memory for the summary (all go to the event file)
+
+
+def parse_duration(text):
+    """Seconds from Gradle's "1 mins 2.5 secs" / "4m 12s" / "120 ms" style"""
+    return sum(float(value) * DURATION_UNITS[unit] for value, unit in DURATION_RE.findall(text))
+
+
+class GradleOutputParser:
+    """Incremental parser; feed() lines, read tasks/diagnostics/result afterwards"""
+
+    def __init__(self, events_file=None, clock=None):
+        self.events_file = events_file
+        self.clock = clock or time.monotonic
+        self.started = self.clock()
+        self.tasks = {}             # task -> {"outcome", "start", "duration", "measured"}
+        self.errors = []
+        self.warnings = []
+        self.error_count = 0
+        self.warning_count = 0
+        self.downloads = 0
+        self.download_seconds = 0.0
+        self.result = None
+        self.failure = None
+        self.lines = 0
+        self.configuring = None
+        self.daemon_started = False     # this invocation paid for a fresh JVM
+        self._last_task = None
+        self._what_went_wrong = False
+
+    def _emit(self, event, **fields):
+        fields = {"t": round(self.clock() - self.started, 3), "event": event, **fields}
+        if self.events_file:
+            self.events_file.write(json.dumps(fields, ensure_ascii=False) + "\n")
+        return fields
+
+    def _diagnostic(self, level, file, line, column, message):
+        kind = "error" if level in ("e", "error", "ERROR") else "warning"
+        event = self._emit(kind, file=file, line=int(line) if line else None,
+                           column=int(column) if column else None, message=message.strip(),
+                           task=self._last_task)
+        if kind == "error":
+            self.error_count += 1
+            if len(self.errors) < KEPT_DIAGNOSTICS:
+                self.errors.append(event)
+        else:
+            self.warning_count += 1
+            if len(self.warnings) < KEPT_DIAGNOSTICS:
+                self.warnings.append(event)
+
+    def _close_estimate(self, now):
+        """A plain-console task header ends the previous task's estimated run"""
+        task = self.tasks.get(self._last_task)
+        if task and task["duration"] is None and task["outcome"] == "EXECUTED":
+            task["duration"] = now - task["start"]
+            self._emit("task_finished", task=self._last_task, outcome="EXECUTED",
+                       seconds=round(task["duration"], 3), estimated=True)
+
+    def feed(self, line):
+        """Parse one line of output"""
+        self.lines += 1
+        line = line.rstrip("\r\n")
+        if not line:
+            return
+        now = self.clock() - self.started
+        head = line[0]
+
+        if self._what_went_wrong:
+            self._what_went_wrong = False
+            self.failure = line.strip()
+            self._emit("failure", message=self.failure)
+            return
+
+        if head == ">":
+            match = TASK_RE.match(line)
+            if match:
+                if self.configuring is not None:
+                    self._emit("configuration_finished", seconds=round(now - self.configuring, 3))
+                    self.configuring = None
+                self._close_estimate(now)
+                task, outcome = match.group("task"), match.group("outcome") or "EXECUTED"
+                self.tasks.setdefault(task, {"outcome": outcome, "start": now, "duration": None, "measured": False})
+                self.tasks[task]["outcome"] = outcome
+                self._last_task = task
+                self._emit("task_started" if outcome == "EXECUTED" else "task_finished", task=task, outcome=outcome)
+                return
+            match = CONFIGURE_RE.match(line)
+            if match:
+                if self.configuring is None:
+                    self.configuring = now
+                self._emit("configure", project=match.group("project"))
+                return
+
+        elif head == ":":
+            match = TOOK_RE.match(line)
+            if match:
+                task = match.group("task")
+                seconds = parse_duration(match.group("took"))
+                entry = self.tasks.setdefault(task, {"outcome": "EXECUTED", "start": now - seconds,
+                                                     "duration": None, "measured": False})
+                entry.update(duration=seconds, measured=True)
+                self._emit("task_finished", task=task, outcome=entry["outcome"], seconds=seconds)
+                return
+
+        elif head == "D":
+            match = DOWNLOAD_RE.match(line)
+            if match:
+                seconds = parse_duration(match.group("took")) if match.group("took") else None
+                self.downloads += 1
+                self.download_seconds += seconds or 0
+                self._emit("download", url=match.group("url"), seconds=seconds)
+                return
+
+        elif head in "ew" and line[1:3] == ": ":
+            match = KOTLIN_RE.match(line)
+            if match:
+                self._diagnostic(match.group("level"), match.group("file"),
+                                 match.group("line") or match.group("line2"),
+                                 match.group("column") or match.group("column2"), match.group("message"))
+                return
+
+        elif head == "S" and line.startswith("Starting a Gradle Daemon"):
+            self.daemon_started = True
+            self._emit("daemon_started")
+            return
+
+        elif head == "T" and line.startswith("To honour the JVM settings for this build a single-use Daemon"):
+            self.daemon_started = True
+            self._emit("daemon_started", single_use=True)
+            return
+
+        elif head == "B":
+            match = RESULT_RE.match(line)
+            if match:
+                self._close_estimate(now)
+                self.result = match.group("result")
+                self._emit("build_finished", result=self.result, seconds=parse_duration(match.group("took")))
+                return
+
+        elif head == "*" and line.startswith("* What went wrong:"):
+            self._what_went_wrong = True
+            return
+
+        elif head == "E" and line.startswith("ERROR:"):
+            match = AAPT_RE.match(line)
+            if match:
+                self._diagnostic("error", match.group("file"), match.group("line"), None, match.group("message"))
+            else:
+                self._diagnostic("error", None, None, None, line[6:])
+            return
+
+        elif head == "W" and line.startswith("WARNING:"):
+            self._diagnostic("warning", None, None, None, line[8:])
+            return
+
+        if ".java:" in line:
+            match = JAVA_RE.match(line)
+            if match:
+                self._diagnostic(match.group("level"), match.group("file"), match.group("line"), None,
+                                 match.group("message"))
+
+    def task_report(self):
+        """[(task, outcome, seconds or None, measured)] slowest first"""
+        rows = [(task, info["outcome"], info["duration"], info["measured"]) for task, info in self.tasks.items()]
+        return sorted(rows, key=lambda row: -(row[2] or 0))
+
+    def print_report(self, top=15):
+        """Per-task durations and a diagnostics summary"""
+        rows = self.task_report()
+        outcomes = {}
+        for _, outcome, _, _ in rows:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        print(f"📊 {len(rows)} tasks: " + ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items())))
+        for task, outcome, seconds, measured in rows[:top]:
+            if seconds:
+                print(f"   {seconds:8.2f}s{'' if measured else '~'}  {task} ({outcome})")
+        if self.downloads:
+            print(f"📥 {self.downloads} downloads, {self.download_seconds:.1f}s")
+        if self.warning_count:
+            print(f"⚠️ {self.warning_count} warnings")
+        for error in self.errors[:10]:
+            location = f"{error['file']}:{error['line']}" if error.get("file") else error.get("task") or ""
+            print(f"❌ {location} {error['message']}")
+        if self.failure:
+            print(f"❌ {self.failure}")
+
+
+def events_path_for(command, directory="gradle-events"):
+    """Timestamped JSON-lines path for a command's events, e.g. gradle-events/20250929-120000-assembleDebug.jsonl"""
+    os.makedirs(directory, exist_ok=True)
+    tasks = [word.rpartition(":")[2] for word in command.split()[1:] if not word.startswith("-")]
+    return os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{'-'.join(tasks) or 'gradle'}.jsonl")
+
+
+def _kill_tree(process):
+    """Kill the shell and the Gradle client it started"""
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def run_gradle(command, cwd=None, events_path=None, echo=True, timeout=None):
+    """Run a Gradle command, parsing its output as it streams; returns (success, parser).
+
+    The timeout is enforced by a timer, so it also fires while Gradle prints nothing.
+    """
+    events_file = open(events_path, "w", encoding="utf-8") if events_path else None
+    parser = GradleOutputParser(events_file)
+    watchdog, expired = None, []
+    try:
+        process = subprocess.Popen(command, shell=True, cwd=cwd, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace",
+                                   start_new_session=os.name != "nt")
+        if timeout:
+            watchdog = threading.Timer(timeout, lambda: expired.append(True) or _kill_tree(process))
+            watchdog.daemon = True
+            watchdog.start()
+        for line in process.stdout:
+            if echo:
+                print(line, end="")
+            parser.feed(line)
+        returncode = process.wait()
+        if expired:
+            print(f"⏰ timeout after {timeout:.0f}s")
+        return returncode == 0 and parser.result != "FAILED", parser
+    finally:
+        if watchdog:
+            watchdog.cancel()
+        if events_file:
+            events_file.close()
+
+
+def load_task_durations(events_path):
+    """{task: seconds} from a JSON-lines event file"""
+    durations = {}
+    with open(events_path, "r", encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            if event["event"] == "task_finished" and event.get("seconds") is not None:
+                durations[event["task"]] = event["seconds"]
+    return durations
+
+
+def diff_events(old_path, new_path, threshold=0.5):
+    """[(task, old seconds, new seconds)] for tasks that got slower by more than threshold seconds"""
+    old, new = load_task_durations(old_path), load_task_durations(new_path)
+    slower = [(task, old.get(task, 0.0), seconds) for task, seconds in new.items()
+              if seconds - old.get(task, 0.0) > threshold]
+    return sorted(slower, key=lambda row: row[1] - row[2])
+
+
+def synthetic_log(path, size_mb):
+    """--info style log of roughly size_mb megabytes with tasks, downloads and errors"""
+    noise = ("Resolving dependency configuration 'debugRuntimeClasspath' from repository 'Google' "
+             "using cached metadata for androidx.compose.ui:ui:1.6.1\n")
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("> Configure project :app\n")
+        f.write("Download https://maven.aliyun.com/repository/google/androidx/core/core-ktx/1.12.0/core-ktx-1.12.0.aar, took 812 ms\n")
+        task = 0
+        while written < size_mb * 1024 * 1024:
+            name = f":app:generatedTask{task}"
+            block = (f"> Task {name}\n" + noise * 200 +
+                     f"w: file:///app/src/main/java/com/example/persianaiapp/ui/Screen{task}.kt:{task % 90 + 1}:5 "
+                     f"'Divider' is deprecated\n"
+                     f"{name} (Thread[Execution worker Thread 3,5,main]) completed. Took {task % 7 + 0.25} secs.\n")
+            f.write(block)
+            written += len(block)
+            task += 1
+        f.write("> Task :app:compileDebugKotlin FAILED\n"
+                "e: file:///app/src/main/java/com/example/persianaiapp/MainActivity.kt:42:13 Unresolved reference: viewBinding\n"
+                "\nFAILURE: Build failed with an exception.\n\n* What went wrong:\n"
+                "Execution failed for task ':app:compileDebugKotlin'.\n\nBUILD FAILED in 4m 12s\n")
+
+
+def benchmark(size_mb=300):
+    """Parse a synthetic multi-hundred-MB --info log and report speed and peak memory"""
+    import resource
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as workdir:
+        log_path = os.path.join(workdir, "build.log")
+        events_path = os.path.join(workdir, "events.jsonl")
+        synthetic_log(log_path, size_mb)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        started = time.perf_counter()
+        with open(log_path, "r", encoding="utf-8") as log, open(events_path, "w", encoding="utf-8") as events:
+            parser = GradleOutputParser(events)
+            for line in log:
+                parser.feed(line)
+        elapsed = time.perf_counter() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        events_size = os.path.getsize(events_path)
+
+    print(f"{size_mb} MB log, {parser.lines:,} lines parsed in {elapsed:.1f}s "
+          f"({size_mb / elapsed:.0f} MB/s)")
+    print(f"  tasks: {len(parser.tasks)}, warnings: {parser.warning_count}, errors: {parser.error_count}, "
+          f"result: {parser.result}")
+    print(f"  event file: {events_size / 1024 / 1024:.1f} MB")
+    print(f"  peak RSS: {rss_before:.0f} MB before, {rss_after:.0f} MB after")
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    elif len(sys.argv) >= 3 and sys.argv[1] == "report":
+        events_file = open(sys.argv[3], "w", encoding="utf-8") if len(sys.argv) > 3 else None
+        parser = GradleOutputParser(events_file)
+        with open(sys.argv[2], "r", encoding="utf-8", errors="replace") as log:
+            for line in log:
+                parser.feed(line)
+        if events_file:
+            events_file.close()
+        parser.print_report()
+    elif len(sys.argv) == 4 and sys.argv[1] == "diff":
+        for task, old, new in diff_events(sys.argv[2], sys.argv[3]):
+            print(f"{new - old:+8.2f}s  {task} ({old:.2f}s -> {new:.2f}s)")
+    else:
+        print(__doc__)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Gradle build session
+Runs a local build's whole sequence (clean, build, fallback builds) against
+one warm Gradle daemon instead of a fresh --no-daemon JVM per step, so JVM
+startup, build configuration and the Kotlin compiler daemon are paid once.
+clean is optional, which makes incremental builds possible. With a
+BuildCache attached, task outputs are reused across clean builds and
+checkouts, and the per-task cache hit rates are reported.
+
+Each step's wall time is recorded together with whether it was cold (had to
+start a JVM) or warm (reused the daemon), and printed at the end.
+"""
+
+import os
+import sys
+import time
+
+from gradle_cache import BuildCache, print_hit_rates
+from gradle_output import events_path_for, run_gradle
+
+
+def default_gradlew():
+    return "gradlew.bat" if os.name == "nt" else "./gradlew"
+
+
+class GradleSession:
+    """Sequence of Gradle invocations sharing one daemon"""
+
+    def __init__(self, gradlew=None, init_script=None, daemon=True, clean=True,
+                 cwd=None, timeout=None, echo=True, events_dir="gradle-events", build_cache=None):
+        self.gradlew = gradlew or default_gradlew()
+        self.init_script = init_script
+        self.daemon = daemon
+        self.clean = clean
+        self.cwd = cwd
+        self.timeout = timeout
+        self.echo = echo
+        self.events_dir = os.path.join(cwd or ".", events_dir)
+        self.build_cache = build_cache
+        self.steps = []
+        self.parsers = []
+
+    def command(self, tasks, init=True, extra=()):
+        parts = [self.gradlew, tasks]
+        if init and self.init_script:
+            parts.append(f"--init-script={self.init_script}")
+        if self.build_cache:
+            cache_script = self.build_cache.init_script(os.path.join(self.cwd or ".", "build-cache.gradle"))
+            parts.extend(["--build-cache", f"--init-script={cache_script}"])
+        parts.extend(extra)
+        parts.append("--daemon" if self.daemon else "--no-daemon")
+        return " ".join(parts)
+
+    def run(self, tasks, init=True, extra=(), label=None):
+        """Run one step; returns (success, parser)"""
+        command = self.command(tasks, init, extra)
+        print(f"🔄 {command}")
+        started = time.monotonic()
+        success, parser = run_gradle(command, cwd=self.cwd, events_path=events_path_for(command, self.events_dir),
+                                     echo=self.echo, timeout=self.timeout)
+        self.steps.append({"label": label or tasks, "seconds": time.monotonic() - started,
+                           "cold": parser.daemon_started or not self.daemon, "success": success})
+        self.parsers.append(parser)
+        return success, parser
+
+    def clean_step(self):
+        """clean with the init script, then without; skipped when clean is off"""
+        if not self.clean:
+            print("⏭️ Skipping clean (incremental build)")
+            return True
+        success, _ = self.run("clean", label="clean")
+        if not success and self.init_script:
+            success, _ = self.run("clean", init=False, label="clean (no init script)")
+        return success
+
+    def build_step(self, tasks="assembleDebug", extra=("--stacktrace",)):
+        """Build with the init script, then without; returns (success, parser of the last attempt)"""
+        success, parser = self.run(tasks, extra=extra, label=tasks)
+        if not success and self.init_script:
+            success, parser = self.run(tasks, init=False, extra=extra, label=f"{tasks} (no init script)")
+        return success, parser
+
+    def stop(self):
+        """Stop the daemon (it otherwise stays warm for the next session)"""
+        if self.daemon:
+            run_gradle(f"{self.gradlew} --stop", cwd=self.cwd, echo=False)
+
+    def close(self):
+        """Trim the build cache to its size limit once the session's builds are done (the daemon stays up)"""
+        if self.build_cache:
+            self.build_cache.evict()
+
+    def print_timings(self):
+        print(f"\n⏱️ {'step':<34} {'time':>9}  {'JVM':<5} result")
+        for step in self.steps:
+            print(f"   {step['label']:<34} {step['seconds']:>8.1f}s  {'cold' if step['cold'] else 'warm':<5} "
+                  f"{'✅' if step['success'] else '❌'}")
+        total = sum(step["seconds"] for step in self.steps)
+        cold = sum(1 for step in self.steps if step["cold"])
+        print(f"   {'total':<34} {total:>8.1f}s  ({cold} cold, {len(self.steps) - cold} warm)")
+        if self.build_cache:
+            print_hit_rates(self.parsers)
+
+
+def session_from_argv(argv=None, **kwargs):
+    """GradleSession configured from --no-clean / --no-daemon / --no-build-cache / --cache-server URL flags"""
+    argv = sys.argv[1:] if argv is None else argv
+    build_cache = None
+    if "--no-build-cache" not in argv:
+        remote = argv[argv.index("--cache-server") + 1] if "--cache-server" in argv[:-1] else None
+        build_cache = BuildCache() if remote is None else BuildCache(remote_url=remote)
+    return GradleSession(clean="--no-clean" not in argv, daemon="--no-daemon" not in argv,
+                         build_cache=build_cache, **kwargs)
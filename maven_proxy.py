@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Dependency pre-fetch and local Maven proxy
+Instead of leaving Gradle to pull artifacts one by one at build time over a
+slow link:
+  * reads the dependencies declared in build.gradle and app/build.gradle
+  * resolves their transitive closure from the POMs (parents, properties,
+    BOM imports) and Gradle module metadata
+  * downloads everything in parallel, with retry and resume, into a local
+    Maven repository
+  * serves that repository on localhost as a caching proxy in front of the
+    probed mirrors; init.gradle points at it, so later builds resolve with
+    no outbound traffic
+
+  maven_proxy.py prefetch [--root DIR]    resolve and download the closure
+  maven_proxy.py serve [PORT] [--offline] run the proxy
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from artifact_downloader import CHUNK_SIZE, IDENTITY, MAX_RETRIES, DownloadError
+from gradle_mirrors import MIRRORS, MirrorProbeCache, init_gradle, rank
+from http_client import APISession
+
+REPO_DIR = os.environ.get("MAVEN_PROXY_DIR") or os.path.expanduser("~/.cache/persian-ai/maven-repo")
+PROXY_PORT = 5072
+WORKERS = 8
+BUILD_FILES = ("build.gradle", "app/build.gradle")
+
+# implementation 'g:a:v', kapt("g:a:v"), implementation platform('g:a:v'), classpath 'g:a:v', ...
+DEPENDENCY_RE = re.compile(
+    r"^\s*(?:\w*[iI]mplementation|\w*[aA]pi|kapt\w*|ksp\w*|classpath|compileOnly|runtimeOnly|annotationProcessor)"
+    r"\s*\(?\s*(?P<platform>(?:enforcedP|p)latform\s*\()?\s*['\"](?P<coordinate>[^'\":\s]+:[^'\":\s]+(?::[^'\"\s]+)?)['\"]",
+    re.MULTILINE)
+PLUGIN_RE = re.compile(r"id\s*\(?\s*['\"](?P<id>[\w.\-]+)['\"]\s*\)?\s+version\s+['\"](?P<version>[^'\"]+)['\"]")
+
+SKIP_SCOPES = ("test", "provided", "system")
+PRE_RELEASE = ("dev", "snapshot", "alpha", "a", "beta", "b", "milestone", "m", "rc", "cr")
+
+
+def declared_dependencies(root=".", files=BUILD_FILES):
+    """[(group, artifact, version or None, is_platform)] from the build files"""
+    declared = []
+    for name in files:
+        try:
+            with open(os.path.join(root, name), encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            continue
+        text = re.sub(r"//[^\n]*", "", text)
+        for match in DEPENDENCY_RE.finditer(text):
+            group, artifact, version = (match.group("coordinate").split(":") + [None])[:3]
+            declared.append((group, artifact, version, bool(match.group("platform"))))
+        for match in PLUGIN_RE.finditer(text):
+            plugin = match.group("id")
+            declared.append((plugin, f"{plugin}.gradle.plugin", match.group("version"), False))
+    return declared
+
+
+def version_key(version):
+    """Sort key roughly following Gradle's version ordering (1.0-alpha1 < 1.0 < 1.0.1)"""
+    key = []
+    for token in re.findall(r"\d+|[a-zA-Z]+", version):
+        if token.isdigit():
+            key.append((2, int(token), ""))
+        elif token.lower() in PRE_RELEASE:
+            key.append((0, PRE_RELEASE.index(token.lower()), token))
+        else:
+            key.append((1, 0, token.lower()))
+    return key + [(1, 0, "")]
+
+
+def pin(version):
+    """A concrete version from a Maven/Gradle version spec ([1.0,2.0) -> 1.0)"""
+    if not version:
+        return None
+    version = version.strip()
+    if version[0] in "[(":
+        bounds = [bound.strip() for bound in version.strip("[]()").split(",")]
+        version = bounds[0] or bounds[-1]
+    return version or None
+
+
+def repository_path(group, artifact, version, extension):
+    return f"{group.replace('.', '/')}/{artifact}/{version}/{artifact}-{version}.{extension}"
+
+
+def _text(element, name):
+    child = element.find(name)
+    return child.text.strip() if child is not None and child.text else None
+
+
+def _dependency_list(element):
+    if element is None:
+        return []
+    return [{"group": _text(dep, "groupId"), "artifact": _text(dep, "artifactId"), "version": _text(dep, "version"),
+             "scope": _text(dep, "scope"), "type": _text(dep, "type"), "optional": _text(dep, "optional") == "true"}
+            for dep in element.findall("dependency")]
+
+
+def parse_pom(data):
+    """Raw (uninterpolated) POM fields"""
+    root = ET.fromstring(re.sub(rb"\sxmlns=\"[^\"]*\"", b"", data, count=1))
+    parent = root.find("parent")
+    properties = root.find("properties")
+    managed = root.find("dependencyManagement")
+    return {
+        "group": _text(root, "groupId"), "artifact": _text(root, "artifactId"), "version": _text(root, "version"),
+        "packaging": _text(root, "packaging") or "jar",
+        "parent": None if parent is None else (_text(parent, "groupId"), _text(parent, "artifactId"),
+                                               _text(parent, "version")),
+        "properties": {} if properties is None else {
+            child.tag: (child.text or "").strip() for child in properties},
+        "managed": _dependency_list(None if managed is None else managed.find("dependencies")),
+        "dependencies": _dependency_list(root.find("dependencies")),
+        "gradle_metadata": b"published-with-gradle-metadata" in data,
+    }
+
+
+def _interpolate(value, properties):
+    for _ in range(5):      # properties may refer to other properties
+        if not value or "${" not in value:
+            break
+        value = re.sub(r"\$\{([^}]+)\}", lambda match: properties.get(match.group(1), match.group(0)), value)
+    return value
+
+
+class MavenStore:
+    """Local Maven repository filled on demand from upstream mirrors"""
+
+    def __init__(self, directory=REPO_DIR, upstreams=None, session=None, offline=False):
+        self.directory = directory
+        self.upstreams = [url if url.endswith("/") else url + "/" for url in (upstreams or [])]
+        self.session = session or APISession(pool_maxsize=WORKERS * 2)
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.path_locks = {}
+        self.missing = set()        # paths no upstream has, remembered for this run
+        self.group_hint = {}        # group -> upstream that served it last
+        self.stats = {"local": 0, "downloaded": 0, "bytes": 0, "retries": 0, "missing": 0}
+
+    def local_path(self, path):
+        return os.path.join(self.directory, *path.split("/"))
+
+    def _path_lock(self, path):
+        with self.lock:
+            return self.path_locks.setdefault(path, threading.Lock())
+
+    def _upstream_order(self, path):
+        hint = self.group_hint.get(path.rsplit("/", 3)[0])
+        return ([hint] if hint else []) + [url for url in self.upstreams if url != hint]
+
+    def fetch(self, path):
+        """Local file for a repository path, downloading it first if needed; None if nobody has it"""
+        target = self.local_path(path)
+        if os.path.exists(target):
+            with self.lock:
+                self.stats["local"] += 1
+            return target
+        if self.offline or path in self.missing:
+            return None
+        with self._path_lock(path):
+            if os.path.exists(target):
+                return target
+            for upstream in self._upstream_order(path):
+                if self._download(upstream + path, target):
+                    self.group_hint[path.rsplit("/", 3)[0]] = upstream
+                    return target
+            with self.lock:
+                self.missing.add(path)
+                self.stats["missing"] += 1
+            return None
+
+    def fetch_artifact(self, path):
+        """fetch, falling back from .jar to .aar for POMs that do not declare their packaging"""
+        target = self.fetch(path)
+        if target is None and path.endswith(".jar"):
+            target = self.fetch(path[:-4] + ".aar")
+        return target
+
+    def read(self, path):
+        target = self.fetch(path)
+        if target is None:
+            return None
+        with open(target, "rb") as f:
+            return f.read()
+
+    def _download(self, url, target):
+        """Stream url into target through a resumable .part file; False on 404"""
+        part = target + ".part"
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        attempt = 0
+        while True:
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            headers = dict(IDENTITY, Range=f"bytes={offset}-") if offset else IDENTITY
+            try:
+                with self.session.get(url, headers=headers, stream=True) as response:
+                    if response.status_code in (403, 404, 410) or (response.status_code == 416 and not offset):
+                        return False
+                    if response.status_code == 416:
+                        os.remove(part)         # stale partial file; start over
+                        continue
+                    if response.status_code not in (200, 206):
+                        raise DownloadError(f"{url}: HTTP {response.status_code}")
+                    expected = response.headers.get("Content-Length")
+                    mode = "ab" if response.status_code == 206 else "wb"
+                    written = 0
+                    with open(part, mode) as f:
+                        for chunk in response.iter_content(CHUNK_SIZE):
+                            f.write(chunk)
+                            written += len(chunk)
+                    if expected and written != int(expected):
+                        raise requests.ConnectionError(f"{url}: short read ({written}/{expected})")
+                self._verify(url, part)
+                os.replace(part, target)
+                with self.lock:
+                    self.stats["downloaded"] += 1
+                    self.stats["bytes"] += os.path.getsize(target)
+                return True
+            except (requests.RequestException, ConnectionError, DownloadError) as e:
+                attempt += 1
+                with self.lock:
+                    self.stats["retries"] += 1
+                if attempt > MAX_RETRIES:
+                    print(f"⚠️ {url}: giving up after {MAX_RETRIES} retries ({e})")
+                    return False
+                time.sleep(min(10, 0.2 * 2 ** attempt))
+
+    def _verify(self, url, part):
+        """Check jars/aars against the upstream .sha1 when one is published"""
+        if not url.endswith((".jar", ".aar")):
+            return
+        try:
+            response = self.session.get(url + ".sha1", headers=IDENTITY)
+        except requests.RequestException:
+            return
+        if response.status_code != 200 or not response.text.strip():
+            return
+        expected = response.text.split()[0].lower()
+        digest = hashlib.sha1()
+        with open(part, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        if digest.hexdigest() != expected:
+            os.remove(part)
+            raise DownloadError(f"{url}: sha1 mismatch")
+
+
+class Resolver:
+    """Transitive closure of Maven coordinates, resolved in parallel through a MavenStore"""
+
+    def __init__(self, store, workers=WORKERS):
+        self.store = store
+        self.workers = workers
+        self.models = {}
+        self.lock = threading.Lock()
+
+    def model(self, group, artifact, version, depth=0):
+        """Effective POM: parent chain merged, properties interpolated, BOM imports applied"""
+        key = (group, artifact, version)
+        with self.lock:
+            if key in self.models:
+                return self.models[key]
+        data = self.store.read(repository_path(group, artifact, version, "pom"))
+        if data is None or depth > 10:
+            return None
+        try:
+            pom = parse_pom(data)
+        except ET.ParseError:
+            return None
+        parent = self.model(*pom["parent"], depth=depth + 1) if pom["parent"] and all(pom["parent"]) else None
+        properties = dict(parent["properties"]) if parent else {}
+        properties.update(pom["properties"])
+        group = pom["group"] or (pom["parent"] or (group,))[0]
+        version = pom["version"] or (pom["parent"] or (None, None, version))[2]
+        properties.update({"project.groupId": group, "pom.groupId": group, "groupId": group,
+                           "project.version": version, "pom.version": version, "version": version,
+                           "project.artifactId": artifact})
+        if pom["parent"]:
+            properties["project.parent.version"] = pom["parent"][2]
+            properties["project.parent.groupId"] = pom["parent"][0]
+        managed = {}
+        for dep in pom["managed"]:
+            dep = {name: _interpolate(value, properties) if isinstance(value, str) else value
+                   for name, value in dep.items()}
+            if dep["scope"] == "import" and dep["type"] == "pom":
+                bom = self.model(dep["group"], dep["artifact"], pin(dep["version"]), depth + 1)
+                for managed_key, managed_version in (bom["managed"] if bom else {}).items():
+                    managed.setdefault(managed_key, managed_version)
+            else:
+                managed.setdefault((dep["group"], dep["artifact"]), dep["version"])
+        for managed_key, managed_version in (parent["managed"] if parent else {}).items():
+            managed.setdefault(managed_key, managed_version)
+        dependencies = []
+        for dep in (parent["dependencies"] if parent else []) + pom["dependencies"]:
+            dep = {name: _interpolate(value, properties) if isinstance(value, str) else value
+                   for name, value in dep.items()}
+            dep["version"] = dep["version"] or managed.get((dep["group"], dep["artifact"]))
+            dependencies.append(dep)
+        result = {"packaging": pom["packaging"], "properties": properties, "managed": managed,
+                  "dependencies": dependencies, "gradle_metadata": pom["gradle_metadata"]}
+        with self.lock:
+            self.models[key] = result
+        return result
+
+    def module(self, group, artifact, version):
+        """Parsed Gradle module metadata, or None"""
+        data = self.store.read(repository_path(group, artifact, version, "module"))
+        try:
+            return json.loads(data) if data else None
+        except ValueError:
+            return None
+
+    def _node(self, coordinate, platform):
+        """Resolve one coordinate; returns (info, children)"""
+        group, artifact, version = coordinate
+        model = self.model(group, artifact, version)
+        if model is None:
+            return None, []
+        module = self.module(group, artifact, version) if model["gradle_metadata"] else None
+        children = []
+        if not platform:
+            for dep in model["dependencies"]:
+                if dep["scope"] in SKIP_SCOPES or dep["optional"] or not dep["group"]:
+                    continue
+                if pin(dep["version"]):
+                    children.append(((dep["group"], dep["artifact"], pin(dep["version"])), dep["type"] == "pom"))
+        files = []
+        for variant in (module or {}).get("variants", []):
+            attributes = variant.get("attributes", {})
+            if attributes.get("org.gradle.category") == "documentation" or "org.gradle.docstype" in attributes:
+                continue
+            moved = variant.get("available-at")
+            if moved:
+                children.append(((moved["group"], moved["module"], moved["version"]), False))
+                continue
+            for dep in variant.get("dependencies", []):
+                requested = dep.get("version", {})
+                dep_version = pin(requested.get("strictly") or requested.get("requires") or requested.get("prefers"))
+                if dep_version:
+                    is_platform = any(capability.get("name", "").endswith("-bom")
+                                      for capability in dep.get("requestedCapabilities", []))
+                    children.append(((dep["group"], dep["module"], dep_version), is_platform))
+            files.extend(entry["url"] for entry in variant.get("files", []))
+        return {"packaging": model["packaging"], "files": sorted(set(files)) if module else None, "platform": platform,
+                "managed": model["managed"]}, children
+
+    def resolve(self, declared):
+        """{(group, artifact, version): info} for the closure of the declared dependencies"""
+        nodes = {}
+        seen = set()
+        pending = {}
+        platforms = [(group, artifact, version) for group, artifact, version, is_platform in declared
+                     if is_platform and version]
+        with ThreadPoolExecutor(self.workers) as pool:
+            def submit(coordinate, platform):
+                if coordinate not in seen:
+                    seen.add(coordinate)
+                    pending[pool.submit(self._node, coordinate, platform)] = coordinate
+
+            def drain():
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        info, children = future.result()
+                        nodes[pending.pop(future)] = info
+                        for child, platform in children:
+                            submit(child, platform)
+
+            # Platforms first: versionless declarations take their version from them
+            for coordinate in platforms:
+                submit(coordinate, True)
+            drain()
+            managed = {}
+            for coordinate in platforms:
+                managed.update((nodes.get(coordinate) or {}).get("managed", {}))
+            for group, artifact, version, is_platform in declared:
+                version = version or managed.get((group, artifact))
+                if version and not is_platform:
+                    submit((group, artifact, version), False)
+            drain()
+        return {coordinate: info for coordinate, info in nodes.items() if info is not None}
+
+    def artifact_paths(self, nodes):
+        """Repository paths of the files Gradle will download: highest version of every module wins"""
+        winners = {}
+        for group, artifact, version in nodes:
+            current = winners.get((group, artifact))
+            if current is None or version_key(version) > version_key(current):
+                winners[(group, artifact)] = version
+        paths = []
+        for (group, artifact), version in winners.items():
+            info = nodes[(group, artifact, version)]
+            if info["platform"] or info["packaging"] == "pom":
+                continue
+            base = repository_path(group, artifact, version, "")[:-len(f"{artifact}-{version}.")]
+            if info["files"] is not None:      # module metadata lists the files (possibly none)
+                paths.extend(base + name for name in info["files"])
+            else:
+                extension = "aar" if info["packaging"] == "aar" else "jar"
+                paths.append(repository_path(group, artifact, version, extension))
+        return paths
+
+
+def prefetch(root=".", store=None, workers=WORKERS):
+    """Resolve and download the dependency closure of the project at root; returns the store"""
+    store = store or MavenStore(upstreams=upstream_mirrors())
+    declared = declared_dependencies(root)
+    print(f"📋 {len(declared)} declared dependencies")
+    started = time.time()
+    resolver = Resolver(store, workers)
+    nodes = resolver.resolve(declared)
+    paths = resolver.artifact_paths(nodes)
+    with ThreadPoolExecutor(workers) as pool:
+        missing = [path for path, target in zip(paths, pool.map(store.fetch_artifact, paths)) if target is None]
+    print(f"📦 {len(nodes)} modules, {len(paths)} artifacts in {time.time() - started:.1f}s: "
+          f"{store.stats['downloaded']} downloaded ({store.stats['bytes'] / 1024 / 1024:.1f} MB), "
+          f"{store.stats['local']} already local, {store.stats['retries']} retries")
+    for path in missing[:20]:
+        print(f"   ⚠️ not found upstream: {path}")
+    return store
+
+
+def upstream_mirrors():
+    """Probed mirrors, fastest first (every configured one when nothing answered)"""
+    ranked = rank(MirrorProbeCache().get(MIRRORS))
+    return [result["url"] for result in ranked] or [url for _, url, _ in MIRRORS]
+
+
+class MavenProxy:
+    """Serves a MavenStore over HTTP, filling misses from upstream unless offline"""
+
+    def __init__(self, store, port=PROXY_PORT, host="127.0.0.1"):
+        self.store = store
+        self.served = self.misses = 0
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _not_found(self):
+                proxy.misses += 1
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                path = self.path.partition("?")[0].lstrip("/")
+                if not path or ".." in path.split("/"):
+                    return self._not_found()
+                checksum = next((name for name in ("sha1", "md5", "sha256", "sha512")
+                                 if path.endswith("." + name)), None)
+                target = proxy.store.fetch(path[:-len(checksum) - 1] if checksum else path)
+                if target is None:
+                    return self._not_found()
+                if checksum and os.path.exists(target + "." + checksum):
+                    target += "." + checksum
+                    checksum = None
+                proxy.served += 1
+                if checksum:
+                    # Computed locally, so checksum requests never go upstream
+                    digest = hashlib.new(checksum)
+                    with open(target, "rb") as f:
+                        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                            digest.update(chunk)
+                    data = digest.hexdigest().encode("ascii")
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    if self.command == "GET":
+                        self.wfile.write(data)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", str(os.path.getsize(target)))
+                self.end_headers()
+                if self.command == "GET":
+                    with open(target, "rb") as f:
+                        shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+
+            do_HEAD = do_GET
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def start_local_repository(init_path="init.gradle", root=".", offline=False, port=PROXY_PORT):
+    """Pre-fetch the project's dependencies, start the proxy and point init.gradle at it.
+
+    The proxy listens on the fixed PROXY_PORT (a proxy already running there
+    from "maven_proxy.py serve" is used instead), and the previous init.gradle
+    is put back when the process exits, so it never names a dead port.
+    """
+    import atexit
+
+    store = MavenStore(upstreams=[] if offline else upstream_mirrors(), offline=offline)
+    if not offline:
+        prefetch(root, store)
+    try:
+        proxy = MavenProxy(store, port=port).start()
+        url = proxy.url
+        print(f"📦 Local Maven proxy on {url} ({store.directory})")
+    except OSError:
+        proxy, url = None, f"http://127.0.0.1:{port}/"
+        print(f"📦 Using the Maven proxy already running on {url}")
+
+    try:
+        with open(init_path, "r", encoding="utf-8") as f:
+            previous = f.read()
+    except OSError:
+        previous = None
+
+    def restore():
+        if previous is None:
+            if os.path.exists(init_path):
+                os.remove(init_path)
+        else:
+            with open(init_path, "w", encoding="utf-8") as f:
+                f.write(previous)
+
+    with open(init_path, "w", encoding="utf-8") as f:
+        f.write(init_gradle([{"url": url, "kind": "central"}]))
+    atexit.register(restore)
+    return proxy
+
+
+def benchmark(modules=60, jar_kb=200, latency=0.05, drop_rate=0.2):
+    """Synthetic dependency graph behind a slow, flaky stub mirror"""
+    import random
+    import tempfile
+
+    from mock_backend import MockBackend
+
+    random.seed(7)
+    upstream = MockBackend(latency=latency)
+    upstream.start()
+    pom = ('<project xmlns="http://maven.apache.org/POM/4.0.0"><modelVersion>4.0.0</modelVersion>'
+           '<groupId>org.example</groupId><artifactId>lib{i}</artifactId><version>1.{v}</version>'
+           '<properties><dep.version>1.0</dep.version></properties><dependencies>{deps}</dependencies></project>')
+    for i in range(modules):
+        for v in (0, 1):
+            deps = "".join(f"<dependency><groupId>org.example</groupId><artifactId>lib{j}</artifactId>"
+                           f"<version>${{dep.version}}</version></dependency>"
+                           for j in random.sample(range(i + 1, modules), min(3, modules - i - 1)))
+            upstream.add_file(repository_path("org.example", f"lib{i}", f"1.{v}", "pom"),
+                              pom.format(i=i, v=v, deps=deps))
+            jar = os.urandom(jar_kb * 1024)
+            upstream.add_file(repository_path("org.example", f"lib{i}", f"1.{v}", "jar"), jar)
+            upstream.add_file(repository_path("org.example", f"lib{i}", f"1.{v}", "jar") + ".sha1",
+                              hashlib.sha1(jar).hexdigest())
+    root = tempfile.mkdtemp(prefix="maven-proxy-bench-")
+    with open(os.path.join(root, "build.gradle"), "w") as f:
+        f.write("dependencies {\n    implementation 'org.example:lib0:1.1'\n    implementation 'org.example:lib1:1.0'\n}\n")
+    try:
+        # Serial, on-demand fetching: what Gradle does against a plain remote repository
+        serial = Resolver(MavenStore(os.path.join(root, "serial"), [upstream.url + "/files/"]), workers=1)
+        started = time.perf_counter()
+        for path in serial.artifact_paths(serial.resolve(declared_dependencies(root))):
+            serial.store.fetch_artifact(path)
+        serial_seconds = time.perf_counter() - started
+
+        upstream.drop_rate = drop_rate
+        store = MavenStore(os.path.join(root, "repo"), [upstream.url + "/files/"])
+        started = time.perf_counter()
+        prefetch(root, store)
+        parallel_seconds = time.perf_counter() - started
+        upstream.drop_rate = 0.0
+
+        proxy = MavenProxy(store, port=0).start()
+        upstream.reset_counters()
+        client = Resolver(MavenStore(os.path.join(root, "client"), [proxy.url]), workers=1)
+        started = time.perf_counter()
+        served = sum(client.store.fetch_artifact(path) is not None
+                     for path in client.artifact_paths(client.resolve(declared_dependencies(root))))
+        build_seconds = time.perf_counter() - started
+        proxy.stop()
+        print(f"serial on-demand fetch:     {serial_seconds:.2f}s")
+        print(f"parallel prefetch (drops {drop_rate:.0%}): {parallel_seconds:.2f}s "
+              f"({store.stats['retries']} retries/resumes)")
+        print(f"build through proxy:        {build_seconds:.2f}s, {served} artifacts, "
+              f"{upstream.request_count} upstream requests")
+    finally:
+        upstream.stop()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    elif len(sys.argv) > 1 and sys.argv[1] == "prefetch":
+        root = sys.argv[sys.argv.index("--root") + 1] if "--root" in sys.argv[:-1] else "."
+        prefetch(root)
+    elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+        offline = "--offline" in sys.argv
+        args = [arg for arg in sys.argv[2:] if not arg.startswith("--")]
+        store = MavenStore(upstreams=[] if offline else upstream_mirrors(), offline=offline)
+        maven_proxy = MavenProxy(store, port=int(args[0]) if args else PROXY_PORT).start()
+        print(f"📦 Maven proxy on {maven_proxy.url} ({store.directory}{', offline' if offline else ''})")
+        try:
+            while True:
+                time.sleep(60)
+                print(f"[{time.strftime('%H:%M:%S')}] served {maven_proxy.served}, misses {maven_proxy.misses}, "
+                      f"downloaded {store.stats['downloaded']}")
+        except KeyboardInterrupt:
+            maven_proxy.stop()
+    else:
+        print(__doc__)
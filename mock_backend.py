@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Persian AI Assistant - Local API stub
+A small in-process HTTP server that imitates the parts of the GitHub and
+CodeMagic APIs the build scripts talk to, so the scripts can be exercised and
+benchmarked offline.
+"""
+
+import base64
+import hashlib
+import json
+import random
+import re
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def blob_sha(data):
+    """Git object id of a blob with the given bytes"""
+    return _sha1(b"blob %d\0" % len(data) + data)
+
+
+class MockBackend:
+    """Threaded stub server with request counting and optional latency"""
+
+    def __init__(self, owner="ghadirb", repo="PersianAIAssistantAndroid", latency=0.0,
+                 batch_api=True, handshake_latency=0.0, certfile=None,
+                 app_id="68d2bb0d849df2693dd0a310"):
+        self.owner = owner
+        self.repo = repo
+        self.app_id = app_id
+        self.latency = latency
+        self.handshake_latency = handshake_latency
+        self.certfile = certfile
+        self.batch_api = batch_api
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.connection_count = 0
+        self.request_log = []
+
+        # Git object store: blobs by sha, trees as {path: blob sha}, commits;
+        # file modes are kept per path ("100644" unless set otherwise)
+        self.blobs = {}
+        self.trees = {}
+        self.modes = {}
+        self.commits = {}
+        self.refs = {}
+        # Ref updates reach readers ref_lag seconds late, like GitHub's replicas
+        # right after a push: {branch: sha} as readers see it, and pending updates
+        self.ref_lag = 0.0
+        self.visible_refs = {}
+        self.ref_updates = []
+        # Recursive tree listings longer than this come back with truncated: true, as GitHub's do
+        self.tree_limit = None
+        self._seed_repository()
+
+        # CodeMagic builds, oldest first, and their scripted progress:
+        # {build_id: (start_time, [(seconds_after_start, {fields}), ...])}.
+        # default_timeline (a list, or a callable returning one) is used for
+        # builds started through POST /builds; cancelled maps a cancelled build
+        # to the seconds it ran
+        self.builds = {}
+        self.timelines = {}
+        self.cancelled = {}
+        self.default_timeline = None
+        self._build_seq = 0
+
+        # Static downloads (build logs, artifacts) served under /files/<name>,
+        # with Range support; drop_rate is the chance a transfer is cut short
+        self.files = {}
+        self.drop_rate = 0.0
+
+        self.routes = []
+        self._add_github_routes()
+        self._add_codemagic_routes()
+        self._add_file_routes()
+        self.server = None
+        self.thread = None
+
+    # ------------------------------------------------------------------ git
+    def _store_tree(self, entries):
+        body = "\n".join(f"{path} {sha}" for path, sha in sorted(entries.items()))
+        sha = _sha1(b"tree " + body.encode("utf-8"))
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def _store_commit(self, tree_sha, parents, message):
+        body = f"{tree_sha} {' '.join(parents)} {message} {time.time()}"
+        sha = _sha1(b"commit " + body.encode("utf-8"))
+        self.commits[sha] = {"tree": tree_sha, "parents": list(parents), "message": message}
+        return sha
+
+    def _store_blob(self, data):
+        sha = blob_sha(data)
+        self.blobs[sha] = data
+        return sha
+
+    def _seed_repository(self):
+        tree = self._store_tree({})
+        self._set_ref("main", self._store_commit(tree, [], "Initial commit"))
+
+    def _set_ref(self, branch, sha):
+        self.refs[branch] = sha
+        if self.ref_lag:
+            self.ref_updates.append((time.time(), branch, sha))
+        else:
+            self.visible_refs[branch] = sha
+
+    def _is_ancestor(self, ancestor, sha):
+        pending = [sha]
+        while pending:
+            sha = pending.pop()
+            if sha == ancestor:
+                return True
+            pending.extend(self.commits[sha]["parents"])
+        return False
+
+    def visible_ref(self, branch="main"):
+        """Head of a branch as readers (and CodeMagic's clone) currently see it"""
+        while self.ref_updates and self.ref_updates[0][0] <= time.time() - self.ref_lag:
+            _, updated, sha = self.ref_updates.pop(0)
+            self.visible_refs[updated] = sha
+        return self.visible_refs.get(branch)
+
+    def head_tree(self, branch="main"):
+        """Return {path: bytes} for the tip of a branch"""
+        tree = self.trees[self.commits[self.refs[branch]]["tree"]]
+        return {path: self.blobs[sha] for path, sha in tree.items()}
+
+    def commit_count(self, branch="main"):
+        count = 0
+        sha = self.refs[branch]
+        while sha:
+            count += 1
+            parents = self.commits[sha]["parents"]
+            sha = parents[0] if parents else None
+        return count
+
+    def seed_files(self, files, branch="main"):
+        """Commit {path: bytes|str} directly, bypassing the HTTP layer"""
+        tree = dict(self.trees[self.commits[self.refs[branch]]["tree"]])
+        for path, content in files.items():
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            tree[path] = self._store_blob(content)
+        tree_sha = self._store_tree(tree)
+        self._set_ref(branch, self._store_commit(tree_sha, [self.refs[branch]], "seed"))
+
+    # ------------------------------------------------------------- codemagic
+    def add_build(self, timeline=None, **fields):
+        """Create a build record; fields override the defaults.
+
+        timeline is a list of (seconds, {fields}) steps applied to the record
+        as wall-clock time passes, e.g. [(1, {"status": "building"}),
+        (5, {"status": "finished", "buildStatus": "success"})].
+        """
+        self._build_seq += 1
+        now = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+        build = {
+            "_id": "%024x" % (0x68d000000000000000000000 + self._build_seq),
+            "appId": self.app_id,
+            "workflowId": "android-workflow",
+            "branch": "main",
+            "status": "queued",
+            "createdAt": now,
+            "buildActions": [],
+            "artefacts": []
+        }
+        build.update(fields)
+        self.builds[build["_id"]] = build
+        if timeline is None:
+            timeline = self.default_timeline() if callable(self.default_timeline) else self.default_timeline
+        if timeline:
+            self.timelines[build["_id"]] = (time.time(), sorted(timeline, key=lambda step: step[0]))
+        return build
+
+    def _advance(self, build_id):
+        """Apply every timeline step that is due"""
+        if build_id not in self.timelines:
+            return
+        started, steps = self.timelines[build_id]
+        elapsed = time.time() - started
+        while steps and steps[0][0] <= elapsed:
+            self.builds[build_id].update(steps.pop(0)[1])
+        if not steps:
+            del self.timelines[build_id]
+
+    def _add_codemagic_routes(self):
+        @self.route("GET", r"/builds/(?P<build_id>[0-9a-f]+)")
+        def get_build(req, build_id):
+            self._advance(build_id)
+            build = self.builds.get(build_id)
+            if not build:
+                return 404, {"message": "Build not found"}
+            etag = '"%s"' % _sha1(json.dumps(build, sort_keys=True).encode("utf-8"))[:16]
+            if req.headers.get("If-None-Match") == etag:
+                return 304, b"", {"ETag": etag}
+            return 200, build, {"ETag": etag}
+
+        @self.route("GET", r"/builds")
+        def list_builds(req):
+            limit = int(req.query.get("limit", 10))
+            skip = int(req.query.get("skip", 0))
+            for build_id in list(self.timelines):
+                self._advance(build_id)
+            builds = [b for b in reversed(list(self.builds.values()))
+                      if b["appId"] == req.query.get("appId", self.app_id)]
+            return 200, {"builds": builds[skip:skip + limit]}
+
+        @self.route("POST", r"/builds")
+        def start_build(req):
+            body = req.json()
+            branch = body.get("branch", "main")
+            variables = (body.get("environment") or {}).get("variables") or {}
+            # The clone takes the head CodeMagic sees; the workflow then checks out BUILD_COMMIT
+            commit = variables.get("BUILD_COMMIT")
+            build = self.add_build(appId=body.get("appId", self.app_id),
+                                   workflowId=body.get("workflowId", "android-workflow"), branch=branch,
+                                   commit=commit if commit in self.commits else self.visible_ref(branch))
+            return 201, {"buildId": build["_id"], "_id": build["_id"]}
+
+        @self.route("POST", r"/builds/(?P<build_id>[0-9a-f]+)/cancel")
+        def cancel_build(req, build_id):
+            self._advance(build_id)
+            build = self.builds.get(build_id)
+            if not build:
+                return 404, {"message": "Build not found"}
+            if build_id not in self.timelines:
+                return 400, {"message": "Build has already finished"}
+            started, _ = self.timelines.pop(build_id)
+            self.cancelled[build_id] = time.time() - started
+            build.update(status="canceled")
+            return 200, {}
+
+        @self.route("GET", r"/builds/(?P<build_id>[0-9a-f]+)/artifacts")
+        def get_artifacts(req, build_id):
+            self._advance(build_id)
+            build = self.builds.get(build_id)
+            if not build:
+                return 404, {"message": "Build not found"}
+            return 200, build.get("artefacts", [])
+
+    def add_file(self, name, data):
+        """Serve bytes at /files/<name>; returns the absolute URL"""
+        self.files[name] = data.encode("utf-8") if isinstance(data, str) else data
+        return f"{self.url}/files/{name}"
+
+    def _add_file_routes(self):
+        @self.route("GET", r"/files/(?P<name>.+)")
+        def get_file(req, name):
+            if name not in self.files:
+                return 404, {"message": "Not Found"}
+            data = self.files[name]
+            headers = {"Content-Type": "application/octet-stream", "Accept-Ranges": "bytes"}
+            status = 200
+            match = re.match(r"bytes=(\d*)-(\d*)$", req.headers.get("Range", ""))
+            if match and match.group(1) + match.group(2):
+                first, last = match.groups()
+                if not first:
+                    first, last = max(0, len(data) - int(last)), len(data) - 1
+                else:
+                    first, last = int(first), min(int(last or len(data) - 1), len(data) - 1)
+                if first >= len(data):
+                    return 416, b"", {"Content-Range": f"bytes */{len(data)}"}
+                headers["Content-Range"] = f"bytes {first}-{last}/{len(data)}"
+                data, status = data[first:last + 1], 206
+            if self.drop_rate and req.command == "GET" and len(data) > 1 and random.random() < self.drop_rate:
+                # Flaky network: cut the body off somewhere in the middle
+                req.drop_after = random.randrange(1, len(data))
+            return status, data, headers
+
+    # --------------------------------------------------------------- routing
+    def route(self, method, pattern):
+        def decorator(func):
+            self.routes.append((method, re.compile(pattern + r"$"), func))
+            return func
+        return decorator
+
+    def _add_github_routes(self):
+        repo = rf"/repos/{re.escape(self.owner)}/{re.escape(self.repo)}"
+
+        @self.route("GET", repo + r"/git/ref/heads/(?P<branch>.+)")
+        def get_ref(req, branch):
+            if not self.batch_api:
+                return 404, {"message": "Not Found"}
+            if self.visible_ref(branch) is None:
+                return 404, {"message": "Not Found"}
+            return 200, {"ref": f"refs/heads/{branch}",
+                         "object": {"sha": self.visible_ref(branch), "type": "commit"}}
+
+        @self.route("GET", repo + r"/git/commits/(?P<sha>[0-9a-f]+)")
+        def get_commit(req, sha):
+            commit = self.commits.get(sha)
+            if not commit:
+                return 404, {"message": "Not Found"}
+            return 200, {"sha": sha, "tree": {"sha": commit["tree"]},
+                         "parents": [{"sha": p} for p in commit["parents"]],
+                         "message": commit["message"]}
+
+        @self.route("GET", repo + r"/compare/(?P<base>[0-9a-f]+)\.\.\.(?P<head>[0-9a-f]+)")
+        def compare(req, base, head):
+            if base not in self.commits or head not in self.commits:
+                return 404, {"message": "Not Found"}
+            if base == head:
+                return 200, {"status": "identical"}
+            if self._is_ancestor(base, head):
+                return 200, {"status": "ahead"}
+            return 200, {"status": "behind" if self._is_ancestor(head, base) else "diverged"}
+
+        @self.route("GET", repo + r"/git/trees/(?P<sha>[0-9a-f]+)")
+        def get_tree(req, sha):
+            # A commit SHA lists the commit's root tree
+            sha = self.commits[sha]["tree"] if sha in self.commits else sha
+            if sha not in self.trees:
+                return 404, {"message": "Not Found"}
+            entries = sorted(self.trees[sha].items())
+            truncated = self.tree_limit is not None and len(entries) > self.tree_limit
+            return 200, {"sha": sha, "truncated": truncated,
+                         "tree": [{"path": path, "mode": self.modes.get(path, "100644"), "type": "blob",
+                                   "sha": blob} for path, blob in entries[:self.tree_limit]]}
+
+        @self.route("POST", repo + r"/git/blobs")
+        def post_blob(req):
+            body = req.json()
+            if body.get("encoding") == "base64":
+                data = base64.b64decode(body["content"])
+            else:
+                data = body["content"].encode("utf-8")
+            return 201, {"sha": self._store_blob(data)}
+
+        @self.route("POST", repo + r"/git/trees")
+        def post_tree(req):
+            body = req.json()
+            base = body.get("base_tree")
+            entries = dict(self.trees.get(base, {})) if base else {}
+            for item in body.get("tree", []):
+                if item.get("mode"):
+                    self.modes[item["path"]] = item["mode"]
+                if item.get("sha") is None and "content" not in item:
+                    entries.pop(item["path"], None)
+                elif "content" in item:
+                    entries[item["path"]] = self._store_blob(item["content"].encode("utf-8"))
+                else:
+                    entries[item["path"]] = item["sha"]
+            return 201, {"sha": self._store_tree(entries)}
+
+        @self.route("POST", repo + r"/git/commits")
+        def post_commit(req):
+            body = req.json()
+            sha = self._store_commit(body["tree"], body.get("parents", []), body["message"])
+            return 201, {"sha": sha, "tree": {"sha": body["tree"]}}
+
+        @self.route("PATCH", repo + r"/git/refs/heads/(?P<branch>.+)")
+        def patch_ref(req, branch):
+            body = req.json()
+            new_sha = body["sha"]
+            current = self.refs.get(branch)
+            if not body.get("force") and current and current not in self.commits[new_sha]["parents"]:
+                return 422, {"message": "Update is not a fast forward"}
+            self._set_ref(branch, new_sha)
+            return 200, {"ref": f"refs/heads/{branch}", "object": {"sha": new_sha}}
+
+        @self.route("GET", repo + r"/contents/(?P<path>.+)")
+        def get_contents(req, path):
+            branch = req.query.get("ref", "main")
+            tree = self.trees[self.commits[self.refs[branch]]["tree"]]
+            if path not in tree:
+                return 404, {"message": "Not Found"}
+            data = self.blobs[tree[path]]
+            return 200, {"path": path, "sha": tree[path], "size": len(data),
+                         "encoding": "base64",
+                         "content": base64.b64encode(data).decode("ascii")}
+
+        @self.route("PUT", repo + r"/contents/(?P<path>.+)")
+        def put_contents(req, path):
+            body = req.json()
+            branch = body.get("branch", "main")
+            tree = dict(self.trees[self.commits[self.refs[branch]]["tree"]])
+            if path in tree and body.get("sha") != tree[path]:
+                return 409, {"message": f"{path} does not match {body.get('sha')}"}
+            created = path not in tree
+            tree[path] = self._store_blob(base64.b64decode(body["content"]))
+            tree_sha = self._store_tree(tree)
+            commit = self._store_commit(tree_sha, [self.refs[branch]], body["message"])
+            self._set_ref(branch, commit)
+            return (201 if created else 200), {"content": {"path": path, "sha": tree[path]},
+                                               "commit": {"sha": commit}}
+
+    # ---------------------------------------------------------------- server
+    def _make_handler(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with backend.lock:
+                    backend.connection_count += 1
+                if backend.handshake_latency:
+                    time.sleep(backend.handshake_latency)
+
+            def log_message(self, format, *args):
+                pass
+
+            def _dispatch(self):
+                path, _, query = self.path.partition("?")
+                self.query = dict(pair.partition("=")[::2] for pair in query.split("&") if pair)
+                length = int(self.headers.get("Content-Length") or 0)
+                self.body = self.rfile.read(length) if length else b""
+                with backend.lock:
+                    backend.request_count += 1
+                    backend.request_log.append((self.command, path))
+                if backend.latency:
+                    time.sleep(backend.latency)
+
+                self.drop_after = None
+                command = "GET" if self.command == "HEAD" else self.command
+                for method, pattern, func in backend.routes:
+                    match = pattern.match(path)
+                    if method == command and match:
+                        with backend.lock:
+                            result = func(self, **match.groupdict())
+                        break
+                else:
+                    result = (404, {"message": "Not Found"})
+
+                if result is None:
+                    return
+                status, payload = result[0], result[1]
+                headers = result[2] if len(result) > 2 else {}
+                if isinstance(payload, (dict, list)):
+                    data = json.dumps(payload).encode("utf-8")
+                    headers.setdefault("Content-Type", "application/json")
+                else:
+                    data = payload or b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if self.command == "HEAD":
+                    return
+                if self.drop_after is not None:
+                    self.wfile.write(data[:self.drop_after])
+                    self.close_connection = True
+                    return
+                self.wfile.write(data)
+
+            def json(self):
+                return json.loads(self.body.decode("utf-8")) if self.body else {}
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = _dispatch
+
+        return Handler
+
+    def start(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        if self.certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(self.certfile)
+            # Handshake in the handler thread rather than in the accept loop
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True,
+                                                     do_handshake_on_connect=False)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        scheme = "https" if self.certfile else "http"
+        return f"{scheme}://{host}:{port}"
+
+    def reset_counters(self):
+        with self.lock:
+            self.request_count = 0
+            self.connection_count = 0
+            self.request_log = []
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
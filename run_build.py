@@ -1,26 +1,19 @@
-import subprocess
-import sys
+import runpy
 import os
 
 # Change to project directory
 os.chdir("C:\\Users\\Admin\\Downloads\\Compressed\\PersianAIAssistantAndroid-main")
 
-# Run the automated build script
+# Run the automated build script in this process, so its output is live
 try:
     print("🚀 Starting automated build process...")
-    result = subprocess.run([sys.executable, "automated_build.py"], 
-                          capture_output=True, text=True, timeout=2000)
-    
-    print("STDOUT:")
-    print(result.stdout)
-    
-    if result.stderr:
-        print("STDERR:")
-        print(result.stderr)
+    try:
+        runpy.run_path("automated_build.py", run_name="__main__")
+        return_code = 0
+    except SystemExit as e:
+        return_code = e.code or 0
         
-    print(f"Return code: {result.returncode}")
+    print(f"Return code: {return_code}")
     
-except subprocess.TimeoutExpired:
-    print("⏰ Process timed out")
 except Exception as e:
     print(f"❌ Error: {e}")
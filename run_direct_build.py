@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-import subprocess
 import sys
 import os
 
@@ -11,16 +10,16 @@ project_dir = r"C:\Users\Admin\Downloads\Compressed\PersianAIAssistantAndroid-ma
 
 try:
     os.chdir(project_dir)
+    sys.path.insert(0, project_dir)
     print(f"📁 Working directory: {os.getcwd()}")
     
-    # Execute the direct build script
-    result = subprocess.run([sys.executable, "direct_build.py"], 
-                           capture_output=False, 
-                           text=True)
+    # Execute the direct build pipeline in this process
+    from direct_build import main
     
-    print(f"\n🏁 Build process completed with exit code: {result.returncode}")
+    return_code = 0 if main() else 1
+    print(f"\n🏁 Build process completed with exit code: {return_code}")
     
-    if result.returncode == 0:
+    if return_code == 0:
         print("✅ SUCCESS: Persian AI Assistant build process completed!")
         print("📱 Your APK should be ready for download from CodeMagic")
     else:
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+from artifact_downloader import DownloadError, download_artifact
+from http_client import make_codemagic_session
+from mock_backend import MockBackend
+
+DATA = bytes(range(256)) * 4096     # 1 MB
+
+
+@pytest.fixture
+def backend():
+    with MockBackend() as backend:
+        yield backend
+
+
+def artifact_for(backend, data=DATA, name="app-release.apk"):
+    return {"name": name, "url": backend.add_file(name, data), "size_bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def test_download_verifies_and_cleans_up(backend, tmp_path):
+    stats = download_artifact(artifact_for(backend), str(tmp_path), make_codemagic_session(backend.url))
+    assert (tmp_path / "app-release.apk").read_bytes() == DATA
+    assert stats["bytes"] == len(DATA) and stats["resumed_bytes"] == 0
+    assert os.listdir(tmp_path) == ["app-release.apk"]
+
+
+def test_resume_continues_from_saved_progress(backend, tmp_path):
+    artifact = artifact_for(backend)
+    half = len(DATA) // 2
+    part = tmp_path / "app-release.apk.part"
+    part.write_bytes(DATA[:half] + b"\0" * (len(DATA) - half))
+    (tmp_path / "app-release.apk.part.json").write_text(json.dumps(
+        {"url": artifact["url"], "total": len(DATA), "segments": [[0, len(DATA) - 1, half]]}))
+
+    stats = download_artifact(artifact, str(tmp_path), make_codemagic_session(backend.url))
+    assert stats["resumed_bytes"] == half
+    assert (tmp_path / "app-release.apk").read_bytes() == DATA
+
+
+@pytest.mark.parametrize("part", [None, b"short"])
+def test_stale_progress_without_matching_part_starts_over(backend, tmp_path, part):
+    artifact = artifact_for(backend)
+    if part is not None:
+        (tmp_path / "app-release.apk.part").write_bytes(part)
+    # Progress left behind by a run whose .part is gone or was rewritten
+    (tmp_path / "app-release.apk.part.json").write_text(json.dumps(
+        {"url": artifact["url"], "total": len(DATA), "segments": [[0, len(DATA) - 1, len(DATA) - 10]]}))
+
+    stats = download_artifact(artifact, str(tmp_path), make_codemagic_session(backend.url))
+    assert stats["resumed_bytes"] == 0
+    assert (tmp_path / "app-release.apk").read_bytes() == DATA
+    assert os.listdir(tmp_path) == ["app-release.apk"]
+
+
+def test_checksum_mismatch_fails(backend, tmp_path):
+    artifact = dict(artifact_for(backend), sha256="0" * 64)
+    with pytest.raises(DownloadError):
+        download_artifact(artifact, str(tmp_path), make_codemagic_session(backend.url))
+    assert not (tmp_path / "app-release.apk").exists()
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from build_queue import ADOPTED, SUPERSEDED, TRIGGERED, TriggerQueue
+from http_client import make_codemagic_session
+from mock_backend import MockBackend
+
+
+def push(backend, content):
+    """Commit to main in the mock and return the new head"""
+    backend.seed_files({"push.txt": content})
+    return backend.refs["main"]
+
+
+@pytest.fixture
+def backend():
+    with MockBackend() as backend:
+        backend.default_timeline = [(60, {"status": "finished", "buildStatus": "success"})]
+        yield backend
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "queue.db")
+
+
+@pytest.fixture
+def queue(backend, path):
+    queue = TriggerQueue(path, make_codemagic_session(backend.url), window=0.3)
+    yield queue
+    queue.close()
+
+
+def test_lone_request_triggers_at_once(backend, queue):
+    commit = push(backend, "1")
+    started = time.monotonic()
+    result = queue.request(commit)
+    assert time.monotonic() - started < queue.window
+    assert result["outcome"] == TRIGGERED
+    assert result["commit"] == commit
+    assert backend.builds[result["build_id"]]["commit"] == commit
+
+
+def test_same_commit_is_deduplicated(backend, queue):
+    commit = push(backend, "1")
+    first = queue.request(commit)
+    second = queue.request(commit)
+    assert second["outcome"] == "duplicate"
+    assert second["build_id"] == first["build_id"]
+    assert len(backend.builds) == 1
+
+
+def test_failed_build_is_retried(backend, queue):
+    commit = push(backend, "1")
+    first = queue.request(commit)
+    backend.timelines.pop(first["build_id"])
+    backend.builds[first["build_id"]].update(status="failed")
+    second = queue.request(commit)
+    assert second["outcome"] == TRIGGERED
+    assert second["build_id"] != first["build_id"]
+    assert len(backend.builds) == 2
+
+
+def test_webhook_build_is_adopted(backend, queue):
+    commit = push(backend, "1")
+    webhook = backend.add_build(commit=commit)
+    result = queue.request(commit)
+    assert result == {"build_id": webhook["_id"], "commit": commit, "outcome": ADOPTED}
+    assert len(backend.builds) == 1
+
+
+def test_burst_is_coalesced_into_newest_commit(backend, queue, path):
+    running = queue.request(push(backend, "1"))
+    commits = [push(backend, "2"), push(backend, "3")]
+    results = {}
+
+    def ask(commit):
+        own = TriggerQueue(path, queue.session, window=queue.window)
+        results[commit] = own.request(commit)
+        own.close()
+
+    threads = []
+    for commit in commits:
+        thread = threading.Thread(target=ask, args=(commit,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    newest = results[commits[1]]
+    assert newest["outcome"] == TRIGGERED
+    assert results[commits[0]] == {"build_id": newest["build_id"], "commit": commits[1], "outcome": SUPERSEDED}
+    assert len(backend.builds) == 2
+    assert running["build_id"] in backend.cancelled
+
+
+def test_retrying_an_older_commit_keeps_the_newer_build(backend, queue):
+    older = push(backend, "1")
+    failed = queue.request(older)
+    backend.timelines.pop(failed["build_id"])
+    backend.builds[failed["build_id"]].update(status="failed")
+    newer = queue.request(push(backend, "2"))
+
+    retried = queue.request(older)
+    assert retried["outcome"] == TRIGGERED
+    assert retried["build_id"] not in (failed["build_id"], newer["build_id"])
+    assert newer["build_id"] not in backend.cancelled
+    assert queue.request(backend.refs["main"])["build_id"] == newer["build_id"]
@@ -0,0 +1,73 @@
+import pytest
+
+from build_status import (CANCELLED, FAILED, SUCCESS, TIMEOUT, StatusPoller, build_commit, expected_duration,
+                          is_terminal, normalize_status, unwrap_build)
+
+
+@pytest.mark.parametrize("build, expected", [
+    ({}, ("queued", None)),
+    ({"status": "queued"}, ("queued", None)),
+    ({"status": "Preparing"}, ("queued", None)),
+    ({"status": "building"}, ("running", None)),
+    ({"status": "publishing"}, ("running", None)),
+    ({"status": "successful"}, ("finished", SUCCESS)),
+    ({"status": "failed"}, ("finished", FAILED)),
+    ({"status": "canceled"}, ("finished", CANCELLED)),
+    ({"status": "skipped"}, ("finished", CANCELLED)),
+    ({"status": "timeout"}, ("finished", TIMEOUT)),
+    ({"status": "finished", "buildStatus": "success"}, ("finished", SUCCESS)),
+    ({"status": "finished", "buildStatus": "cancelled"}, ("finished", CANCELLED)),
+    ({"status": "finished", "buildStatus": "timeout"}, ("finished", TIMEOUT)),
+    ({"status": "finished", "buildStatus": "failed"}, ("finished", FAILED)),
+    ({"status": "finished"}, ("finished", FAILED)),
+])
+def test_normalize_status(build, expected):
+    assert normalize_status(build) == expected
+    assert is_terminal(build) == (expected[0] == "finished")
+
+
+def test_build_commit():
+    assert build_commit({"commit": {"hash": "abc123"}}) == "abc123"
+    assert build_commit({"commit": "abc123"}) == "abc123"
+    assert build_commit({}) is None
+
+
+def test_unwrap_build():
+    build = {"_id": "1", "status": "building"}
+    assert unwrap_build({"build": build}) is build
+    assert unwrap_build(build) is build
+
+
+class Response:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+        self.headers = {}
+
+    def json(self):
+        return self.data
+
+
+class Session:
+    """Answers every GET with the same body"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def get(self, path, **kwargs):
+        return Response(self.data)
+
+
+def test_poller_reads_enveloped_records():
+    poller = StatusPoller("1", Session({"build": {"_id": "1", "status": "finished", "buildStatus": "success"}}))
+    assert poller.wait(timeout=5) == ("finished", SUCCESS, {"_id": "1", "status": "finished", "buildStatus": "success"})
+
+
+def test_expected_duration_leaves_out_cancelled_builds():
+    def build(status, minutes):
+        return {"workflowId": "android-workflow", "status": status, "buildStatus": "success",
+                "startedAt": "2025-01-01T10:00:00.000Z", "finishedAt": f"2025-01-01T10:{minutes:02d}:00.000Z"}
+
+    builds = [build("finished", 10), build("finished", 12), build("canceled", 1), build("canceled", 2),
+              build("canceled", 3), build("building", 50)]
+    assert expected_duration("android-workflow", Session({"builds": builds})) == 11 * 60
@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+import urllib.request
+
+import pytest
+
+import build_webhook
+from build_status import FAILED, SUCCESS
+from build_webhook import WebhookReceiver, parse_event, sign, wait_for_build
+from http_client import make_codemagic_session
+from mock_backend import MockBackend
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def receiver(monkeypatch):
+    receiver = WebhookReceiver(0, SECRET, host="127.0.0.1").start()
+    monkeypatch.setattr(build_webhook, "_receiver", receiver)
+    yield receiver
+    receiver.stop()
+
+
+def post(receiver, payload, delay=0):
+    """POST a GitHub-signed payload, after delay seconds in the background"""
+    body = json.dumps(payload).encode("utf-8")
+
+    def send():
+        time.sleep(delay)
+        urllib.request.urlopen(urllib.request.Request(
+            f"http://127.0.0.1:{receiver.port}/webhook", body,
+            {"Content-Type": "application/json", "X-Hub-Signature-256": sign(body, SECRET)}))
+
+    if delay:
+        threading.Thread(target=send).start()
+    else:
+        send()
+
+
+def workflow_run(commit, conclusion):
+    return {"action": "completed", "workflow_run": {"id": 42, "name": "Android Debug Build", "status": "completed",
+                                                    "conclusion": conclusion, "head_branch": "main",
+                                                    "head_sha": commit}}
+
+
+def test_parse_event():
+    build = {"_id": "1", "status": "finished", "buildStatus": "success"}
+    assert parse_event({"build": build}) == build
+    assert parse_event(build) == build
+    assert parse_event({"zen": "ping"}) is None
+    assert parse_event(workflow_run("abc", "failure"))["commit"] == "abc"
+
+
+def test_unsigned_events_are_rejected(receiver):
+    body = json.dumps({"_id": "1", "status": "finished"}).encode("utf-8")
+    with pytest.raises(urllib.error.HTTPError):
+        urllib.request.urlopen(urllib.request.Request(f"http://127.0.0.1:{receiver.port}/webhook", body))
+    assert receiver.rejected == 1 and not receiver.builds
+
+
+def test_codemagic_event_wakes_its_waiter(receiver):
+    post(receiver, {"build": {"_id": "68d0", "status": "finished", "buildStatus": "success"}}, delay=0.1)
+    assert receiver.wait("68d0", 5)["buildStatus"] == "success"
+
+
+def test_workflow_run_wakes_a_waiter_by_commit(receiver):
+    post(receiver, workflow_run("c" * 40, "success"), delay=0.1)
+    assert receiver.wait("68d0", 5, "c" * 40)["_id"] == "42"
+    assert receiver.wait("68d0", 0.1) is None
+    assert receiver.wait("68d0", 0.1, "c" * 40, since=time.monotonic()) is None
+
+
+def test_workflow_run_result_is_confirmed_with_codemagic(receiver):
+    with MockBackend() as backend:
+        commit = "d" * 40
+        build_id = backend.add_build(commit=commit, timeline=[
+            (0, {"status": "building"}), (0.5, {"status": "finished", "buildStatus": "success"})])["_id"]
+        # The GitHub run fails first; CodeMagic's own webhook reports the build later
+        post(receiver, workflow_run(commit, "failure"), delay=0.1)
+        post(receiver, {"build": {"_id": build_id, "status": "finished", "buildStatus": "success"}}, delay=0.7)
+        started = time.monotonic()
+        state, result, build = wait_for_build(build_id, timeout=10, webhook_deadline=5,
+                                              session=make_codemagic_session(backend.url),
+                                              expected_seconds=60, commit=commit)
+        assert (state, result, build["_id"]) == ("finished", SUCCESS, build_id)
+        assert time.monotonic() - started < 3
+
+
+def test_workflow_run_ends_the_wait_with_the_codemagic_result(receiver):
+    with MockBackend() as backend:
+        commit = "e" * 40
+        build_id = backend.add_build(commit=commit, status="finished", buildStatus="failed")["_id"]
+        post(receiver, workflow_run(commit, "success"), delay=0.1)
+        started = time.monotonic()
+        state, result, _ = wait_for_build(build_id, timeout=10, webhook_deadline=5,
+                                          session=make_codemagic_session(backend.url),
+                                          expected_seconds=60, commit=commit)
+        assert (state, result) == ("finished", FAILED)
+        assert time.monotonic() - started < 2
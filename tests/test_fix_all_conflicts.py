@@ -0,0 +1,88 @@
+import io
+import os
+
+import pytest
+
+from fix_all_conflicts import ConflictError, resolve_file, resolve_stream, strategy_for
+
+CONFLICT = ("before\n"
+            "<<<<<<< HEAD\n"
+            "ours\n"
+            "||||||| base\n"
+            "base\n"
+            "=======\n"
+            "theirs\n"
+            ">>>>>>> branch\n"
+            "after\n")
+
+
+@pytest.mark.parametrize("strategy, kept", [
+    ("ours", "ours\n"),
+    ("theirs", "theirs\n"),
+    ("base", "base\n"),
+    ("union", "ours\ntheirs\n"),
+])
+def test_resolve_stream_strategies(strategy, kept):
+    target = io.StringIO()
+    assert resolve_stream(io.StringIO(CONFLICT), target, strategy) == 1
+    assert target.getvalue() == "before\n" + kept + "after\n"
+
+
+def test_base_without_diff3_section_keeps_ours():
+    target = io.StringIO()
+    resolve_stream(io.StringIO("<<<<<<< HEAD\na\n=======\nb\n>>>>>>> x\n"), target, "base")
+    assert target.getvalue() == "a\n"
+
+
+def test_marker_lookalikes_are_kept():
+    text = "<<<<<<<<<< not a marker\n=======x\n"
+    target = io.StringIO()
+    assert resolve_stream(io.StringIO(text), target) == 0
+    assert target.getvalue() == text
+
+
+@pytest.mark.parametrize("text", [
+    "<<<<<<< HEAD\na\n=======\nb\n",
+    "<<<<<<< HEAD\n<<<<<<< HEAD\na\n=======\nb\n>>>>>>> x\n",
+])
+def test_broken_blocks_raise(text):
+    with pytest.raises(ConflictError):
+        resolve_stream(io.StringIO(text), io.StringIO())
+
+
+def test_strategy_for_matches_path_or_name():
+    rules = [("docs/*", "theirs"), ("*.md", "union")]
+    assert strategy_for("docs/guide.txt", rules) == "theirs"
+    assert strategy_for("app/README.md", rules) == "union"
+    assert strategy_for("app/Main.kt", rules, "base") == "base"
+
+
+def test_resolve_file_replaces_in_place(tmp_path):
+    path = tmp_path / "Main.kt"
+    path.write_bytes(CONFLICT.replace("\n", "\r\n").encode("utf-8"))
+    os.chmod(path, 0o755)
+    assert resolve_file(str(path), "theirs") == (1, None)
+    assert path.read_bytes() == b"before\r\ntheirs\r\nafter\r\n"
+    assert os.stat(path).st_mode & 0o777 == 0o755
+    assert os.listdir(tmp_path) == ["Main.kt"]
+
+
+def test_resolve_file_leaves_clean_files_alone(tmp_path):
+    path = tmp_path / "clean.txt"
+    path.write_text("nothing here\n")
+    before = os.stat(path).st_mtime_ns
+    assert resolve_file(str(path)) == (0, None)
+    assert os.stat(path).st_mtime_ns == before
+    assert os.listdir(tmp_path) == ["clean.txt"]
+
+
+def test_dry_run_prints_diff_and_writes_nothing(tmp_path):
+    path = tmp_path / "a.txt"
+    text = CONFLICT.rstrip("\n")
+    path.write_text(text)
+    resolved, diff = resolve_file(str(path), "ours", dry_run=True, label="a.txt")
+    assert resolved == 1
+    assert path.read_text() == text
+    assert diff == ("--- a/a.txt\n+++ b/a.txt\n@@ -1,9 +1,3 @@\n"
+                    " before\n-<<<<<<< HEAD\n ours\n-||||||| base\n-base\n-=======\n-theirs\n->>>>>>> branch\n"
+                    " after\n\\ No newline at end of file\n")
@@ -0,0 +1,43 @@
+import pytest
+
+from github_publisher import publish_files
+from http_client import make_github_session
+from mock_backend import MockBackend
+
+FILES = [("codemagic.yaml", "workflows: {}\n"), ("gradle.properties", "org.gradle.caching=true\n"),
+         ("gradlew", "#!/bin/sh\nexec java -jar gradle-wrapper.jar \"$@\"\n")]
+
+
+@pytest.fixture
+def backend():
+    with MockBackend() as backend:
+        backend.seed_files({"gradlew": "#!/bin/sh\n", "README.md": "hi\n"})
+        backend.modes["gradlew"] = "100755"
+        backend.reset_counters()
+        yield backend
+
+
+def test_three_files_in_one_commit_with_five_requests(backend):
+    result = publish_files(FILES, "update", session=make_github_session(backend.url))
+    assert result["mode"] == "batch"
+    assert sorted(result["files"]) == sorted(path for path, _ in FILES)
+    assert backend.request_count == 5
+    assert backend.commit_count() == 3
+    assert backend.head_tree()["gradlew"] == FILES[2][1].encode("utf-8")
+    assert backend.modes["gradlew"] == "100755"
+
+
+def test_unchanged_files_are_not_sent(backend):
+    publish_files(FILES, "update", session=make_github_session(backend.url))
+    result = publish_files(FILES[:2] + [("README.md", "hi\n")], "again", session=make_github_session(backend.url))
+    assert result["commit"] is None
+    assert sorted(result["unchanged"]) == ["README.md", "codemagic.yaml", "gradle.properties"]
+    assert backend.commit_count() == 3
+
+
+def test_truncated_listing_falls_back_to_per_file_updates(backend):
+    backend.tree_limit = 1
+    result = publish_files(FILES[:2], "update", session=make_github_session(backend.url))
+    assert result["mode"] == "contents"
+    assert sorted(result["files"]) == ["codemagic.yaml", "gradle.properties"]
+    assert backend.head_tree()["codemagic.yaml"] == b"workflows: {}\n"
@@ -0,0 +1,59 @@
+import base64
+import http.client
+
+import pytest
+
+from gradle_cache import BuildCacheServer
+
+KEY = "0123456789abcdef0123456789abcdef"
+AUTH = "Basic " + base64.b64encode(b"ci:secret").decode("ascii")
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = BuildCacheServer(str(tmp_path), port=0, username="ci", password="secret", entry_max_mb=1).start()
+    yield server
+    server.stop()
+
+
+def put(server, key, headers, body=b""):
+    """Send the headers and body; the server must answer before anything past the headers is needed"""
+    host, port = server.server.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    connection.putrequest("PUT", f"/cache/{key}")
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    connection.close()
+    return response.status
+
+
+def get(server, key):
+    host, port = server.server.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    connection.request("GET", f"/cache/{key}")
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response.status, body
+
+
+def test_authenticated_put_is_stored(server):
+    assert put(server, KEY, {"Authorization": AUTH, "Content-Length": "5"}, b"hello") == 201
+    assert get(server, KEY) == (200, b"hello")
+    assert server.size == 5
+
+
+@pytest.mark.parametrize("key, headers, status", [
+    (KEY, {"Content-Length": str(1 << 40)}, 401),
+    (KEY, {"Authorization": "Basic Y2k6d3Jvbmc=", "Content-Length": str(1 << 40)}, 401),
+    ("../../etc/passwd", {"Authorization": AUTH, "Content-Length": str(1 << 40)}, 400),
+    (KEY, {"Authorization": AUTH, "Content-Length": str(1 << 40)}, 413),
+    (KEY, {"Authorization": AUTH}, 411),
+])
+def test_bad_puts_are_refused_before_the_body(server, key, headers, status):
+    # No body is sent at all: a server that tried to read it would time out instead of answering
+    assert put(server, key, headers) == status
+    assert get(server, KEY)[0] == 404
+    assert server.size == 0
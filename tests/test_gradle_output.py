@@ -0,0 +1,99 @@
+import io
+import json
+
+import pytest
+
+from gradle_output import KOTLIN_RE, GradleOutputParser, parse_duration
+
+
+@pytest.mark.parametrize("line, file, position, message", [
+    ("e: file:///src/main/A.kt:12:5 Unresolved reference: foo", "/src/main/A.kt", ("12", "5"),
+     "Unresolved reference: foo"),
+    ("w: file:///C:/work/app/A.kt:3:1 Parameter 'x' is never used", "C:/work/app/A.kt", ("3", "1"),
+     "Parameter 'x' is never used"),
+    ("e: /src/main/A.kt: (12, 5): Type mismatch", "/src/main/A.kt", ("12", "5"), "Type mismatch"),
+    ("e: C:\\work\\A.kt: (7, 9): Type mismatch", "C:\\work\\A.kt", ("7", "9"), "Type mismatch"),
+])
+def test_kotlin_diagnostics(line, file, position, message):
+    match = KOTLIN_RE.match(line)
+    assert match.group("file") == file
+    assert (match.group("line") or match.group("line2"), match.group("column") or match.group("column2")) == position
+    assert match.group("message") == message
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("1 mins 2.5 secs", 62.5), ("4m 12s", 252), ("120 ms", 0.12), ("1 hrs 1 mins", 3660), ("0.8s", 0.8),
+])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == pytest.approx(seconds)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+FAILED_BUILD = """\
+Starting a Gradle Daemon (subsequent builds will be faster)
+> Configure project :app
+Download https://repo.maven.apache.org/maven2/a/b/1.0/b-1.0.pom, took 250 ms
+> Task :app:preBuild UP-TO-DATE
+> Task :app:compileDebugKotlin
+e: file:///src/main/A.kt:12:5 Unresolved reference: foo
+w: /src/main/B.kt: (3, 1): Variable 'x' is never used
+:app:compileDebugKotlin (Thread[Execution worker,5,main]) completed. Took 4.2 secs.
+> Task :app:compileDebugJavaWithJavac FAILED
+/src/main/C.java:7: error: cannot find symbol
+ERROR: /src/main/res/layout/a.xml:3: AAPT: error: attribute not found.
+
+FAILURE: Build failed with an exception.
+
+* What went wrong:
+Execution failed for task ':app:compileDebugJavaWithJavac'.
+
+BUILD FAILED in 12s
+"""
+
+
+def test_parser_collects_tasks_diagnostics_and_result():
+    clock, events = Clock(), io.StringIO()
+    parser = GradleOutputParser(events, clock)
+    for line in FAILED_BUILD.splitlines(True):
+        clock.now += 0.5
+        parser.feed(line)
+
+    assert parser.daemon_started
+    assert parser.downloads == 1 and parser.download_seconds == pytest.approx(0.25)
+    assert parser.result == "FAILED"
+    assert parser.failure == "Execution failed for task ':app:compileDebugJavaWithJavac'."
+    assert parser.tasks[":app:preBuild"]["outcome"] == "UP-TO-DATE"
+    assert parser.tasks[":app:compileDebugKotlin"]["duration"] == pytest.approx(4.2)
+    assert parser.tasks[":app:compileDebugKotlin"]["measured"]
+    assert parser.tasks[":app:compileDebugJavaWithJavac"]["outcome"] == "FAILED"
+
+    assert parser.error_count == 3 and parser.warning_count == 1
+    assert [(e["file"], e["line"], e["column"], e["task"]) for e in parser.errors] == [
+        ("/src/main/A.kt", 12, 5, ":app:compileDebugKotlin"),
+        ("/src/main/C.java", 7, None, ":app:compileDebugJavaWithJavac"),
+        ("/src/main/res/layout/a.xml", 3, None, ":app:compileDebugJavaWithJavac"),
+    ]
+    assert parser.warnings[0]["message"] == "Variable 'x' is never used"
+
+    kinds = [json.loads(line)["event"] for line in events.getvalue().splitlines()]
+    assert kinds[0] == "daemon_started" and kinds[-1] == "build_finished"
+    assert kinds.count("error") == 3
+
+
+def test_plain_console_durations_are_estimated():
+    clock = Clock()
+    parser = GradleOutputParser(clock=clock)
+    for seconds, line in [(1, "> Task :app:compileDebugKotlin"), (4, "> Task :app:dexDebug"),
+                          (6, "BUILD SUCCESSFUL in 6s")]:
+        clock.now = seconds
+        parser.feed(line)
+    assert parser.result == "SUCCESSFUL"
+    assert parser.task_report() == [(":app:compileDebugKotlin", "EXECUTED", 3, False),
+                                    (":app:dexDebug", "EXECUTED", 2, False)]
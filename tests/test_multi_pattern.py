@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from multi_pattern import FIND_KEYS, MultiPattern
+
+
+def naive(buffer, patterns, anchored=()):
+    found = []
+    for pattern in dict.fromkeys(patterns):
+        at = buffer.find(pattern)
+        while at >= 0:
+            if pattern not in anchored or at == 0 or buffer[at - 1:at] == b"\n":
+                found.append((at, pattern))
+            at = buffer.find(pattern, at + 1)
+    return sorted(found)
+
+
+def sample(seed, size=20000):
+    random.seed(seed)
+    words = [b"error", b"warning", b"<<<<<<<", b"=======", b">>>>>>>", b"Task", b"\n", b" ", b"abc", b"e: "]
+    return b"".join(random.choice(words) for _ in range(size // 5))
+
+
+@pytest.mark.parametrize("count", [3, FIND_KEYS + 8])
+def test_finditer_matches_naive_search(count):
+    buffer = sample(count)
+    patterns = [b"error", b"<<<<<<< ", b"warning\n", b"Task e"] + [b"abc%04d" % i for i in range(count)]
+    assert list(MultiPattern(patterns).finditer(buffer)) == naive(buffer, patterns)
+
+
+@pytest.mark.parametrize("count", [3, FIND_KEYS + 8])
+def test_line_start_anchoring(count):
+    buffer = b"<<<<<<< HEAD\nx <<<<<<< no\n=======\n>>>>>>> b\n"
+    patterns = [b"<<<<<<<", b"=======", b">>>>>>>"] + [b"zz%04d" % i for i in range(count)]
+    matcher = MultiPattern(patterns, line_start=True)
+    assert list(matcher.finditer(buffer)) == naive(buffer, patterns, anchored=patterns)
+    assert [pattern for _, pattern in matcher.finditer(buffer)] == [b"<<<<<<<", b"=======", b">>>>>>>"]
+
+
+def test_only_listed_patterns_are_anchored():
+    matcher = MultiPattern([b"error", b"e: "], line_start=[b"e: "])
+    assert list(matcher.finditer(b"x error e: \ne: y")) == [(2, b"error"), (12, b"e: ")]
+
+
+def test_start_and_end_bound_the_search():
+    matcher = MultiPattern([b"abc"], line_start=True)
+    assert list(matcher.finditer(b"abc\nabc\nabc", 4, 10)) == [(4, b"abc")]
+    assert matcher.search(b"xx abc") is None
+    assert MultiPattern([b"abc"]).search(b"xx abc") == (3, b"abc")
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 4096])
+def test_stream_matches_whole_buffer(chunk):
+    buffer = sample(1)
+    matcher = MultiPattern([b"<<<<<<<", b"error"], line_start=[b"<<<<<<<"])
+    chunks = (buffer[i:i + chunk] for i in range(0, len(buffer), chunk))
+    assert list(matcher.stream(chunks)) == list(matcher.finditer(buffer))
+
+
+def test_lines_reports_each_line_once():
+    buffer = b"ok\nerror error\nfine\nwarning at end"
+    matcher = MultiPattern([b"error", b"warning"])
+    assert list(matcher.lines(buffer)) == [(3, 14, b"error"), (20, len(buffer), b"warning")]
+
+
+def test_rejects_empty_patterns():
+    with pytest.raises(ValueError):
+        MultiPattern([])
+    with pytest.raises(ValueError):
+        MultiPattern([b"ok", b""])
+    with pytest.raises(ValueError):
+        MultiPattern(["text"])
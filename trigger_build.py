@@ -1,34 +1,32 @@
 #!/usr/bin/env python3
-import requests
 import json
 import sys
 
+from build_queue import TriggerQueue
+from github_publisher import branch_head
+from http_client import APP_ID
+
 def trigger_codemagic_build():
-    url = "https://api.codemagic.io/builds"
-    headers = {
-        "x-auth-token": "sC89KeWx9DqYyg1gGFHXF0IIxLwJV4PdM-0L1urk4nQ",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "appId": "68d2bb0d849df2693dd0a310",
-        "workflowId": "simple-apk",
-        "branch": "main"
-    }
+    workflow, branch = "simple-apk", "main"
     
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.text}")
+        # Keyed by the commit main points at, so a build that already covers it is reused
+        commit = branch_head(branch)
+        queue = TriggerQueue()
+        try:
+            queued = queue.request(commit, workflow, branch)
+        finally:
+            queue.close()
+        build_id = queued["build_id"]
         
-        if response.status_code in [200, 201]:
-            build_data = response.json()
-            build_id = build_data.get('buildId') or build_data.get('_id', 'Unknown')
+        if queued["outcome"] == "triggered":
             print(f"[SUCCESS] Build triggered successfully!")
-            print(f"Build ID: {build_id}")
-            print(f"Build URL: https://codemagic.io/app/{payload['appId']}/build/{build_id}")
+        elif queued["outcome"] == "adopted":
+            print(f"[INFO] Using the build the push webhook started for {commit[:7]}")
         else:
-            print(f"[ERROR] Failed to trigger build: {response.text}")
+            print(f"[INFO] {branch} ({(commit or '?')[:7]}) is already covered by a {workflow} build")
+        print(f"Build ID: {build_id}")
+        print(f"Build URL: https://codemagic.io/app/{APP_ID}/build/{build_id}")
             
     except Exception as e:
         print(f"[ERROR] Error: {e}")